@@ -1,6 +1,8 @@
 from opentrons import protocol_api
 from math import ceil
 
+from ot2_tools.assembly import Component, plan_assembly
+
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
@@ -10,6 +12,15 @@ metadata = {
                       containing 15 µl of PCR master mix (including Fw primer)"""
 }
 
+#Recipes: water goes into the empty dilution wells from above with one tip, then each primer with a new tip per column.
+#The reactions get template, then the diluted Rv primer with a new tip per column (the leftover diluted primer is kept,
+#so the tip must not carry template into it), mixing at the end
+NUM_REACTIONS = 48
+PRIMER_DILUTION = plan_assembly([Component("water", 156), Component("Rv primer", 4, per_well=True)], NUM_REACTIONS,
+                                reservoir=True)
+REACTIONS = plan_assembly([Component("template", 5, per_well=True), Component("Rv primer", 5, per_well=True)],
+                          NUM_REACTIONS, prefilled=15)
+
 #We need to define a run function which takes a protocol as argument
 def run(protocol: protocol_api.ProtocolContext):
 
@@ -31,17 +42,15 @@ def run(protocol: protocol_api.ProtocolContext):
     pcr_plate = temperature_module.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt")
 
     #Define some constants and well name lists here for easy transfers later
-    num_reactions = 48
-    num_columns = ceil(num_reactions / 8)
+    num_columns = ceil(NUM_REACTIONS / 8)
     well_names = [f"A{x+1}" for x in range(num_columns)]
-
+    pipettes = {"p20_multi_gen2": p20, "p300_multi_gen2": p300}
 
     #Dilute primers
-    p20.transfer(4, [primer_plate[well] for well in well_names], [diluted_primer_plate[well] for well in well_names])
-    p300.transfer(156, reservoir["A1"], [diluted_primer_plate[well] for well in well_names])
-
-    #Add template
-    p20.transfer(5, [plasmid_plate[well] for well in well_names], [pcr_plate[well] for well in well_names])
+    PRIMER_DILUTION.run(pipettes, {"water": reservoir["A1"], "Rv primer": [primer_plate[well] for well in well_names]},
+                        [diluted_primer_plate[well] for well in well_names])
 
-    #Add Rv Primer
-    p20.transfer(5, [diluted_primer_plate[well] for well in well_names], [pcr_plate[well] for well in well_names], mix_after=(2, 10))
\ No newline at end of file
+    #Add template and Rv primer
+    REACTIONS.run(pipettes, {"template": [plasmid_plate[well] for well in well_names],
+                             "Rv primer": [diluted_primer_plate[well] for well in well_names]},
+                  [pcr_plate[well] for well in well_names])
\ No newline at end of file
@@ -1,6 +1,8 @@
 from opentrons import protocol_api
 from math import ceil
 
+from ot2_tools.fill import multi_dispense
+
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
@@ -28,10 +30,15 @@ def run(protocol: protocol_api.ProtocolContext):
     num_columns = ceil(num_reactions / 8)
     well_names = [f"A{x+1}" for x in range(num_columns)]
     new_well_names = [f"A{x+7}" for x in range(num_columns)]
+    #Percent - the dye only has to make the samples dense and visible enough to load, which 20% more or less
+    #dye does not change. multi_dispense() plans for about 17%, within it with a margin
+    dye_tolerance = 20
 
 
     #Reserve PCR reactions
     p20.transfer(5, [pcr_plate[well] for well in well_names], [pcr_plate[new_well] for new_well in new_well_names], new_tip="always")
 
-    #Add loading dye
-    p20.transfer(2.22, reservoir["A1"], [pcr_plate[well] for well in well_names], new_tip="always")
+    #Add loading dye with one tip, several columns per aspiration: each drop goes onto the well wall from the
+    #top of the well, so the tip never touches the reactions
+    error = multi_dispense(p20, 2.22, reservoir["A1"], [pcr_plate[well] for well in well_names], dye_tolerance)
+    protocol.comment(f"Loading dye added to within about {error:.0f}% - spin the plate down before loading the gel")
@@ -1,16 +1,23 @@
 from opentrons import protocol_api
 from math import ceil
 
+from ot2_tools.assembly import Component, plan_assembly
+
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "Golden Gate Reaction Setup",
     "description": """This protocol sets up a 96-well plate of Golden Gate DNA assembly reactions, from a master mix and a 96-well plate of DNA fragments
-                      Setup: 96-well PCR plate for the reactions (filled with master mix in the final column of wells, 16 µl per reaction)
+                      Setup: 96-well PCR plate for the reactions (filled with master mix in the final column of wells, 100.4 µl per well for 48 reactions -
+                                                                  python -m ot2_tools.assembly gives the volume for other reaction counts)
                              96-well PCR plate with gBlocks (4 ul per reaction, minimum 10 ul)""",
     "author": "Naail Kashif-Khan"
 }
 
+#Reaction recipe: master mix goes into the empty wells with one tip, then gBlocks with a new tip per column
+NUM_REACTIONS = 48
+ASSEMBLY = plan_assembly([Component("master mix", 15.9), Component("gBlocks", 4.1, per_well=True)], NUM_REACTIONS, mix=4)
+
 #We need to define a run function which takes a protocol as argument
 def run(protocol: protocol_api.ProtocolContext):
 
@@ -26,16 +33,10 @@ def run(protocol: protocol_api.ProtocolContext):
     p300 = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=[p300_tips])
     
     #Define some constants and well name lists here for easy transfers later
-    num_reactions = 48
-    num_columns = ceil(num_reactions / 8)
+    num_columns = ceil(NUM_REACTIONS / 8)
     well_names = [f"A{x+1}" for x in range(num_columns)]
 
-    #Add master mix to reaction plate
-    p20.distribute(15.9,
-                 target_golden_gate_reaction_plate["A12"],
-                 [target_golden_gate_reaction_plate[well] for well in well_names])
-    
-    #Add gBlocks to each well
-    p20.transfer(4.1,
-                 [gblock_plate[well] for well in well_names],
-                 [target_golden_gate_reaction_plate[well] for well in well_names], mix_after=(4, 10), new_tip="always")
\ No newline at end of file
+    #Add master mix from the final column, then gBlocks to each well
+    ASSEMBLY.run({"p20_multi_gen2": p20, "p300_multi_gen2": p300},
+                 {"master mix": target_golden_gate_reaction_plate["A12"], "gBlocks": [gblock_plate[well] for well in well_names]},
+                 [target_golden_gate_reaction_plate[well] for well in well_names])
\ No newline at end of file
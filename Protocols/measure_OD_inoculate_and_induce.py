@@ -1,16 +1,28 @@
 from opentrons import protocol_api
 from math import ceil
+import time
+
+from ot2_tools.liquid_classes import liquid_class
+from ot2_tools.od import inoculated, inoculation_volumes
+from ot2_tools.runlog import recorded
 
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "Inoculation and Induction of Protein Expression Cultures",
     "description": """This protocol will setup a 96-well plate to measure OD of overnight cultures in LB medium, and then inoculate expression cultures in TB medium.
-                      After a pause of 3 hours, the protocol will add 10 mM IPTG (to a final concentration of 1 mM)""",
+                      The inoculum for each column is worked out from the plate reader export saved to OD_EXPORT_DIR during the run, so every expression culture starts at the same OD.
+                      The run stops if that export does not turn up, or if more than one does.
+                      After a pause of 3 hours, the protocol will add 10 mM IPTG (to a final concentration of 1 mM, measured for each column's volume)
+                      to the cultures it inoculated""",
     "author": "Naail Kashif-Khan"
 }
 
-#We need to define a run function which takes a protocol as argument
+#Plate reader exports are saved here (on the robot) while the protocol is paused
+OD_EXPORT_DIR = "/data/user_storage/od_exports"
+
+#We need to define a run function which takes a protocol as argument (timed into a run log, see ot2_tools.runlog)
+@recorded
 def run(protocol: protocol_api.ProtocolContext):
 
     #Load tips and labware  
@@ -37,14 +49,16 @@ def run(protocol: protocol_api.ProtocolContext):
     p300.drop_tip()
 
     #Add overnight cultures
-    p20.flow_rate.dispense = 300 #Increase flow rate to fully mix
-
-    p20.transfer(10, [culture_plate[well] for well in well_names],
-                 [od_plate[well] for well in well_names], mix_after=(15, 20), new_tip="always")
+    with liquid_class(p20, "culture"): #Fast dispenses to fully mix
+        p20.transfer(10, [culture_plate[well] for well in well_names],
+                     [od_plate[well] for well in well_names], mix_after=(15, 20), new_tip="always")
     
-    p20.flow_rate.dispense = 94 #Reset flow rate
-    
-    protocol.pause("Measure OD of 96-well plate now")
+    measured_after = time.time()
+    protocol.pause(f"Measure OD of 96-well plate now and save the export to {OD_EXPORT_DIR}")
+
+    #Inoculum per column from the ODs (10 µl culture in 200 µl, blanks in the next column)
+    volumes = inoculation_volumes(protocol, OD_EXPORT_DIR, measured_after, plates=[list(range(1, num_columns + 1))],
+                                  blank_column=num_columns + 1, dilution=20, medium_volume=225, default=25)
 
     #Add TB medium to culture plate
     p300.pick_up_tip()
@@ -52,12 +66,16 @@ def run(protocol: protocol_api.ProtocolContext):
                   new_tip="never")
     p300.drop_tip()
     
-    #Inoculate wells with overnight culture
-    p300.transfer(25, [culture_plate[well] for well in well_names],
-                  [culture_plate[f"A{i + num_columns + 1}"] for i in range(num_columns)], new_tip="always", mix_after=(200, 3))
+    #Inoculate wells with overnight culture, leaving out columns where nothing grew
+    volumes, cultures, expression_wells = inoculated(volumes, [culture_plate[well] for well in well_names],
+                                                     [culture_plate[f"A{i + num_columns + 1}"] for i in range(num_columns)])
+    if not volumes:
+        protocol.comment("No culture grew, so there is nothing to inoculate or induce")
+        return
+    p300.transfer(volumes, cultures, expression_wells, new_tip="always", mix_after=(3, 200))
     
     protocol.pause("Grow cells at 37 degrees with 1800 rpm shaking for 3 hours now")
 
-    #Induce with 1 mM IPTG
-    p300.transfer(27.7, reservoir["A3"],
-                  [culture_plate[f"A{i + num_columns + 1}"] for i in range(num_columns)], new_tip="always", mix_after=(200, 3))
\ No newline at end of file
+    #Induce with 1 mM IPTG: a ninth of each well's volume (225 µl TB plus its inoculum) of the 10 mM stock
+    p300.transfer([round((225 + volume) / 9, 1) for volume in volumes], reservoir["A3"], expression_wells,
+                  new_tip="always", mix_after=(3, 200))
\ No newline at end of file
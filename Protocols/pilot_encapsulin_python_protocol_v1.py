@@ -1,5 +1,7 @@
 from opentrons import protocol_api
-from math import ceil
+from ot2_tools.temperature import TemperatureSchedule
+from ot2_tools.thermocycler import Cycle, Hold, ThermocyclerProfile
+from ot2_tools.transformation import COLD_TEMPERATURE, Transformation
 
 #This metadata is not all required but it"s good to have
 metadata = {
@@ -8,83 +10,38 @@ metadata = {
     "description": """This protocol is a pilot protocol for the cloning and transformation of synthetic Encapsulin sequences.
                         In this protocol we will use the Thermocycler GEN1 module to run Golden Gate assembly of our DNA sequences
                         followed by transformation into E. coli DH5alpha. We will perform heat shock, add SOC medium, and then outgrowth
-                        before plating 10 ul of the outgrowth mixture. We'll also plate 10 ul of a 2x dilution of this outgrowth mixture.""",
+                        before plating 10 ul of the outgrowth mixture. We'll also plate 10 ul of a 2x dilution of this outgrowth mixture,
+                        made in the pipette tip on the way to the agar plate.""",
     "author": "Naail Kashif-Khan"
 }
 
-#We need to define a run function which takes a protocol as argument
-def run(protocol: protocol_api.ProtocolContext):
+#Golden Gate assembly: 30 cycles of 5 minutes at 37 and 16 degrees, then 20 minutes at 65 degrees to inactivate the enzymes
+GOLDEN_GATE = ThermocyclerProfile([Cycle([Hold(37, minutes=5), Hold(16, minutes=5)], repetitions=30), Hold(65, minutes=20)],
+                                  lid_temperature=95, block_max_volume=20)
 
-    #Load tips and labware
-    p20_tips = protocol.load_labware("opentrons_96_tiprack_20ul", 4)
-    p300_tips = protocol.load_labware("opentrons_96_tiprack_300ul", 5)
-    reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", 1)
-    agar_plate = protocol.load_labware("nunc_rectangular_agar_plate", 2)
+#Reactions and volumes for the transformation once the Golden Gate reactions have run
+TRANSFORMATION = Transformation(
+    num_reactions=8, dna_volume=15, soc_volume=175, heat_shock="module", outgrowth="module", dna_mix=(2, 10),
+    cell_labware="opentrons_96_aluminumblock_generic_pcr_strip_200ul",
+    slots={"reservoir": 1, "agar": 2, "temperature": 3}, tip_slots={"p20_multi_gen2": [4], "p300_multi_gen2": [5]})
 
-    #Load pipettes and hardware modules
-    p20 = protocol.load_instrument("p20_multi_gen2", "right", tip_racks=[p20_tips])
-    p300 = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=[p300_tips])
+#We need to define a run function which takes a protocol as argument
+def run(protocol: protocol_api.ProtocolContext):
 
+    #Load hardware modules, and the Golden Gate reaction plate in the thermocycler
     temperature_module  = protocol.load_module("temperature module gen2", 3)
     thermocycler = protocol.load_module("thermocycler module")
-
-    #Load labware for temperature and thermocycler modules
-    competent_cell_plate = temperature_module.load_labware("opentrons_96_aluminumblock_generic_pcr_strip_200ul")
     golden_gate_reaction_plate = thermocycler.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt")
 
-    #Define some constants and well name lists here for easy transfers later
-    num_reactions = 8
-    num_columns = ceil(num_reactions / 8)
-    well_names = [f"A{x+1}" for x in range(num_columns)]
-
-    #Run golden gate reactions
-    thermocycler.close_lid()
-    thermocycler.set_lid_temperature(temperature=95)
-
-    gg_cycles = [
-    {"temperature": 37, "hold_time_minutes": 5},
-    {"temperature": 16, "hold_time_minutes": 5}
-    ]
-    thermocycler.execute_profile(steps=gg_cycles, repetitions=30, block_max_volume=20)
-    thermocycler.set_block_temperature(temperature=65, hold_time_minutes=20, block_max_volume=20)
-
-    thermocycler.deactivate_lid()
-    thermocycler.deactivate_block()
-    thermocycler.open_lid()
-
-    #Transfer golden gate reaction mixture to competent cell plates
-    temperature_module.set_temperature(celsius=4)
-    protocol.pause("Add competent cells in PCR strips to temperature module now - don't forget to fill aluminium block with water!")
-
-    p20.transfer(15,
-                 [golden_gate_reaction_plate[well] for well in well_names],
-                 [competent_cell_plate[well] for well in well_names], mix_after=(2, 10), new_tip="always")
-
-    #Incubate on ice, heat shock, and recovery
-    protocol.delay(minutes=30)
-    temperature_module.set_temperature(celsius=42)
-    protocol.delay(seconds=60)
-    temperature_module.set_temperature(celsius=4)
-    protocol.delay(minutes=5)
-
-    #Add SOC medium and outgrowth
-    p300.transfer(175, reservoir["A1"], [competent_cell_plate[well] for well in well_names], mix_after=(2, 100), new_tip="always")
-    
-    temperature_module.set_temperature(celsius=37)
-    protocol.delay(minutes=60)
-
-    #Plate undiluted outgrowth mixture
-    p20.transfer(10,
-                 [competent_cell_plate[well] for well in well_names],
-                 [agar_plate[well].bottom(0) for well in well_names],
-                 new_tip="always", blow_out=True, blowout_location="destination well")
+    #Start cooling the temperature module for the competent cells, it gets there while the thermocycler runs
+    block = TemperatureSchedule(protocol, temperature_module)
+    block.start(COLD_TEMPERATURE)
 
-    #Dilute outgrowth 2x and plate again
-    p300.transfer(95, [competent_cell_plate[well] for well in well_names], reservoir["A12"], mix_before=(2, 100), new_tip="always")
-    p300.transfer(95, reservoir["A1"], [competent_cell_plate[well] for well in well_names], mix_after=(2, 100), new_tip="always")
+    #Run golden gate reactions - python -m ot2_tools.thermocycler gives the time each part of the profile takes.
+    #The reactions go in ready-made, so there is no pipetting for a lid pre-heat to overlap: run() heats the lid,
+    #and the time below includes that
+    protocol.comment(f"Golden Gate profile takes {GOLDEN_GATE.duration() / 60:.0f} minutes")
+    GOLDEN_GATE.run(thermocycler)
 
-    new_well_names = [f"A{x + num_columns + 1}" for x in range(num_columns)]
-    p20.transfer(10,
-                 [competent_cell_plate[well] for well in well_names],
-                 [agar_plate[well].bottom(0) for well in new_well_names],
-                 new_tip="always", blow_out=True, blowout_location="destination well") 
\ No newline at end of file
+    #Transform the reactions straight out of the thermocycler
+    TRANSFORMATION.run(protocol, dna_plate=golden_gate_reaction_plate, block=block)
@@ -1,5 +1,7 @@
 from opentrons import protocol_api
 
+from ot2_tools.liquid_classes import liquid_class, withdraw
+
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
@@ -23,35 +25,24 @@ def run(protocol: protocol_api.ProtocolContext):
     #Will dispense 20 ul to columns A6, A7, and A8 from well A2 of the 12-well reservoir
     p300.distribute(20, reservoir["A2"], [golden_gate_reaction_plate[f"A{i}"] for i in range(6, 9)], new_tip="once")
 
-    #Set flow rates of p300 pipette to recommended values for 90% glycerol
-    #This has the same viscosity as sillicone oil so it should be a good guideline
-    p300.flow_rate.aspirate = 64.75
-    p300.flow_rate.dispense = 64.75
-    p300.flow_rate.blow_out = 4
+    #Pipette with the settings for viscous oil: the recommended flow rates for 90% glycerol,
+    #which has the same viscosity as sillicone oil so it should be a good guideline
+    with liquid_class(p300, "viscous oil") as oil:
+        p300.pick_up_tip()
+        for i in range(6, 9):
+            #Aspirate with lower flow rate and a delay of 8 seconds, then withdraw slowly
+            p300.aspirate(135, reservoir["A3"])
+            protocol.delay(seconds=oil.delay)
+            withdraw(p300, reservoir["A3"], oil)
 
-    p300.pick_up_tip()
-    for i in range(6, 9):
-        #Aspirate with lower flow rate, slower withdrawal speed, and a delay of 8 seconds
-        p300.move_to(reservoir["A3"].top())
-        protocol.max_speeds["z"] = 1
-        p300.aspirate(135, reservoir["A3"])
-        protocol.delay(seconds=8)
-        p300.move_to(reservoir["A3"].top())
-        del protocol.max_speeds["z"]
-
-        #Dispense with lower flow rate, slower blowout rate, and delay of 8 seconds
-        p300.dispense(150, golden_gate_reaction_plate[f"A{i}"].top())
-        protocol.delay(8)
-
-        #Blow out with lower flow rate
-        p300.blow_out()
-    
-    p300.drop_tip()
-
-    #Reset the flow rate and speed settings
-    p300.flow_rate.aspirate = 94
-    p300.flow_rate.dispense = 94
-    p300.flow_rate.blow_out = 94
+            #Dispense with lower flow rate, slower blowout rate, and delay of 8 seconds
+            p300.dispense(150, golden_gate_reaction_plate[f"A{i}"].top())
+            protocol.delay(oil.delay)
+
+            #Blow out with lower flow rate
+            p300.blow_out()
+
+        p300.drop_tip()
 
     #Transfer loading dye from under sillicone oil to a fresh well
     p300.pick_up_tip()
@@ -1,5 +1,7 @@
 from opentrons import protocol_api
-from math import ceil
+from ot2_tools.dilution import tip_dilution
+from ot2_tools.transformation import SPOT_HEIGHT
+from ot2_tools.planner import Labware, Phase, plan_batch
 
 #This metadata is not all required but it"s good to have
 metadata = {
@@ -7,53 +9,74 @@ metadata = {
     "protocolName": "Transformation of Purified Plasmid DNA",
     "description": """This protocol will tranform pure plasmid DNA into E. coli T7-Express (or BL21, or any protein expression strian you prefer). The protocol will mix plasmid with cells and pause to incubate at 4 degrees, wait for you to heat shock
                       the cells in a water bath, add SOC medium, then pause for you to carry out the out growth in a thermomixer/shaker, then resume again to plate cells onto an agar plate
-                      NOTE: Because we've run out of slots on the OT-2 deck, this protocol will only plate the undiluted outgrowth mixtures.
-                      Use the next protocol in the series to dilute and plate the cultures again after.""",
+                      Both the undiluted and the 2x diluted outgrowth are plated in this run, so there is no separate plating step after it.
+                      The tip racks and agar plates are worked out by ot2_tools.planner, which splits a screen too large for one deck
+                      (more than 96 plasmids) into batches. Set run_number to run the later batches of a larger screen.
+                      Deck layout: agar plates on 1 and 9, plasmid plate on 2, competent cells on the temperature module on 3, reservoir on 6,
+                      p20 tips on 5 and 8, p300 tips on 4. The run repeats this layout in a comment before it starts moving.""",
     "author": "Naail Kashif-Khan"
 }
 
-#We need to define a run function which takes a protocol as argument
-def run(protocol: protocol_api.ProtocolContext):
-
-    #Load tips and labware
-    p20_tips = [protocol.load_labware("opentrons_96_tiprack_20ul", n) for n in [5, 8]]
-    p300_tips = [protocol.load_labware("opentrons_96_tiprack_300ul", n) for n in [4, 7]]
-    reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", 6)
-
-    agar_plate = protocol.load_labware("nunc_rectangular_agar_plate", 1)
-    plasmid_plate = protocol.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt", 2)
+#Labware roles and liquid handling phases for the planner
+LABWARE = [
+    Labware("agar_plate", "nunc_rectangular_agar_plate"),
+    Labware("plasmid_plate", "armadillo_96_wellplate_200ul_pcr_full_skirt"),
+    Labware("reservoir", "usascientific_12_reservoir_22ml", kind="reservoir"),
+    Labware("competent_cell_plate", "armadillo_96_wellplate_200ul_pcr_full_skirt", module="temperature module gen2"),
+]
 
-    #Load pipettes and hardware modules
-    p20 = protocol.load_instrument("p20_multi_gen2", "right", tip_racks=p20_tips)
-    p300 = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=p300_tips)
+PHASES = [
+    Phase("add plasmid", "p20_multi_gen2", 10, "plasmid_plate", "competent_cell_plate"),
+    Phase("add SOC", "p300_multi_gen2", 125, "reservoir", "competent_cell_plate", reagent="SOC"),
+    Phase("plate undiluted", "p20_multi_gen2", 10, "competent_cell_plate", "agar_plate", dest_block="undiluted"),
+    Phase("plate diluted", "p20_multi_gen2", 5, "reservoir", "agar_plate", dest_block="diluted", new_tip="never",
+          reagent="SOC"),
+]
 
-    temperature_module  = protocol.load_module("temperature module gen2", 3)
+#The deck as it has always been set up, with a second agar plate for the diluted spots: agar plates on 1 and 9,
+#plasmids on 2, temperature module on 3, reservoir on 6, p20 tips on 5 and 8, p300 tips on 4
+SLOTS = {"agar_plate": [1, 9], "plasmid_plate": 2, "competent_cell_plate": 3, "reservoir": 6}
+TIP_SLOTS = {"p20_multi_gen2": [5, 8], "p300_multi_gen2": [4]}
 
-    #Load labware for temperature and thermocycler modules
-    competent_cell_plate = temperature_module.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt") 
+#We need to define a run function which takes a protocol as argument
+def run(protocol: protocol_api.ProtocolContext):
 
-    #Define some constants and well name lists here for easy transfers later
+    #Define some constants here, and let the planner work out the plates and tips on the pinned deck
     num_reactions = 51
-    num_columns = ceil(num_reactions / 8)
-    well_names = [f"A{x+1}" for x in range(num_columns)]
+    run_number = 1
+    plan = plan_batch(num_reactions, LABWARE, PHASES, slots=SLOTS, tip_slots=TIP_SLOTS)
+    batch = plan.runs[run_number - 1]
+
+    #Load tips, labware, pipettes and hardware modules
+    labware, pipettes, modules = batch.load(protocol)
+    p20 = pipettes["p20_multi_gen2"]
+    p300 = pipettes["p300_multi_gen2"]
+    temperature_module = modules["temperature module gen2"]
 
-    #Transfer golden gate reaction mixture to competent cell plates
+    #Transfer plasmid DNA to competent cell plates
     temperature_module.set_temperature(celsius=4)
     protocol.pause("Add competent cells in PCR strips to temperature module now - don't forget to fill aluminium block with water!")
 
-    p20.transfer(10, [plasmid_plate[well] for well in well_names],
-                     [competent_cell_plate[well] for well in well_names], mix_after=(1, 10), new_tip="always")
+    p20.transfer(10, *batch.wells("add plasmid", labware), mix_after=(1, 10), new_tip="always")
 
     #Incubate on ice and then wait for heat shock
     protocol.delay(minutes=30)
     protocol.pause("Heat shock cells and then return to temperature module now")
 
     #Add SOC medium and then wait for outgrowth
-    p300.transfer(125, reservoir["A1"], [competent_cell_plate[well] for well in well_names], mix_after=(2, 100), new_tip="always")
+    p300.transfer(125, *batch.wells("add SOC", labware), mix_after=(2, 100), new_tip="always")
     protocol.pause("Remove cells and incubate in thermomixer for outgrowth now")
 
-    #Plate undiluted outgrowth mixture
-    p20.transfer(10,
-                 [competent_cell_plate[well] for well in well_names],
-                 [agar_plate[well].bottom(0) for well in well_names],
-                 new_tip="always", blow_out=True, blowout_location="destination well")
+    #Plate 2x diluted and undiluted outgrowth mixture with one tip per column: SOC, an air gap and the
+    #culture mix on the diluted spot, then the same tip plates the neat culture. Spots go on from just above
+    #the agar so the tip never touches it before going back into the culture
+    cultures, undiluted = batch.wells("plate undiluted", labware)
+    soc, diluted = batch.wells("plate diluted", labware)
+    for culture, soc_well, diluted_spot, undiluted_spot in zip(cultures, soc, diluted, undiluted):
+        p20.pick_up_tip()
+        tip_dilution(p20, 10, 2, culture, soc_well, diluted_spot.bottom(SPOT_HEIGHT))
+        p20.blow_out(diluted_spot)
+        p20.aspirate(10, culture)
+        p20.dispense(10, undiluted_spot.bottom(SPOT_HEIGHT))
+        p20.blow_out(undiluted_spot)
+        p20.drop_tip()
@@ -1,35 +1,40 @@
 from opentrons import protocol_api
+from ot2_tools.planner import Labware, Phase, plan_batch
 
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "Set up overnight plates",
-    "description": """This protocol will add 250 µl of LB medium from a reservoir to each well of 2x 96-well deep well plates""",
+    "description": """This protocol will add 250 µl of LB medium from a reservoir to each well of 2x 96-well deep well plates
+                      Deck layout: culture plates on 1 and 2, reservoir on 3, p300 tips on 4. The run repeats this layout in a comment before it starts moving.""",
     "author": "Naail Kashif-Khan"
 }
 
-#We need to define a run function which takes a protocol as argument
-def run(protocol: protocol_api.ProtocolContext):
+#Labware roles and liquid handling phases for the planner
+LABWARE = [
+    Labware("culture_plates", "abgene_96_wellplate_2200ul"),
+    Labware("reservoir", "usascientific_12_reservoir_22ml", kind="reservoir"),
+]
+
+PHASES = [
+    Phase("add LB", "p300_multi_gen2", 250, "reservoir", "culture_plates", new_tip="once", reagent="LB"),
+]
 
-    #Load tips and labware
-    p300_tips = protocol.load_labware("opentrons_96_tiprack_300ul", 4)
-    reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", 3)
+#The deck as it has always been set up: culture plates on 1 and 2, reservoir on 3, p300 tips on 4
+SLOTS = {"culture_plates": [1, 2], "reservoir": 3}
+TIP_SLOTS = {"p300_multi_gen2": [4]}
 
-    culture_plates = [protocol.load_labware("abgene_96_wellplate_2200ul", n) for n in [1, 2]]
+#We need to define a run function which takes a protocol as argument
+def run(protocol: protocol_api.ProtocolContext):
 
-    #Load pipettes and hardware modules
-    p300 = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=[p300_tips])
+    #Define some constants here, and let the planner work out the plates and tips on the pinned deck
+    num_cultures = 168
+    plan = plan_batch(num_cultures, LABWARE, PHASES, slots=SLOTS, tip_slots=TIP_SLOTS)
+    batch = plan.runs[0]
 
-    #Make a list of all wells we're using in this protocol
-    locations = []
-    limits = [13, 10]
-    for i, plate in enumerate(culture_plates):
-        locations.extend([plate[f"A{x}"] for x in range(1, limits[i])])
+    #Load tips, labware and pipettes
+    labware, pipettes, _ = batch.load(protocol)
+    p300 = pipettes["p300_multi_gen2"]
 
-    #Distribute LB medium
-    #Need to do this in three steps because one reservoir well only holds enough for 8 destination wells
-    p300.pick_up_tip()
-    p300.transfer(250, reservoir["A1"], locations[:8], new_tip="never")
-    p300.transfer(250, reservoir["A2"], locations[8:16], new_tip="never")
-    p300.transfer(250, reservoir["A3"], locations[16:], new_tip="never")
-    p300.drop_tip()
\ No newline at end of file
+    #Distribute LB medium with one tip, from the reservoir wells the planner sized for it
+    p300.transfer(250, *batch.wells("add LB", labware), new_tip="once")
@@ -4,8 +4,9 @@ from opentrons import protocol_api
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "Set up plates for OD measurement",
-    "description": """This protocol will add 20 µl of cell culture from 2x 96-well deep well plates, to standard 96-well plates for plate reader measurement.
-                      We'll also add 180 µl of medium to each well, and the final column of each destination plate will contain 200 µl of blank medium""",
+    "description": """This protocol will add 10 µl of cell culture from 2x 96-well deep well plates, to standard 96-well plates for plate reader measurement.
+                      We'll also add 190 µl of medium to each well, and the final column of each destination plate will contain 200 µl of blank medium.
+                      Save the plate reader export of each plate on the robot as /data/user_storage/od_exports/solubility_screen_od_plate_1.csv and _2.csv: step 6 sets its inoculum volumes from them""",
     "author": "Naail Kashif-Khan"
 }
 
@@ -1,14 +1,22 @@
 from opentrons import protocol_api
+from ot2_tools.od import inoculated, inoculation_volumes
 
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "Set up expression plates",
     "description": """This protocol will add 225 µl of TB medium from a reservoir to each well of 2x 96-well deep well plates.
-                      We'll then add 25 µl from each well of the two overnight plates to the expression plates""",
+                      We'll then add overnight culture from each well of the two overnight plates to the expression plates, with the volume for each column
+                      worked out from the plate reader exports of the two OD plates from step 5, saved under the names in OD_EXPORTS.
+                      The run stops if either export is missing or does not cover its plate""",
     "author": "Naail Kashif-Khan"
 }
 
+#Plate reader exports of the step 5 OD plates, one per plate in the order they were measured (the run
+#comments when each was saved, to check they are this screen's)
+OD_EXPORTS = ["/data/user_storage/od_exports/solubility_screen_od_plate_1.csv",
+              "/data/user_storage/od_exports/solubility_screen_od_plate_2.csv"]
+
 #We need to define a run function which takes a protocol as argument
 def run(protocol: protocol_api.ProtocolContext):
 
@@ -41,5 +49,13 @@ def run(protocol: protocol_api.ProtocolContext):
     p300.transfer(225, reservoir["A3"], expression_wells[16:], new_tip="never")
     p300.drop_tip()
 
-    #Inoculate expression wells with overnight cultures
-    p300.transfer(25, overnight_wells, expression_wells, mix_after=(2, 125), new_tip="always")
\ No newline at end of file
+    #Inoculum per column from the ODs (10 µl culture in 200 µl, blanks in column 12 of each OD plate)
+    volumes = inoculation_volumes(protocol, OD_EXPORTS, None, plates=[list(range(1, 12)), list(range(1, 11))],
+                                  blank_column=12, dilution=20, medium_volume=225, default=25)
+
+    #Inoculate expression wells with overnight cultures, leaving out columns where nothing grew
+    volumes, overnight_wells, expression_wells = inoculated(volumes, overnight_wells, expression_wells)
+    if volumes:
+        p300.transfer(volumes, overnight_wells, expression_wells, mix_after=(2, 125), new_tip="always")
+    else:
+        protocol.comment("No culture grew, so nothing is inoculated")
\ No newline at end of file
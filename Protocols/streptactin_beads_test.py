@@ -1,16 +1,21 @@
 from opentrons import protocol_api
 from math import ceil
 
+from ot2_tools.beads import MagneticSeparation
+from ot2_tools.liquid_classes import liquid_class
+from ot2_tools.runlog import recorded
+
 #This metadata is not all required but it"s good to have
 metadata = {
     "apiLevel": "2.13",
     "protocolName": "96-well Streptactin Magnetic Bead Purification",
     "description": """This protocol will perform batch purification of Strep-tagged proteins in a 96-well plate using magnetic Streptactin beads. It will equilibrate beads, add sample, then
-                        perform washing and elution steps.""",
+                        perform washing and elution steps. Bead settling times and supernatant removal heights follow the volume in the wells (see ot2_tools.beads).""",
     "author": "Naail Kashif-Khan"
 }
 
-#We need to define a run function which takes a protocol as argument
+#We need to define a run function which takes a protocol as argument (timed into a run log, see ot2_tools.runlog)
+@recorded
 def run(protocol: protocol_api.ProtocolContext):
 
     #Load tips and labware
@@ -32,84 +37,68 @@ def run(protocol: protocol_api.ProtocolContext):
     num_reactions = 32
     num_columns = ceil(num_reactions / 8)
     well_names = [f"A{x+1}" for x in range(num_columns)]
+    bead_slurry_volume = 50
+
+    #Tracks the volume in the bead wells to time each separation and set removal heights
+    separation = MagneticSeparation(protocol, magnetic_module, [beads_plate[well] for well in well_names], initial_volume=bead_slurry_volume, engage_height=6.8)
 
     #Initialize temperature module
     temperature_module.set_temperature(celsius=4)
 
     #Equilibrate beads in Buffer W
-    p300.flow_rate.dispense = 300 #Increase flow rate to fully resuspend beads
     p300.pick_up_tip()
     
-    for _ in range(2):
-        #Add buffer and resuspend beads
-        magnetic_module.disengage()
-        p300.transfer(300, reservoir["A1"], [beads_plate[well] for well in well_names], mix_after=(3, 200), new_tip="never")
+    with liquid_class(p300, "bead resuspension"): #Fast dispenses to fully resuspend beads
+        for _ in range(2):
+            #Add buffer and resuspend beads
+            magnetic_module.disengage()
+            p300.transfer(300, reservoir["A1"], [beads_plate[well] for well in well_names], mix_after=(3, 200), new_tip="never")
+            separation.add(300)
 
-        #Separate beads
-        magnetic_module.engage(height=6.8)
-        protocol.delay(minutes=3) #Allow time for magnetic beads to settle
+            #Separate beads
+            separation.engage() #Wait for magnetic beads to settle
+
+            #Remove supernatant
+            with liquid_class(p300, "bead supernatant"): #Slow aspiration to avoid disturbing beads
+                p300.transfer(300, separation.remove(300), reservoir["A12"], new_tip="never") #Aspirate under the surface, never closer than 2.5mm to the bottom of the well
 
-        #Remove supernatant
-        p300.flow_rate.aspirate = 15 #Decrease flow rate to avoid disturbing beads
-        p300.transfer(300, [beads_plate[well].bottom(2.5) for well in well_names], reservoir["A12"], new_tip="never") #Aspirate from 2.5mm above the bottom of the well
-        p300.flow_rate.aspirate = 94 #Reset flow rate to speed up protocol
-    
     #Remove the final bit of liquid from the beads
-    p300.flow_rate.aspirate = 15 #Decrease flow rate to avoid disturbing beads
-    p300.transfer(50, [beads_plate[well].bottom(2.5) for well in well_names], reservoir["A12"], new_tip="never") #Aspirate from 2.5mm above the bottom of the well
-    p300.flow_rate.aspirate = 94 #Reset flow rate to speed up protocol
-    p300.flow_rate.dispense = 94 #Reset flow rate
+    with liquid_class(p300, "bead supernatant"):
+        p300.transfer(bead_slurry_volume, separation.remove(bead_slurry_volume), reservoir["A12"], new_tip="never")
     magnetic_module.disengage()
 
     #Load sample, dilute with Buffer W, and incubate
     p300.transfer(150, reservoir["A2"], [beads_plate[well] for well in well_names], new_tip="never")
     p300.drop_tip()
     p300.transfer(50, [lysate_plate[well] for well in well_names], [beads_plate[well] for well in well_names], new_tip="always") #Aspirate more than the theoretical sample volume, since some wells may have more volume (pipetting errors)
+    separation.add(150 + 50)
     protocol.pause("Incubate beads at room temperature with 700 rpm shaking for 60 minutes")
 
     #Separate beads and remove supernatant
-    magnetic_module.engage(height=6.8)
-    protocol.delay(minutes=3) #Allow time for magnetic beads to settle
+    separation.engage() #Wait for magnetic beads to settle
 
-    p300.flow_rate.aspirate = 15 #Decrease flow rate to avoid disturbing beads
-    p300.transfer(200, [beads_plate[well].bottom(2.5) for well in well_names], reservoir["A4"], new_tip="always") #Aspirate from 2.5mm above the bottom of the well
-    p300.flow_rate.aspirate = 94 #Reset flow rate to speed up protocol
+    with liquid_class(p300, "bead supernatant"):
+        p300.transfer(200, separation.remove(200), reservoir["A4"], new_tip="always")
 
-    #Wash beads in Buffer W
-    p300.flow_rate.dispense = 300 #Increase flow rate to fully resuspend beads
-    
-    for _ in range(2):
-        #Add buffer and resuspend beads
-        magnetic_module.disengage()
-        p300.transfer(100, reservoir["A2"], [beads_plate[well] for well in well_names], mix_after=(3, 200), new_tip="always")
-
-        #Separate beads
-        magnetic_module.engage(height=6.8)
-        protocol.delay(minutes=3) #Allow time for magnetic beads to settle
-
-        #Remove supernatant
-        p300.flow_rate.aspirate = 15 #Decrease flow rate to avoid disturbing beads
-        p300.transfer(100, [beads_plate[well].bottom(2.5) for well in well_names], reservoir["A5"], new_tip="always") #Aspirate from 2.5mm above the bottom of the well
-        p300.flow_rate.aspirate = 94 #Reset flow rate to speed up protocol
-    magnetic_module.disengage()
+    #Wash beads in Buffer W (mixes as "bead resuspension", removes supernatant as "bead supernatant")
+    #One group: on this plate pipelined washes are slower (compare with python -m ot2_tools.beads --columns 4)
+    separation.wash(p300, 100, reservoir["A2"], reservoir["A5"], washes=2, mix=(3, 200), groups=1)
 
     #Elute protein
-    p300.flow_rate.dispense = 300 #Increase flow rate to fully resuspend beads
-    
     for _ in range(2):
         #Add buffer and resuspend beads
         magnetic_module.disengage()
-        p300.transfer(100, reservoir["A3"], [beads_plate[well] for well in well_names], mix_after=(3, 200), new_tip="always")
+        with liquid_class(p300, "bead resuspension"):
+            p300.transfer(100, reservoir["A3"], [beads_plate[well] for well in well_names], mix_after=(3, 200), new_tip="always")
+        separation.add(100)
 
         protocol.pause("Incubate beads at room temperature with 400 rpm shaking for 10 minutes")
 
         #Separate beads
-        magnetic_module.engage(height=6.8)
-        protocol.delay(minutes=3) #Allow time for magnetic beads to settle
+        separation.engage() #Wait for magnetic beads to settle
 
         #Remove eluate
-        p300.flow_rate.aspirate = 15 #Decrease flow rate to avoid disturbing beads
-        p300.transfer(100, [beads_plate[well].bottom(2.5) for well in well_names], [target_plate[well] for well in well_names], new_tip="always") #Aspirate from 2.5mm above the bottom of the well
-        p300.flow_rate.aspirate = 94 #Reset flow rate to speed up protocol
+        with liquid_class(p300, "bead supernatant"):
+            p300.transfer(100, separation.remove(100), [target_plate[well] for well in well_names], new_tip="always")
 
     magnetic_module.disengage()
\ No newline at end of file
@@ -1,5 +1,7 @@
 from opentrons import protocol_api
 
+from ot2_tools.dilution import plan_dilutions, series, series_wells
+
 
 #This metadata is not all required but it's good to have
 metadata = {
@@ -23,12 +25,13 @@ def run(protocol: protocol_api.ProtocolContext):
     #Then, we load pipettes and any other modules
     p300 = protocol.load_instrument('p300_multi_gen2', 'left', tip_racks=[tips])
 
-    #We can then transfer our stock solution to the destination plate
-    p300.transfer(100, reservoir['A1'], plate.rows()[0])
+    #Plan the serial dilution: each well ends up with at least 100 ul, 2x more dilute than the one before.
+    #The dilution engine works out which well each is made from and how many tips that takes
+    plan = plan_dilutions(series(2, 12), volume=100, min_volume=p300.min_volume, capacity=200)
 
-    row = plate.rows()[0]
-    #Transfer 100 ul sequentially from well i to well i+1 in each row
     #Note that we have a multichannel pipette so we only need to target row A
     #Since there are 8 pipette tips the other 7 rows will be pipetted as usual
-    p300.transfer(100, reservoir['A2'], row[0], mix_after=(3, 50))
-    p300.transfer(100, row[:11], row[1:], mix_after=(3, 50))
\ No newline at end of file
+    row = series_wells([plate], 12)
+    concentrations = plan.run(p300, reservoir['A2'], reservoir['A1'], row)
+    protocol.comment(f"Made a {plan.strategy} dilution in {len(plan.chains())} chain(s): " +
+                     ", ".join(f"{well.well_name} {concentration:.3g}x" for well, concentration in concentrations.items()))
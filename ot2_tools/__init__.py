@@ -0,0 +1,8 @@
+"""Offline planning and analysis tools for our OT-2 protocols.
+
+Each tool is a module that can be run from the repository root, e.g.
+    python -m ot2_tools.estimate Protocols/streptactin_beads_test.py
+"""
+
+from .simulation import SimulatedProtocol, simulate
+from .timing import TimingModel
@@ -0,0 +1,244 @@
+"""Reaction assembly: per-reaction recipes turned into the fewest pipetting passes and tips.
+
+Setup protocols used to add each component of a reaction as its own step, usually in the order it
+appears in the lab book, and to choose tips case by case. A recipe lists what goes into one reaction,
+and plan_assembly() works out how to put it together for a plate of reactions:
+
+    ASSEMBLY = plan_assembly([Component("master mix", 15.9), Component("gBlocks", 4.1, per_well=True)], 48)
+    ASSEMBLY.run({"p20_multi_gen2": p20}, {"master mix": plate["A12"], "gBlocks": gblock_wells}, reaction_wells)
+
+- Shared components (one stock for every reaction) that may be premixed are pooled into one mix ahead
+  of the run, so they go in as a single pass. The plan gives how much of each to put in the pool well,
+  including the dead volume and any disposal volume the pipette throws away.
+- Shared liquids go first, while the wells hold nothing that differs from well to well, so one tip
+  serves the whole plate. They are dispensed at the bottom of the wells, as a viscous master mix does not
+  leave the tip cleanly from above.
+- Per-well components (a plate of DNA, one well per reaction) need a new tip for every column; they go
+  last, and the last one mixes the reaction. Components from wells that only serve their own reaction
+  and are thrown away afterwards (dedicated, e.g. an intermediate plate made earlier in the run) are drawn
+  into the same tip as the component before them, behind an air gap, and go in together.
+
+Each step uses the smallest pipette that can handle its volume. A distribute only packs several
+dispenses into one aspiration when they fit with the disposal volume; when they do not it is a transfer
+with one tip, which wastes nothing.
+
+Usage:
+    python -m ot2_tools.assembly Protocols/golden_gate_reaction_setup.py
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from math import ceil
+
+from .planner import CHANNELS
+from .simulation import PIPETTE_SPECS, load_protocol
+
+POOL = "master mix"
+PIPETTES = ("p20_multi_gen2", "p300_multi_gen2")
+#µl of air between components drawn into one tip
+AIR_GAP = 2
+#µl left behind in a source well
+PLATE_DEAD_VOLUME = 5
+RESERVOIR_DEAD_VOLUME = 1000
+
+
+@dataclass
+class Component:
+    name: str
+    #µl per reaction
+    volume: float
+    #From its own well for each reaction (e.g. a DNA plate) rather than one stock for all of them
+    per_well: bool = False
+    #Shared components that must not sit premixed (e.g. enzymes added to a mix last) get their own pass
+    poolable: bool = True
+    #Per-well components whose wells only ever serve their own reaction and are discarded after it (e.g. an
+    #intermediate plate made for the run): the tip may arrive carrying the reaction's other components, so
+    #they share its tip
+    dedicated: bool = False
+
+
+@dataclass
+class Step:
+    name: str
+    components: list
+    volume: float
+    pipette: str
+    per_well: bool
+    #Dispenses per aspiration (shared steps)
+    per_aspiration: int = 1
+    mix: tuple = None
+    #µl of each component, drawn into the tip one after another behind air gaps (per-well steps)
+    parts: list = field(default_factory=list)
+
+    @property
+    def method(self):
+        return "distribute" if self.per_aspiration > 1 else "transfer"
+
+
+@dataclass
+class AssemblyPlan:
+    reactions: int
+    steps: list
+    channels: int = CHANNELS
+    dead_volume: float = 5
+    #Shared liquids come from a reservoir, where every channel draws from the same well
+    reservoir: bool = False
+    #Component: µl in each well of the pool
+    pool: dict = field(default_factory=dict)
+
+    @property
+    def columns(self):
+        return ceil(self.reactions / self.channels)
+
+    def source_volume(self, step):
+        """µl each source well of a shared step needs: what it dispenses, disposal and dead volume."""
+        _, _, min_volume = PIPETTE_SPECS[step.pipette][:3]
+        aspirations = ceil(self.columns / step.per_aspiration)
+        disposal = min_volume * aspirations if step.per_aspiration > 1 else 0
+        channels = self.channels if self.reservoir else 1
+        return (step.volume * self.columns + disposal) * channels + self.dead_volume
+
+    def tips(self):
+        """Columns of tips each pipette uses."""
+        tips = {}
+        for step in self.steps:
+            tips[step.pipette] = tips.get(step.pipette, 0) + (self.columns if step.per_well else 1)
+        return tips
+
+    @property
+    def passes(self):
+        return len(self.steps)
+
+    def run(self, pipettes, sources, wells):
+        """Assemble the reactions in wells (one per column). pipettes by name; sources by step name for
+        shared steps, and by component name (a list of wells matching wells) for per-well ones."""
+        for step in self.steps:
+            pipette = pipettes[step.pipette]
+            if step.per_well and len(step.components) > 1:
+                for i, well in enumerate(wells):
+                    pipette.pick_up_tip()
+                    for j, (name, volume) in enumerate(zip(step.components, step.parts)):
+                        if j:
+                            pipette.air_gap(AIR_GAP)
+                        pipette.aspirate(volume, sources[name][i])
+                    pipette.dispense(step.volume + AIR_GAP * (len(step.parts) - 1), well)
+                    if step.mix:
+                        pipette.mix(*step.mix, well)
+                    pipette.drop_tip()
+                continue
+            source = sources[step.name]
+            if step.per_well:
+                pipette.transfer(step.volume, source, wells, mix_after=step.mix, new_tip="always")
+            elif step.per_aspiration > 1:
+                pipette.distribute(step.volume, source, wells, new_tip="once")
+            else:
+                pipette.transfer(step.volume, source, wells, new_tip="once")
+        return wells
+
+    def summary(self):
+        lines = [f"{self.reactions} reactions ({self.columns} columns) in {self.passes} pass(es), tips: "
+                 + ", ".join(f"{count} column(s) of {name}" for name, count in self.tips().items())]
+        for step in self.steps:
+            parts = step.parts or [step.volume]
+            what = " + ".join(f"{volume:g} µl" for volume in parts)
+            lines.append(f"  {step.name}: {what} with {step.pipette}, {step.method}"
+                         f"{', new tip per column' if step.per_well else ', one tip'}"
+                         f"{f', mix {step.mix[0]} x {step.mix[1]:g} µl' if step.mix else ''}")
+            if not step.per_well:
+                volume = self.source_volume(step)
+                lines.append(f"    fill each source well with {volume:.1f} µl")
+                if len(step.components) > 1:
+                    parts = ", ".join(f"{self.pool[name]:.1f} µl {name}" for name in step.components)
+                    lines.append(f"    pool per well: {parts}")
+        return "\n".join(lines)
+
+
+def choose_pipette(volume, pipettes=PIPETTES):
+    """The smallest of pipettes that takes volume µl in one aspiration (or the largest, if none does)."""
+    usable = [name for name in pipettes if PIPETTE_SPECS[name][2] <= volume]
+    if not usable:
+        raise ValueError(f"No pipette among {', '.join(pipettes)} can pipette {volume:g} µl")
+    fits = [name for name in usable if PIPETTE_SPECS[name][1] >= volume]
+    if not fits:
+        return max(usable, key=lambda name: PIPETTE_SPECS[name][1])
+    return min(fits, key=lambda name: PIPETTE_SPECS[name][1])
+
+
+def _per_aspiration(pipette, volume):
+    _, max_volume, min_volume = PIPETTE_SPECS[pipette][:3]
+    return max(1, int((max_volume - min_volume) // volume))
+
+
+def plan_assembly(components, reactions, pipettes=PIPETTES, channels=CHANNELS, reservoir=False, dead_volume=None,
+                  mix=2, prefilled=0):
+    """Plan adding components (per reaction) to reactions wells: pooled shared mix, other shared
+    components, then per-well components, the last of which mixes the reaction mix times.
+
+    Shared liquids come from a column of a plate, or with reservoir=True from a reservoir well; the dead
+    volume defaults to that of a plate well or a reservoir well. prefilled is µl already in each well.
+    """
+    if dead_volume is None:
+        dead_volume = RESERVOIR_DEAD_VOLUME if reservoir else PLATE_DEAD_VOLUME
+    names = [component.name for component in components]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Component names must be unique: {', '.join(names)}")
+    pooled = [component for component in components if not component.per_well and component.poolable]
+    shared = [component for component in components if not component.per_well and not component.poolable]
+    per_well = [component for component in components if component.per_well]
+
+    steps = []
+    if pooled:
+        volume = sum(component.volume for component in pooled)
+        name = POOL if len(pooled) > 1 else pooled[0].name
+        pipette = choose_pipette(volume, pipettes)
+        steps.append(Step(name, [component.name for component in pooled], volume, pipette, False,
+                          _per_aspiration(pipette, volume)))
+    for component in shared:
+        pipette = choose_pipette(component.volume, pipettes)
+        steps.append(Step(component.name, [component.name], component.volume, pipette, False,
+                          _per_aspiration(pipette, component.volume)))
+    #Per-well components in tip loads: each load starts with a clean tip, dedicated components join it
+    loads = []
+    for component in per_well:
+        load = loads[-1] + [component] if loads and component.dedicated else None
+        if load:
+            pipette = choose_pipette(min(part.volume for part in load), pipettes)
+            if sum(part.volume for part in load) + AIR_GAP * (len(load) - 1) <= PIPETTE_SPECS[pipette][1]:
+                loads[-1] = load
+                continue
+        loads.append([component])
+    for load in loads:
+        volume = sum(component.volume for component in load)
+        steps.append(Step(" + ".join(component.name for component in load), [component.name for component in load],
+                          volume, choose_pipette(min(component.volume for component in load), pipettes), True,
+                          parts=[component.volume for component in load]))
+
+    plan = AssemblyPlan(reactions, steps, channels, dead_volume, reservoir)
+    if len(pooled) > 1:
+        total = plan.source_volume(steps[0])
+        plan.pool = {component.name: total * component.volume / steps[0].volume for component in pooled}
+    if per_well:
+        #Mix the whole reaction with the last addition, as much of it as the pipette takes
+        last = steps[-1]
+        reaction = prefilled + sum(component.volume for component in components)
+        last.mix = (mix, min(round(reaction / 2, 1), PIPETTE_SPECS[last.pipette][1]))
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the assembly plans a protocol defines")
+    parser.add_argument("protocol", help="protocol file defining AssemblyPlans at module level")
+    args = parser.parse_args(argv)
+
+    module = load_protocol(args.protocol)
+    #By class name: run with -m, this module is __main__ and the protocol imports its own copy
+    plans = {name: value for name, value in vars(module).items() if type(value).__name__ == "AssemblyPlan"}
+    if not plans:
+        raise SystemExit(f"{args.protocol} defines no assembly plans")
+    for name, plan in plans.items():
+        print(name)
+        print(plan.summary())
+
+
+if __name__ == "__main__":
+    main()
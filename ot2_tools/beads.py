@@ -0,0 +1,206 @@
+"""Magnetic-bead separations timed for the volume in the wells.
+
+Protocols used to wait a fixed 3 minutes after every magnetic_module.engage(), whatever the wells held.
+How long beads take to pull to the magnet depends mostly on how far they have to travel: the volume in
+the well, the bead type and how high the magnet is engaged. SETTLE_TABLE holds bench measurements of the
+time until the supernatant is clear, and settle_seconds() interpolates it (linearly in volume, then in
+engage height), adds a safety margin and rounds up. No bead type has been measured yet, so for now every
+separation waits DEFAULT_SETTLE, the 3 minutes the protocols always used; the wait only follows the
+volume once measurements go into SETTLE_TABLE (or a table is passed in):
+
+    separation = MagneticSeparation(protocol, magnetic_module, bead_wells, initial_volume=50)
+    p300.transfer(300, buffer, bead_wells)
+    separation.add(300)
+    separation.engage()                     #waits the settle time for 350 µl
+    p300.transfer(300, separation.remove(300), waste)
+
+The separation keeps each well's volume in a LiquidLedger, so removal heights follow the liquid: the tip
+goes as deep as it must to stay under the surface it draws the liquid down to, and never closer to the
+bottom than pellet_clearance.
+
+Bead types missing from the table wait DEFAULT_SETTLE. Heights below the calibrated engage heights raise a
+ValueError rather than guess; volumes beyond the table extrapolate from its last two points.
+
+wash() runs whole wash cycles. The magnet engages under the whole plate, so the only pipetting that can
+happen while beads settle is adding buffer; splitting the columns into groups that take turns on the
+magnet puts each group's buffer addition into another group's settle, at the cost of one separation per
+group. compare_wash_groups() simulates both ways for a plate:
+
+Usage:
+    python -m ot2_tools.beads --columns 4 8 12 --volume 100
+"""
+
+import argparse
+from bisect import bisect_left
+from math import ceil
+
+from .estimate import format_duration
+from .liquid import LiquidLedger
+from .liquid_classes import liquid_class
+from .schedule import hold
+from .simulation import SimulatedProtocol
+
+#Bead type: {engage height (mm): [(µl per well, seconds until the supernatant is clear)]}, measured in
+#abgene_96_wellplate_2200ul on a gen2 magnetic module. Re-measure for new bead lots or plates.
+SETTLE_TABLE = {}
+#Settle time for beads with no measurements (s)
+DEFAULT_SETTLE = 180
+#Margin on top of the measured times, and the step the result is rounded up to (s)
+SAFETY = 1.25
+ROUND_TO = 5
+
+
+def _interpolate(points, x):
+    xs = [point[0] for point in points]
+    i = min(max(bisect_left(xs, x), 1), len(points) - 1)
+    (x0, y0), (x1, y1) = points[i - 1], points[i]
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+def settle_seconds(volume, engage_height, beads="streptactin", table=None, safety=SAFETY):
+    """Shortest safe wait after engaging the magnet under wells holding volume µl, or DEFAULT_SETTLE for
+    beads the table (default: SETTLE_TABLE) has no measurements for."""
+    heights = (SETTLE_TABLE if table is None else table).get(beads)
+    if not heights:
+        return DEFAULT_SETTLE
+    calibrated = sorted(heights)
+    if engage_height < calibrated[0]:
+        raise ValueError(f"{beads} beads are only calibrated for engage heights from {calibrated[0]} mm")
+    #Above the highest calibrated height the beads settle at least as fast as at that height
+    engage_height = min(engage_height, calibrated[-1])
+    times = [(height, _interpolate(heights[height], volume)) for height in calibrated]
+    seconds = _interpolate(times, engage_height) if len(times) > 1 else times[0][1]
+    return ROUND_TO * ceil(seconds * safety / ROUND_TO)
+
+
+class MagneticSeparation:
+    """Bead wells on a magnetic module, with the volume in each well tracked between separations."""
+
+    def __init__(self, protocol, magnetic_module, wells, initial_volume=0, beads="streptactin",
+                 engage_height=6.8, pellet_clearance=2.5, ledger=None, table=None):
+        self.protocol = protocol
+        self.module = magnetic_module
+        self.wells = list(wells)
+        self.beads = beads
+        self.engage_height = engage_height
+        self.table = table
+        self.ledger = ledger or LiquidLedger(clearance=pellet_clearance)
+        self.ledger.fill(self.wells, initial_volume)
+
+    @property
+    def volume(self):
+        """The most any of the wells holds."""
+        return max(self.ledger.volume(well) for well in self.wells)
+
+    def add(self, volume, wells=None):
+        """Record volume µl added to every well (or just to wells)."""
+        for well in wells or self.wells:
+            self.ledger.add(well, volume)
+
+    def settle_time(self, wells=None):
+        """Seconds the beads in wells (default: all of them) need to settle at the current volume."""
+        volume = max(self.ledger.volume(well) for well in wells or self.wells)
+        return settle_seconds(volume, self.engage_height, self.beads, self.table)
+
+    def engage(self):
+        """Engage the magnet and wait until the beads have settled out of the current volume."""
+        seconds = self.settle_time()
+        self.module.engage(height=self.engage_height)
+        self.protocol.delay(seconds=seconds, msg=f"Settling beads out of {self.volume:.0f} µl")
+        return seconds
+
+    def remove(self, volume, wells=None):
+        """Locations to take volume µl of supernatant from each well (or from wells), and record it as removed."""
+        wells = wells or self.wells
+        locations = [self.ledger.aspirate_location(well, volume) for well in wells]
+        for well in wells:
+            self.ledger.remove(well, volume)
+        return locations
+
+    def wash(self, pipette, volume, buffer, waste, washes=1, mix=(3, 200), groups=1):
+        """Wash the beads: add buffer, resuspend, separate and remove the supernatant, washes times.
+
+        With groups=1 every column gets buffer (mixed in with the same tip), then the whole plate
+        settles and is emptied. With more groups the columns are split into groups that take turns on
+        the magnet: while one group settles, the next group's buffer is dispensed from above with a
+        single tip, and that group is mixed (one tip per column) once the magnet is off again. Each wash
+        then needs one separation per group, so pipelining only pays off when adding buffer to the plate
+        takes longer than the extra settle; compare_wash_groups() simulates the options. Mixes use the
+        "bead resuspension" liquid class and removals (a new tip for every column) "bead supernatant".
+        """
+        #Even groups of neighbouring columns, in plate order
+        size = ceil(len(self.wells) / groups)
+        groups = [self.wells[i:i + size] for i in range(0, len(self.wells), size)]
+        separations = [group for _ in range(washes) for group in groups]
+
+        if len(groups) == 1:
+            for group in separations:
+                self.module.disengage()
+                with liquid_class(pipette, "bead resuspension"):
+                    pipette.transfer(volume, buffer, group, mix_after=mix, new_tip="always")
+                self.add(volume, group)
+                self.engage()
+                self._remove(pipette, group, volume, waste)
+            self.module.disengage()
+            return pipette
+
+        self.module.disengage()
+        self._add_from_above(pipette, volume, buffer, separations[0])
+        for i, group in enumerate(separations):
+            self.module.disengage()
+            with liquid_class(pipette, "bead resuspension"):
+                for well in group:
+                    pipette.pick_up_tip()
+                    pipette.mix(*mix, well)
+                    pipette.drop_tip()
+            self.module.engage(height=self.engage_height)
+            with hold(self.protocol, seconds=self.settle_time(group), msg="Settling beads"):
+                if i + 1 < len(separations):
+                    self._add_from_above(pipette, volume, buffer, separations[i + 1])
+            self._remove(pipette, group, volume, waste)
+        self.module.disengage()
+        return pipette
+
+    def _add_from_above(self, pipette, volume, buffer, wells):
+        pipette.distribute(volume, buffer, [well.top() for well in wells], new_tip="once")
+        self.add(volume, wells)
+
+    def _remove(self, pipette, wells, volume, waste):
+        with liquid_class(pipette, "bead supernatant"):
+            pipette.transfer(volume, self.remove(volume, wells), waste, new_tip="always")
+
+
+def compare_wash_groups(columns, volume, washes=2, mix=(3, 200), beads="streptactin",
+                        engage_height=6.8, max_groups=3, table=None):
+    """Simulated seconds for a wash of columns bead columns with each number of groups, {groups: seconds}."""
+    seconds = {}
+    for groups in range(1, min(max_groups, columns) + 1):
+        protocol = SimulatedProtocol()
+        tips = [protocol.load_labware("opentrons_96_tiprack_300ul", slot) for slot in (4, 5, 6, 7, 8, 9, 10, 11)]
+        reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", 2)
+        pipette = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=tips)
+        module = protocol.load_module("magnetic module gen2", 1)
+        plate = module.load_labware("abgene_96_wellplate_2200ul")
+        separation = MagneticSeparation(protocol, module, plate.rows()[0][:columns], beads=beads,
+                                        engage_height=engage_height, table=table)
+        separation.wash(pipette, volume, reservoir["A1"], reservoir["A12"], washes, mix, groups)
+        seconds[groups] = protocol.clock()
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare serial and pipelined bead washes")
+    parser.add_argument("--columns", type=int, nargs="+", default=[4, 8, 12])
+    parser.add_argument("--volume", type=float, default=100)
+    parser.add_argument("--washes", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    for columns in args.columns:
+        seconds = compare_wash_groups(columns, args.volume, args.washes)
+        best = min(seconds, key=seconds.get)
+        options = "  ".join(f"{groups} group(s) {format_duration(time)}" for groups, time in seconds.items())
+        print(f"  {columns:>2} columns  {options}  -> {best} group(s)")
+
+
+if __name__ == "__main__":
+    main()
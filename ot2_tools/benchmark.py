@@ -0,0 +1,183 @@
+"""Benchmarks for every protocol in the repository, checked against a stored baseline.
+
+Each protocol under Protocols/ is simulated afresh and measured: predicted run time, number of commands,
+tips used by each pipette, distance the gantry travels and how long the simulation itself took. The
+figures are compared with BASELINE (committed next to this module) and any metric that got worse by
+more than its tolerance is flagged, so an edit that quietly adds 20 minutes or a rack of tips shows up
+before the protocol reaches the robot.
+
+A metric regresses when it grows by more than both its relative and its absolute tolerance; simulator
+wall time depends on the machine, so its tolerance is loose and it never fails the run on its own.
+
+Usage:
+    python -m ot2_tools.benchmark                   #compare every protocol with the baseline
+    python -m ot2_tools.benchmark --update          #store the current figures as the new baseline
+    python -m ot2_tools.benchmark Protocols/streptactin_beads_test.py
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .estimate import estimate_trace, format_duration
+from .simulation import PACKAGE_DIR, REPO_ROOT, simulate
+from .timing import TimingModel
+
+PROTOCOLS_DIR = REPO_ROOT / "Protocols"
+BASELINE = PACKAGE_DIR / "benchmark_baseline.json"
+
+#Metric: (relative, absolute) growth allowed before it counts as a regression
+TOLERANCES = {
+    "seconds": (0.01, 30.0),
+    "commands": (0.05, 10),
+    "tips": (0.0, 0),
+    "travel": (0.05, 1000.0),
+    "wall": (0.5, 1.0),
+}
+#Metrics that only warn
+INFORMATIONAL = ("wall",)
+
+
+@dataclass
+class Benchmark:
+    protocol: str
+    seconds: float = 0.0
+    commands: int = 0
+    #Pipette name: tips picked up
+    tips: dict = field(default_factory=dict)
+    #mm the gantry moves
+    travel: float = 0.0
+    #Seconds the simulation took
+    wall: float = 0.0
+    error: str = None
+
+
+@dataclass
+class Regression:
+    protocol: str
+    metric: str
+    before: float
+    after: float
+
+    @property
+    def informational(self):
+        return self.metric.split(":")[0] in INFORMATIONAL
+
+
+def find_protocols(directory=PROTOCOLS_DIR):
+    return sorted(path for path in Path(directory).rglob("*.py") if "def run(" in path.read_text())
+
+
+def benchmark(path, model=None):
+    """Simulate a protocol (without the trace cache, so the wall time is real) and measure it."""
+    name = Path(path).resolve().relative_to(REPO_ROOT).as_posix()
+    start = time.perf_counter()
+    try:
+        trace = simulate(path)
+    except Exception as error:
+        return Benchmark(name, error=f"{type(error).__name__}: {error}")
+    wall = time.perf_counter() - start
+    estimate = estimate_trace(trace, model or TimingModel())
+    travel = sum(command.params["distance"] for command in trace.commands if command.kind == "move")
+    return Benchmark(name, round(estimate.total, 1), len(trace.commands), dict(estimate.tips), round(travel),
+                     round(wall, 3))
+
+
+def load_baseline(path=BASELINE):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return {name: Benchmark(**figures) for name, figures in json.load(f).items()}
+
+
+def save_baseline(results, path=BASELINE):
+    with open(path, "w") as f:
+        json.dump({result.protocol: asdict(result) for result in results}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def _worse(metric, before, after):
+    relative, absolute = TOLERANCES[metric]
+    return after - before > max(relative * before, absolute)
+
+
+def compare(result, baseline):
+    """Metrics of one benchmark that got worse than its baseline entry (none for a new protocol)."""
+    if baseline is None or result.error:
+        return []
+    regressions = []
+    for metric in TOLERANCES:
+        before, after = getattr(baseline, metric), getattr(result, metric)
+        if metric == "tips":
+            for pipette in sorted(set(before) | set(after)):
+                if _worse(metric, before.get(pipette, 0), after.get(pipette, 0)):
+                    regressions.append(Regression(result.protocol, f"tips:{pipette}", before.get(pipette, 0),
+                                                  after.get(pipette, 0)))
+        elif _worse(metric, before, after):
+            regressions.append(Regression(result.protocol, metric, before, after))
+    return regressions
+
+
+def _format(metric, value):
+    if metric == "seconds":
+        return format_duration(value)
+    if metric == "travel":
+        return f"{value / 1000:.1f} m"
+    if metric == "wall":
+        return f"{value:.2f} s"
+    return f"{value:g}"
+
+
+def report(results, baseline):
+    lines, regressions = [], []
+    for result in results:
+        if result.error:
+            lines.append(f"  {result.protocol}\n    FAILED {result.error}")
+            continue
+        tips = ", ".join(f"{count} x {name}" for name, count in result.tips.items()) or "none"
+        old = baseline.get(result.protocol)
+        lines.append(f"  {result.protocol}{'' if old else '  (new)'}")
+        lines.append(f"    {format_duration(result.seconds)}  {result.commands} commands  "
+                     f"{result.travel / 1000:.1f} m travel  tips: {tips}  simulated in {result.wall:.2f} s")
+        for regression in compare(result, old):
+            metric = regression.metric.split(":")[0]
+            label = "slower" if regression.informational else "REGRESSION"
+            lines.append(f"    {label} {regression.metric}: {_format(metric, regression.before)} -> "
+                         f"{_format(metric, regression.after)}")
+            regressions.append(regression)
+    return "\n".join(lines), regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark protocols and flag regressions against the baseline")
+    parser.add_argument("protocols", nargs="*", help="protocol files (default: everything under Protocols/)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    paths = args.protocols or find_protocols()
+    results = [benchmark(path) for path in paths]
+    baseline = load_baseline(args.baseline)
+    text, regressions = report(results, baseline)
+    print(text)
+
+    if args.update:
+        kept = dict(baseline) if args.protocols else {}
+        kept.update((result.protocol, result) for result in results if not result.error)
+        save_baseline(kept.values(), args.baseline)
+        print(f"  baseline updated ({len(kept)} protocols)")
+        return 0
+    failures = [regression for regression in regressions if not regression.informational]
+    failed = [result for result in results if result.error]
+    if failures or failed:
+        print(f"  {len(failures)} regression(s), {len(failed)} failed simulation(s)")
+        return 1
+    print("  no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Cache of simulated command streams.
+
+Simulating a protocol means importing it and running its run() function against the simulator. The
+result only depends on the protocol file, the custom labware definitions and the ot2_tools sources
+(the simulator itself and any helpers the protocol imports), so traces are stored on disk under a hash
+of all three and handed back as-is until one of them changes. The least recently used traces are
+evicted once the cache holds more than max_entries.
+
+Usage:
+    python -m ot2_tools.cache Protocols/*.py Protocols/*/*.py     #warm the cache
+    python -m ot2_tools.cache --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+from .labware import custom_definition_paths
+from .simulation import PACKAGE_DIR, REPO_ROOT, simulate
+
+CACHE_DIR = REPO_ROOT / ".ot2_cache" / "traces"
+
+
+def _hash_files(digest, paths):
+    for path in paths:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+
+
+class TraceCache:
+    def __init__(self, directory=CACHE_DIR, max_entries=128):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._environment = None
+
+    def _environment_hash(self):
+        #Labware definitions and tool sources are shared by every protocol, so hash them once
+        if self._environment is None:
+            digest = hashlib.sha256()
+            _hash_files(digest, custom_definition_paths())
+            _hash_files(digest, sorted(PACKAGE_DIR.glob("*.py")))
+            self._environment = digest.hexdigest()
+        return self._environment
+
+    def key(self, path, params=None):
+        """Content hash of a protocol file, everything its simulation depends on and any parameters."""
+        path = Path(path).resolve()
+        digest = hashlib.sha256(self._environment_hash().encode())
+        digest.update(str(path).encode())
+        digest.update(path.read_bytes())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return self.directory / f"{key}.pickle"
+
+    def get(self, key):
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                trace = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        os.utime(entry)
+        return trace
+
+    def put(self, key, trace):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        #Write to a temporary file first so a reader never sees half a trace
+        temporary = self._entry(key).with_suffix(".tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump(trace, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temporary.replace(self._entry(key))
+        self.evict()
+
+    def evict(self):
+        """Drop the least recently used traces beyond max_entries."""
+        entries = sorted(self.directory.glob("*.pickle"), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:max(len(entries) - self.max_entries, 0)]:
+            entry.unlink(missing_ok=True)
+
+    def clear(self):
+        for entry in self.directory.glob("*.pickle"):
+            entry.unlink()
+
+    def simulate(self, path, params=None):
+        """The trace for a protocol file, simulated only if nothing it depends on has changed."""
+        key = self.key(path, params)
+        trace = self.get(key)
+        if trace is None:
+            self.misses += 1
+            trace = simulate(path)
+            self.put(key, trace)
+        else:
+            self.hits += 1
+        return trace
+
+
+_default_cache = None
+
+
+def cached_simulate(path, params=None):
+    """simulate() through the shared on-disk cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TraceCache()
+    return _default_cache.simulate(path, params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate protocols into the command-stream cache")
+    parser.add_argument("protocols", nargs="*")
+    parser.add_argument("--clear", action="store_true", help="empty the cache first")
+    parser.add_argument("--max-entries", type=int, default=128)
+    args = parser.parse_args(argv)
+
+    cache = TraceCache(max_entries=args.max_entries)
+    if args.clear:
+        cache.clear()
+    for path in args.protocols:
+        start = time.perf_counter()
+        hits = cache.hits
+        trace = cache.simulate(path)
+        status = "hit " if cache.hits > hits else "miss"
+        print(f"  {status} {(time.perf_counter() - start) * 1000:7.1f} ms  {len(trace.commands):>6} commands  {path}")
+    if args.protocols:
+        print(f"  {cache.hits} hit(s), {cache.misses} miss(es)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Calibration-check protocols for custom labware.
+
+Generates a standalone protocol (the definition is embedded, so it runs without the labware being
+installed on the robot) that moves a pipette over just enough points to confirm a definition matches
+the real labware:
+
+    first well     left and back rim       position of the labware on the deck
+    last well      right and front rim     well pitch and well size across the whole plate
+    last well      bottom                  well depth
+
+Every point sits on the rim, so the labware height is checked at each one. The points are visited in
+nearest-neighbour order, travel between wells runs at full speed and only the approach and checks run
+at the reduced RATE. Instead of pausing at every point, the robot dwells at each one for a few seconds
+and asks for one confirmation per well.
+
+Multichannel pipettes check the first and last column instead (with the right rows for 384-well
+plates); in single-row reservoirs the front check stops short of the trough end so every channel fits.
+
+Usage:
+    python -m ot2_tools.calibration grenierbioone_96_wellplate_340ul --pipette p20_multi_gen2
+    python -m ot2_tools.calibration --all
+"""
+
+import argparse
+import json
+from math import dist
+from pathlib import Path
+
+from .geometry import PlateGeometry
+from .labware import CUSTOM_LABWARE_DIR, registry
+from .planner import DEFAULT_TIP_RACKS
+from .simulation import PIPETTE_SPECS
+
+#(x, y) fractions of the half-width and half-length from the well center, at the rim
+RIM_POINTS = {"left": (-1, 0), "right": (1, 0), "front": (0, -1), "back": (0, 1)}
+#In a single-row reservoir a multichannel's tips run along the trough, so check near its back end
+TROUGH_POINTS = {"left": (-1, 1), "right": (1, 1), "front": (0, 0.75), "back": (0, 1)}
+
+
+def check_wells(wells, channels):
+    """The wells to check for this labware and pipette, or None if the pipette cannot reach it."""
+    rows, columns = len(wells.ordering[0]), len(wells.ordering)
+    if channels == 1 or rows == 1:
+        return [wells.names[0], wells.names[-1]] if len(wells.names) > 1 else [wells.names[0]]
+    if rows == channels:
+        return [wells.ordering[0][0], wells.ordering[-1][0]]
+    if rows == 2 * channels:
+        #384-well plates: a multichannel reaches every other row, so check both sets
+        return [wells.ordering[0][0], wells.ordering[-1][1]]
+    return None
+
+
+def calibration_route(load_name, pipette_name):
+    """The points to check, as (well, label, x, y, z) fractions from each well's center, in visiting order.
+
+    A label of "bottom" means the well bottom rather than a point on the rim.
+    """
+    wells = registry.get(load_name)
+    channels = PIPETTE_SPECS[pipette_name][0]
+    names = check_wells(wells, channels)
+    if names is None:
+        raise ValueError(f"{load_name} cannot be checked with {pipette_name}")
+    offsets = TROUGH_POINTS if channels > 1 and len(wells.ordering[0]) == 1 else RIM_POINTS
+
+    #First well: where the labware sits. Last well: pitch, well size and depth
+    if len(names) == 1:
+        wanted = [(names[0], label) for label in RIM_POINTS] + [(names[0], "bottom")]
+    else:
+        wanted = [(names[0], "left"), (names[0], "back"), (names[-1], "right"), (names[-1], "front"),
+                  (names[-1], "bottom")]
+
+    plate = PlateGeometry(wells)
+    points = []
+    for name, label in wanted:
+        index = plate.select([name])
+        if label == "bottom":
+            points.append(((name, label, 0, 0, -1), tuple(plate.bottom(index=index)[0])))
+        else:
+            x, y = offsets[label]
+            points.append(((name, label, x, y, 1), tuple(plate.from_center_cartesian(x, y, 1, index)[0])))
+
+    #Nearest-neighbour order from the back right corner (nearest the gantry's home position): well by
+    #well, rim points first and the bottom last, so the tip never drags across the rim after going down
+    dimensions = wells.header["dimensions"]
+    position = (dimensions["xDimension"], dimensions["yDimension"], dimensions["zDimension"])
+    route, remaining = [], list(dict.fromkeys(names))
+    while remaining:
+        name = min(remaining, key=lambda well: min(dist(position, p) for (n, *_), p in points if n == well))
+        remaining.remove(name)
+        rim = [(check, p) for check, p in points if check[0] == name and check[1] != "bottom"]
+        while rim:
+            check, position = min(rim, key=lambda item: dist(position, item[1]))
+            rim.remove((check, position))
+            route.append(check)
+        route += [check for check, _ in points if check[0] == name and check[1] == "bottom"]
+    return route
+
+
+TEMPLATE = '''"""Calibration check for {display_name}.
+
+Generated by `python -m ot2_tools.calibration {load_name} --pipette {pipette}`: do not edit by hand.
+"""
+
+import json
+from opentrons import protocol_api, types
+
+TEST_LABWARE_SLOT = {slot!r}
+
+RATE = {rate}  # fraction of default speeds while checking positions
+DWELL = {dwell}  # seconds to look at each position
+
+PIPETTE_MOUNT = {mount!r}
+PIPETTE_NAME = {pipette!r}
+
+TIPRACK_SLOT = {tiprack_slot!r}
+TIPRACK_LOADNAME = {tiprack!r}
+
+#(well, position, x, y, z) with x, y and z as fractions of the well's half-size from its center
+ROUTE = {route}
+
+LABWARE_DEF_JSON = """{definition}"""
+LABWARE_DEF = json.loads(LABWARE_DEF_JSON)
+LABWARE_LABEL = LABWARE_DEF.get("metadata", {{}}).get("displayName", "test labware")
+
+metadata = {{"apiLevel": "2.0"}}
+
+
+def run(protocol: protocol_api.ProtocolContext):
+    tiprack = protocol.load_labware(TIPRACK_LOADNAME, TIPRACK_SLOT)
+    pipette = protocol.load_instrument(PIPETTE_NAME, PIPETTE_MOUNT, tip_racks=[tiprack])
+    test_labware = protocol.load_labware_from_definition(LABWARE_DEF, TEST_LABWARE_SLOT, LABWARE_LABEL)
+
+    def set_speeds(rate):
+        protocol.max_speeds.update({{"X": 600 * rate, "Y": 400 * rate, "Z": 125 * rate, "A": 125 * rate}})
+        for instr in protocol.loaded_instruments.values():
+            instr.default_speed = max(protocol.max_speeds.values())
+
+    pipette.pick_up_tip()
+    pipette.home()
+
+    checked = []
+    for i, (name, position, x, y, z) in enumerate(ROUTE):
+        well = test_labware[name]
+        if not checked:
+            #Travel to the well at full speed, then slow down for the checks
+            set_speeds(1.0)
+            pipette.move_to(well.top(10))
+            set_speeds(RATE)
+        if position == "bottom":
+            pipette.move_to(well.bottom())
+        else:
+            pipette.move_to(types.Location(point=well._from_center_cartesian(x=x, y=y, z=z), labware=well))
+        protocol.comment(f"Checking {{position}} of {{name}}")
+        protocol.delay(seconds=DWELL)
+        checked.append(position)
+        if i + 1 == len(ROUTE) or ROUTE[i + 1][0] != name:
+            pipette.move_to(well.top(10))
+            protocol.pause(f"Were the {{', '.join(checked)}} positions of {{name}} accurate? If so click 'resume'.")
+            checked = []
+
+    set_speeds(1.0)
+    pipette.return_tip()
+'''
+
+
+def generate(load_name, pipette="p20_multi_gen2", mount="right", slot="5", tiprack_slot="1", rate=0.25, dwell=3):
+    """Source of a calibration-check protocol for one labware and pipette."""
+    definition = registry.definition(load_name)
+    route = calibration_route(load_name, pipette)
+    return TEMPLATE.format(
+        display_name=definition["metadata"]["displayName"], load_name=load_name, pipette=pipette, mount=mount,
+        slot=str(slot), tiprack_slot=str(tiprack_slot), tiprack=DEFAULT_TIP_RACKS[pipette], rate=rate, dwell=dwell,
+        route="[\n" + "".join(f"    {tuple(point)!r},\n" for point in route) + "]",
+        definition=json.dumps(definition, separators=(",", ":"), ensure_ascii=False))
+
+
+def output_path(load_name):
+    return CUSTOM_LABWARE_DIR / f"test_{load_name}.py"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate calibration-check protocols for custom labware")
+    parser.add_argument("load_names", nargs="*")
+    parser.add_argument("--all", action="store_true", help="every definition in Custom Labware/")
+    parser.add_argument("--pipette", default="p20_multi_gen2", choices=sorted(DEFAULT_TIP_RACKS))
+    parser.add_argument("--mount", default="right")
+    parser.add_argument("--slot", default="5")
+    parser.add_argument("--rate", type=float, default=0.25)
+    parser.add_argument("-o", "--output", help="output file (one labware only)")
+    args = parser.parse_args(argv)
+
+    load_names = list(args.load_names)
+    if args.all:
+        load_names += registry.custom_load_names()
+    for load_name in load_names:
+        try:
+            source = generate(load_name, args.pipette, args.mount, args.slot, rate=args.rate)
+        except ValueError as error:
+            print(f"  skip {error}")
+            continue
+        path = Path(args.output) if args.output else output_path(load_name)
+        path.write_text(source)
+        print(f"  {path}: {len(calibration_route(load_name, args.pipette))} positions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Campaign scheduler for multi-protocol screens.
+
+A screen is a chain of protocols with incubations in between: the solubility screen transforms Golden
+Gate reactions, transforms the plasmids into an expression strain, inoculates LB from the plates, sets
+up OD measurements and inoculates TB. Each stage is one protocol run on a robot, and each dependency
+has a gap (plates or cultures incubating overnight) that has to pass before the next stage can start.
+
+schedule_campaign() lays several screens out over one or more robots. Every stage occupies a robot for
+its estimated run time (from the simulator) plus the time the robot sits paused while the operator
+works (heat shock, outgrowth in a thermomixer). Stages are placed one at a time, always the ready stage
+that can start earliest, into the first gap on any robot that is long enough, so the screens
+interleave on the robots. Every stage needs the operator to set up the deck, so stages start and finish
+within working hours on a weekday; the incubations run whenever.
+
+Times are minutes from Monday 00:00 of the first week.
+
+Usage:
+    python -m ot2_tools.campaign --screens 3 --robots 2
+    python -m ot2_tools.campaign --screens 3 --robots 2 --every 48
+"""
+
+import argparse
+from dataclasses import dataclass, field
+
+from .cache import cached_simulate
+from .estimate import estimate_trace
+from .simulation import REPO_ROOT
+
+DAY = 24 * 60
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+@dataclass
+class Stage:
+    name: str
+    protocol: str
+    #(stage name, minutes that have to pass after it finishes)
+    after: list = field(default_factory=list)
+    #Minutes the robot stays paused while the operator works
+    manual_minutes: float = 0
+    #Stages that have to follow straight on, on the same robot (e.g. plating outgrowth before it overgrows)
+    attached: bool = False
+
+
+SOLUBILITY_SCREEN = [
+    Stage("transform golden gate", "Protocols/solubility_screen/1_transform_golden_gate_reactions.py",
+          manual_minutes=70),
+    #Colonies grow overnight, are picked and grown up, and the plasmids are miniprepped
+    Stage("transform plasmids", "Protocols/solubility_screen/2_transform_plasmids.py",
+          after=[("transform golden gate", 2 * DAY)], manual_minutes=70),
+    #Plates (neat and 2x diluted, both plated by the transformation run) incubate overnight before colonies
+    #are picked into LB
+    Stage("inoculate LB", "Protocols/solubility_screen/4_inoculate_LB_plates.py",
+          after=[("transform plasmids", 16 * 60)], manual_minutes=30),
+    #Overnight cultures
+    Stage("measure ODs", "Protocols/solubility_screen/5_measure_ODs.py", after=[("inoculate LB", 16 * 60)]),
+    #The plate reader run comes between the OD plates and inoculating TB
+    Stage("inoculate TB", "Protocols/solubility_screen/6_inoculate_TB_plates.py",
+          after=[("measure ODs", 30), ("inoculate LB", 16 * 60)]),
+]
+
+
+@dataclass
+class Job:
+    screen: int
+    stage: Stage
+    minutes: float
+    robot: int = None
+    start: float = None
+
+    @property
+    def end(self):
+        return self.start + self.minutes
+
+
+@dataclass
+class Campaign:
+    jobs: list
+    robots: int
+
+    @property
+    def makespan(self):
+        return max(job.end for job in self.jobs) - min(job.start for job in self.jobs)
+
+    def busy(self, robot):
+        return sum(job.minutes for job in self.jobs if job.robot == robot)
+
+    def utilisation(self, robot):
+        return self.busy(robot) / self.makespan if self.makespan else 0.0
+
+
+def stage_minutes(stage, model=None):
+    """Minutes a stage keeps a robot busy: simulated run time plus the operator's share."""
+    trace = cached_simulate(REPO_ROOT / stage.protocol)
+    return estimate_trace(trace, model).total / 60 + stage.manual_minutes
+
+
+def _in_hours(start, minutes, hours):
+    """The earliest time from start at which a stage of this length fits in working hours on a weekday."""
+    if hours is None:
+        return start
+    open_, close = hours[0] * 60, hours[1] * 60
+    day, time = divmod(start, DAY)
+    while True:
+        if day % 7 < 5:
+            begin = max(time, open_)
+            #A stage longer than a working day starts first thing and runs late
+            if begin + minutes <= close or (begin == open_ and minutes > close - open_):
+                return day * DAY + begin
+        day, time = day + 1, 0
+
+
+def _place(busy, earliest, minutes, hours):
+    #First start at or after earliest that is free on this robot and inside working hours
+    start = _in_hours(earliest, minutes, hours)
+    for begin, end in sorted(busy):
+        if start + minutes <= begin:
+            break
+        if end > start:
+            start = _in_hours(end, minutes, hours)
+    return start
+
+
+def schedule_campaign(screens=3, robots=2, every=0, stages=None, hours=(9, 18), minutes=None):
+    """Interleave screens (started every `every` minutes) over robots; returns the placed Campaign.
+
+    minutes maps stage names to run times, for planning without simulating the protocols.
+    """
+    stages = stages or SOLUBILITY_SCREEN
+    minutes = minutes or {stage.name: stage_minutes(stage) for stage in stages}
+    jobs = {(screen, stage.name): Job(screen, stage, minutes[stage.name])
+            for screen in range(screens) for stage in stages}
+    busy = {robot: [] for robot in range(robots)}
+
+    def release(job):
+        times = [job.screen * every] + [jobs[(job.screen, name)].end + gap for name, gap in job.stage.after]
+        return max(times)
+
+    remaining = list(jobs.values())
+    while remaining:
+        ready = [job for job in remaining
+                 if all(jobs[(job.screen, name)].start is not None for name, _ in job.stage.after)]
+        options = []
+        for job in ready:
+            if job.stage.attached:
+                #Straight after the stage it is attached to, on the same robot
+                first = jobs[(job.screen, job.stage.after[0][0])]
+                robot = first.robot
+                options.append((_place(busy[robot], first.end, job.minutes, None), job.screen, job, robot))
+                continue
+            for robot in busy:
+                options.append((_place(busy[robot], release(job), job.minutes, hours), job.screen, job, robot))
+        start, _, job, robot = min(options, key=lambda option: option[:2] + (option[3],))
+        job.start, job.robot = start, robot
+        busy[robot].append((start, job.end))
+        remaining.remove(job)
+    return Campaign(sorted(jobs.values(), key=lambda job: job.start), robots)
+
+
+def format_time(minutes):
+    day, minutes = divmod(round(minutes), DAY)
+    return f"{DAYS[day % 7]} wk{day // 7 + 1} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def report(campaign):
+    lines = []
+    for job in campaign.jobs:
+        lines.append(f"  {format_time(job.start)} - {format_time(job.end)[-5:]}  robot {job.robot + 1}  "
+                     f"screen {job.screen + 1}  {job.stage.name}")
+    lines.append(f"  makespan {campaign.makespan / DAY:.1f} days")
+    for robot in range(campaign.robots):
+        lines.append(f"  robot {robot + 1} busy {campaign.busy(robot) / 60:.1f} h ({campaign.utilisation(robot):.1%})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schedule screens across robots and report the makespan")
+    parser.add_argument("--screens", type=int, default=3)
+    parser.add_argument("--robots", type=int, default=2)
+    parser.add_argument("--every", type=float, default=0, help="hours between screen starts")
+    parser.add_argument("--hours", default="9-18", help="working hours, e.g. 9-18, or 'any'")
+    args = parser.parse_args(argv)
+
+    hours = None if args.hours == "any" else tuple(int(h) for h in args.hours.split("-"))
+    print(report(schedule_campaign(args.screens, args.robots, args.every * 60, hours=hours)))
+
+
+if __name__ == "__main__":
+    main()
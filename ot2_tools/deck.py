@@ -0,0 +1,87 @@
+"""OT-2 deck geometry: slot origins, the fixed trash and module placement rules."""
+
+from math import dist
+
+#Front-left corner of each deck slot in deck coordinates (mm)
+SLOT_ORIGINS = {
+    "1": (0.0, 0.0, 0.0),
+    "2": (132.5, 0.0, 0.0),
+    "3": (265.0, 0.0, 0.0),
+    "4": (0.0, 90.5, 0.0),
+    "5": (132.5, 90.5, 0.0),
+    "6": (265.0, 90.5, 0.0),
+    "7": (0.0, 181.0, 0.0),
+    "8": (132.5, 181.0, 0.0),
+    "9": (265.0, 181.0, 0.0),
+    "10": (0.0, 271.5, 0.0),
+    "11": (132.5, 271.5, 0.0),
+    "12": (265.0, 271.5, 0.0),
+}
+
+SLOT_WIDTH = 127.76
+SLOT_LENGTH = 85.48
+
+#Tips are dropped into the fixed trash in slot 12
+TRASH_SLOT = "12"
+TRASH_POINT = (347.84, 351.5, 82.0)
+
+#Where the pipettes park after homing
+HOME_POINT = (418.0, 353.0, 205.0)
+
+#Slots each module type can be loaded into, and the slots a module covers
+MODULE_SLOTS = {
+    "temperature": ["1", "3", "4", "6", "7", "9", "10"],
+    "magnetic": ["1", "3", "4", "6", "7", "9", "10"],
+    "thermocycler": ["7"],
+}
+THERMOCYCLER_SLOTS = ["7", "8", "10", "11"]
+
+#Offset from the slot origin to the labware sitting on each module (approximate)
+MODULE_LABWARE_OFFSETS = {
+    "temperature": (-1.45, -0.15, 9.0),
+    "magnetic": (-1.175, -0.125, 4.5),
+    "thermocycler": (0.0, 68.06, 98.26),
+}
+
+#Load names accepted by protocol.load_module(), mapped to a module type
+MODULE_NAMES = {
+    "temperature module": "temperature",
+    "temperature module gen2": "temperature",
+    "tempdeck": "temperature",
+    "temperaturemodulev1": "temperature",
+    "temperaturemodulev2": "temperature",
+    "magnetic module": "magnetic",
+    "magnetic module gen2": "magnetic",
+    "magdeck": "magnetic",
+    "magneticmodulev1": "magnetic",
+    "magneticmodulev2": "magnetic",
+    "thermocycler": "thermocycler",
+    "thermocycler module": "thermocycler",
+    "thermocycler module gen2": "thermocycler",
+    "thermocyclermodulev1": "thermocycler",
+    "thermocyclermodulev2": "thermocycler",
+}
+
+
+def normalise_slot(slot):
+    slot = str(slot)
+    if slot not in SLOT_ORIGINS:
+        raise ValueError(f"{slot!r} is not a deck slot on the OT-2")
+    return slot
+
+
+def module_type(load_name):
+    try:
+        return MODULE_NAMES[load_name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown module {load_name!r}") from None
+
+
+def slot_center(slot):
+    x, y, z = SLOT_ORIGINS[normalise_slot(slot)]
+    return (x + SLOT_WIDTH / 2, y + SLOT_LENGTH / 2, z)
+
+
+def slot_distance(a, b):
+    """Straight-line xy distance between the centres of two slots, in mm."""
+    return dist(slot_center(a)[:2], slot_center(b)[:2])
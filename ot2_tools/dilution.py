@@ -0,0 +1,325 @@
+"""Dilution series planned for the fewest tips, passes and microlitres.
+
+The tutorial protocol made its 2x series by hand: diluent into every well, stock into the first, then
+one transfer down the row. The transformation protocols diluted their outgrowth by taking half of it
+out and topping it up with SOC, two passes with a new tip per column. This module plans dilution series
+instead and hands back what each well ends up at:
+
+    plan = plan_dilutions([2 ** (i + 1) for i in range(12)], volume=100, min_volume=20)
+    concentrations = plan.run(p300, reservoir["A2"], reservoir["A1"], series_wells([plate], 12))
+
+Every well in a series is made from the stock or from a less dilute well of the same series, taking as
+much of it as the factor needs (each well holds at least volume µl at the end, plus whatever later wells
+draw from it). Diluent goes into every well first, dispensed from above with one tip; the samples then
+move down chains of wells, one tip per chain, mixing in each well before drawing from it. A serial
+series is one long chain. A branched one draws every well from the least dilute source it can pipette
+(at least min_volume), the stock wherever it can, so it moves less liquid over more, shorter chains: a
+2x series with 20 µl steps becomes two interleaved 4x chains, and only a series whose every factor can be
+pipetted straight from the stock is fully parallel, a chain (and a tip) per well. plan_dilutions() plans
+both ways and keeps the one the TimingModel finishes first.
+
+In place, the first factor is applied to the stock well itself: diluent is added to the sample where
+it is, after taking out whatever would overflow the well.
+
+A dilution that goes straight onto an agar plate does not need a well at all: tip_dilution() draws the
+diluent (while the tip is still clean), an air gap and the sample into one tip and dispenses them
+together, so they mix on the spot.
+
+Usage:
+    python -m ot2_tools.dilution --factor 2 --steps 12 --volume 100
+    python -m ot2_tools.dilution --factors 10 100 1000 10000 --volume 150 --capacity 300
+"""
+
+import argparse
+from dataclasses import dataclass, field
+
+from .estimate import format_duration
+from .timing import TimingModel
+
+STOCK = "stock"
+STRATEGIES = ("serial", "branched")
+#Approximate seconds for each move between the wells, the diluent and the stock
+MOVE_SECONDS = 1.5
+
+
+@dataclass
+class Dilution:
+    """One well of a series: sample µl from source (a series position, or STOCK) made up with diluent µl."""
+    factor: float
+    source: object
+    sample: float
+    diluent: float
+
+    @property
+    def total(self):
+        return self.sample + self.diluent
+
+
+@dataclass
+class DilutionPlan:
+    strategy: str
+    dilutions: list
+    in_place: bool = False
+    #In place: µl of stock taken out (to waste) before the diluent goes in
+    removed: float = 0.0
+    mix: tuple = (3, 50)
+    #Position: µl later drawn from it for other wells
+    draws: dict = field(default_factory=dict)
+
+    def chains(self):
+        """Series positions in the order the samples are moved, one list per tip (and pass)."""
+        children = {}
+        for position, dilution in enumerate(self.dilutions):
+            children.setdefault(dilution.source, []).append(position)
+        chains = []
+
+        def follow(position, chain):
+            for i, child in enumerate(children.get(position, [])):
+                if i:
+                    chain = [child]
+                    chains.append(chain)
+                else:
+                    chain.append(child)
+                follow(child, chain)
+
+        if self.in_place:
+            chains.append([0])
+            follow(0, chains[0])
+        else:
+            for root in children.get(STOCK, []):
+                chains.append([root])
+                follow(root, chains[-1])
+        return chains
+
+    @property
+    def transfers(self):
+        return sum(1 for dilution in self.dilutions if dilution.source is not None)
+
+    @property
+    def tips(self):
+        diluent = any(dilution.diluent for dilution in self.dilutions)
+        return len(self.chains()) + diluent + (self.removed > 0)
+
+    @property
+    def aspirate_volume(self):
+        return self.removed + sum(dilution.diluent + (dilution.sample if dilution.source is not None else 0)
+                                  for dilution in self.dilutions)
+
+    def seconds(self, flow_rate=94.0, model=None):
+        """Rough time to run the plan: tips, moves, and plunger travel for transfers, diluent and mixes."""
+        model = model or TimingModel()
+        repetitions, mix_volume = self.mix
+        dispenses = sum(1 for dilution in self.dilutions if dilution.diluent)
+        transfers = self.transfers + (self.removed > 0)
+        plunger = 2 * self.aspirate_volume / flow_rate + (2 * transfers + dispenses + 1) * model.plunger_overhead
+        mixing = len(self.dilutions) * repetitions * 2 * (model.plunger_overhead + mix_volume / flow_rate)
+        moves = (2 * transfers + dispenses + 2 * self.tips) * MOVE_SECONDS
+        return self.tips * (model.pick_up_tip + model.drop_tip) + plunger + mixing + moves
+
+    def made(self, concentration=1.0):
+        """Concentration of each position in the series, from the volumes actually pipetted."""
+        made = {STOCK: concentration}
+        for position, dilution in enumerate(self.dilutions):
+            source = STOCK if dilution.source is None else dilution.source
+            made[position] = made[source] * dilution.sample / dilution.total
+        return [made[position] for position in range(len(self.dilutions))]
+
+    def concentrations(self, wells, concentration=1.0, stock=None):
+        """{well: concentration} for the series laid out in wells (in place, [stock] + wells)."""
+        return dict(zip(self._wells(stock, wells), self.made(concentration)))
+
+    def _wells(self, stock, wells):
+        wells = list(wells)
+        if self.in_place:
+            wells = [stock] + wells
+        if len(wells) < len(self.dilutions):
+            raise ValueError(f"{len(self.dilutions)} dilutions need {len(self.dilutions)} wells, not {len(wells)}")
+        return wells[:len(self.dilutions)]
+
+    def run(self, pipette, stock, diluent, wells, waste=None, concentration=1.0):
+        """Make the series in wells and return {well: concentration} (stock at concentration)."""
+        locations = dict(enumerate(self._wells(stock, wells)))
+        locations[STOCK] = stock
+
+        if self.removed:
+            if waste is None:
+                raise ValueError(f"Diluting in place takes {self.removed:g} µl out of the stock: give a waste")
+            pipette.transfer(self.removed, stock, waste, new_tip="once")
+        volumes = [dilution.diluent for dilution in self.dilutions if dilution.diluent]
+        targets = [locations[position].top() for position, dilution in enumerate(self.dilutions) if dilution.diluent]
+        if volumes:
+            pipette.distribute(volumes, diluent, targets, new_tip="once")
+
+        for chain in self.chains():
+            pipette.pick_up_tip()
+            steps = [position for position in chain if self.dilutions[position].source is not None]
+            if chain[0] not in steps:
+                #The stock diluted in place
+                pipette.mix(*self.mix, locations[chain[0]])
+            if steps:
+                sources = [locations[self.dilutions[position].source] for position in steps]
+                pipette.transfer([self.dilutions[position].sample for position in steps], sources,
+                                 [locations[position] for position in steps], mix_after=self.mix, new_tip="never")
+            pipette.drop_tip()
+        return self.concentrations(wells, concentration, stock)
+
+    def summary(self):
+        return (f"{self.strategy}: {self.tips} tip(s), {len(self.chains())} chain(s), "
+                f"{self.aspirate_volume:.0f} µl aspirated")
+
+
+def _round(volume):
+    return round(volume, 1)
+
+
+def _plan(factors, volume, min_volume, capacity, stock_volume, in_place, strategy, mix):
+    #Volumes are settled from the most dilute well back, so every well knows what later wells draw from it
+    order = sorted(range(len(factors)), key=lambda position: -factors[position])
+    draws = {position: 0.0 for position in range(len(factors))}
+    draws[STOCK] = 0.0
+    dilutions = [None] * len(factors)
+    for position in order:
+        factor = factors[position]
+        needed = volume + draws[position]
+        if in_place and position == 0:
+            dilutions[0] = Dilution(factor, None, 0.0, 0.0)
+            continue
+        sources = [(other, factors[other]) for other in range(len(factors))
+                   if factors[other] < factor and (position != 0 or not in_place)]
+        if not in_place:
+            sources.append((STOCK, 1.0))
+        options = []
+        for source, source_factor in sources:
+            #Make enough that the sample drawn is pipettable
+            total = max(needed, min_volume * factor / source_factor)
+            sample = total * source_factor / factor
+            diluent = total - sample
+            if total > capacity or 0 < diluent < min_volume:
+                continue
+            options.append((total, source_factor, source, sample, diluent))
+        if not options:
+            raise ValueError(f"A {factor:g}x dilution of {volume:g} µl cannot be pipetted in {capacity:g} µl wells "
+                             f"with at least {min_volume:g} µl per step")
+        if strategy == "branched":
+            total, _, source, sample, diluent = min(options, key=lambda option: (option[0], option[1]))
+        else:
+            total, _, source, sample, diluent = min(options, key=lambda option: (option[0], -option[1]))
+        dilutions[position] = Dilution(factor, source, _round(sample), _round(diluent))
+        draws[source] += dilutions[position].sample
+
+    removed = 0.0
+    if in_place:
+        factor = factors[0]
+        needed = volume + draws[0]
+        if stock_volume is None:
+            raise ValueError("Diluting in place needs the stock volume")
+        kept = stock_volume if stock_volume * factor <= capacity else capacity / factor
+        if 0 < stock_volume - kept < min_volume:
+            kept = stock_volume - min_volume
+        if kept * factor < needed:
+            raise ValueError(f"{stock_volume:g} µl diluted {factor:g}x in place leaves less than the {needed:g} µl needed")
+        removed = _round(stock_volume - kept)
+        dilutions[0] = Dilution(factor, None, _round(kept), _round(kept * (factor - 1)))
+    elif stock_volume is not None and draws[STOCK] > stock_volume:
+        raise ValueError(f"The series needs {draws[STOCK]:g} µl of stock, more than the {stock_volume:g} µl there is")
+    return DilutionPlan(strategy, dilutions, in_place, removed, mix, draws)
+
+
+def plan_dilutions(factors, volume, min_volume=20, capacity=200, stock_volume=None, in_place=False,
+                   strategy=None, mix=(3, 50), flow_rate=94.0, model=None):
+    """Plan a dilution series: factors (relative to the stock) for successive wells, volume µl in each.
+
+    strategy "serial" draws each well from the nearest pipettable less dilute well, "branched" from the
+    least dilute one (the stock wherever it can); by default both are planned and the faster one is returned.
+    """
+    if in_place and min(factors) != factors[0]:
+        raise ValueError("Diluting in place applies the first factor to the stock, so it must be the smallest")
+    if min(factors) < 1:
+        raise ValueError("Dilution factors must be at least 1")
+    plans = []
+    for name in [strategy] if strategy else STRATEGIES:
+        try:
+            plans.append(_plan(factors, volume, min_volume, capacity, stock_volume, in_place, name, mix))
+        except ValueError:
+            if strategy:
+                raise
+    if not plans:
+        return _plan(factors, volume, min_volume, capacity, stock_volume, in_place, STRATEGIES[0], mix)
+    return min(plans, key=lambda plan: plan.seconds(flow_rate, model))
+
+
+def series(factor, steps):
+    """Factors for a constant-factor series of steps wells: factor, factor², ..."""
+    return [factor ** (step + 1) for step in range(steps)]
+
+
+def series_wells(plates, count, direction="row", channels=8):
+    """count wells for a series, running along rows (or down columns) and on across plates.
+
+    A multichannel pipette dilutes whole columns at once, so with channels > 1 only row A is used.
+    """
+    if direction not in ("row", "column"):
+        raise ValueError(f"direction must be 'row' or 'column', not {direction!r}")
+    if direction == "column" and channels > 1:
+        raise ValueError("A series down a column needs a single-channel pipette")
+    wells = []
+    for plate in plates:
+        lines = plate.rows() if direction == "row" else plate.columns()
+        for line in lines[:1] if channels > 1 else lines:
+            wells += line
+    if len(wells) < count:
+        raise ValueError(f"{len(plates)} plate(s) hold {len(wells)} wells of the series, not {count}")
+    return wells[:count]
+
+
+def tip_dilution(pipette, volume, factor, sample, diluent, dest, air_gap=2, concentration=1.0):
+    """Dispense volume µl of sample diluted factor times onto dest, mixed on the way in the tip.
+
+    The tip must be clean: the diluent goes in first, then an air gap and the sample. Returns the
+    concentration dispensed.
+    """
+    sample_volume = _round(volume / factor)
+    if volume + air_gap > pipette.max_volume:
+        raise ValueError(f"{volume:g} µl and a {air_gap:g} µl air gap do not fit a {pipette.max_volume:g} µl tip")
+    if volume - sample_volume and volume - sample_volume < pipette.min_volume:
+        raise ValueError(f"{volume - sample_volume:g} µl of diluent is below the pipette's {pipette.min_volume:g} µl")
+    if volume - sample_volume:
+        pipette.aspirate(volume - sample_volume, diluent)
+        pipette.air_gap(air_gap)
+    pipette.aspirate(sample_volume, sample)
+    pipette.dispense(volume + (air_gap if volume - sample_volume else 0), dest)
+    return concentration * sample_volume / volume
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a dilution series and compare serial and branched plans")
+    factors = parser.add_mutually_exclusive_group(required=True)
+    factors.add_argument("--factors", type=float, nargs="+", help="dilution of each well relative to the stock")
+    factors.add_argument("--factor", type=float, help="constant factor between wells (with --steps)")
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--volume", type=float, default=100, help="µl each well must end up with")
+    parser.add_argument("--min-volume", type=float, default=20)
+    parser.add_argument("--capacity", type=float, default=200)
+    parser.add_argument("--stock-volume", type=float)
+    parser.add_argument("--in-place", action="store_true", help="apply the first factor to the stock well")
+    args = parser.parse_args(argv)
+
+    factors = args.factors or series(args.factor, args.steps)
+    best = plan_dilutions(factors, args.volume, args.min_volume, args.capacity, args.stock_volume, args.in_place)
+    for strategy in STRATEGIES:
+        try:
+            plan = plan_dilutions(factors, args.volume, args.min_volume, args.capacity, args.stock_volume,
+                                  args.in_place, strategy)
+        except ValueError as error:
+            print(f"  {strategy}: {error}")
+            continue
+        chosen = "  <- chosen" if plan.strategy == best.strategy else ""
+        print(f"  {plan.summary()}, ~{format_duration(plan.seconds())}{chosen}")
+    for position, (dilution, concentration) in enumerate(zip(best.dilutions, best.made())):
+        source = "in place" if dilution.source is None else f"from {dilution.source}"
+        print(f"    {position:>3}  {dilution.factor:>8g}x  {dilution.sample:>6.1f} µl {source:<10} + "
+              f"{dilution.diluent:>6.1f} µl diluent  -> {concentration:.4g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Offline run-time estimate for a protocol file.
+
+Usage:
+    python -m ot2_tools.estimate Protocols/streptactin_beads_test.py
+    python -m ot2_tools.estimate Protocols/solubility_screen/*.py --by-line
+"""
+
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .cache import cached_simulate
+from .timing import TimingModel
+
+
+@dataclass
+class StepEstimate:
+    step: object
+    seconds: float
+    commands: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class Estimate:
+    trace: object
+    steps: list
+    pauses: int
+    tips: Counter
+
+    @property
+    def total(self):
+        return sum(step.seconds for step in self.steps)
+
+    def by_line(self):
+        """Total seconds per protocol source line, slowest first."""
+        lines = {}
+        for estimate in self.steps:
+            key = (estimate.step.line, estimate.step.source)
+            lines[key] = lines.get(key, 0.0) + estimate.seconds
+        return sorted(lines.items(), key=lambda item: -item[1])
+
+
+def estimate_trace(trace, model=None):
+    model = model or TimingModel()
+    steps = [StepEstimate(step, 0.0) for step in trace.steps]
+    pauses, tips = 0, Counter()
+    for command in trace.commands:
+        if command.step is None:
+            continue
+        estimate = steps[command.step]
+        estimate.seconds += model.duration(command)
+        estimate.commands[command.kind] += 1
+        if command.kind == "pause":
+            pauses += 1
+        elif command.kind == "pick_up_tip":
+            tips[trace.pipettes[command.mount]] += command.params["tips"]
+    return Estimate(trace, steps, pauses, tips)
+
+
+def estimate(path, model=None):
+    """Simulate a protocol file (or reuse its cached simulation) and predict how long each step takes."""
+    return estimate_trace(cached_simulate(path), model)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def report(result, by_line=False, top=None):
+    lines = [f"{result.trace.metadata.get('protocolName', result.trace.path)}"]
+    if by_line:
+        rows = [row for row in result.by_line() if row[1] > 0][:top]
+        for (line, source), seconds in rows:
+            lines.append(f"  {format_duration(seconds):>9}  line {line:<4} {source}")
+    else:
+        rows = [s for s in result.steps if s.seconds > 0]
+        if top:
+            rows = sorted(rows, key=lambda s: -s.seconds)[:top]
+        for s in rows:
+            lines.append(f"  {format_duration(s.seconds):>9}  line {s.step.line:<4} {s.step.target}.{s.step.name}")
+    tips = ", ".join(f"{count} x {name}" for name, count in result.tips.items()) or "none"
+    lines.append(f"  total {format_duration(result.total)} robot time, {result.pauses} operator pause(s), tips: {tips}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate how long protocols take to run on an OT-2")
+    parser.add_argument("protocols", nargs="+", help="protocol files with a run(protocol) function")
+    parser.add_argument("--by-line", action="store_true", help="group time by protocol source line")
+    parser.add_argument("--top", type=int, default=None, help="only show the N slowest steps")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        print(report(estimate(path), args.by_line, args.top))
+        print()
+
+
+if __name__ == "__main__":
+    main()
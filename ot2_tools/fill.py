@@ -0,0 +1,97 @@
+"""Low-volume additions to many wells from one tip.
+
+multi_dispense() is for additions of a few µl to wells that already hold liquid, where a new tip per
+well used to be the only safe choice. It serves several wells from one aspiration with one tip that
+never goes below the top of a well: each drop is dispensed at the top and wiped onto the well
+wall with a touch tip, and the disposal volume goes to the trash, so nothing from one well reaches the
+next well or the source. Spin the plate down afterwards to bring the drops into the wells:
+
+    multi_dispense(p20, 2.22, reservoir["A1"], pcr_wells, tolerance=20)
+
+Small dispenses are the least accurate, and split dispenses from one aspiration less accurate again, so
+it plans against an accuracy model: ACCURACY gives each pipette's systematic error and CV by volume,
+and a multi-dispense multiplies that error by a penalty that shrinks as the disposal volume grows.
+plan_multi_dispense() picks the disposal volume that fits the most dispenses into an aspiration within
+the protocol's tolerance, and among disposal volumes that need as few aspirations, the most accurate one.
+It falls back to one dispense per aspiration (still with one tip) and raises a ValueError when even that
+misses the tolerance. The figures are approximate GEN2 specifications; measure the
+pipette gravimetrically before relying on them for a tight tolerance.
+"""
+
+from math import floor, hypot, log
+
+#Pipette: [(µl, systematic error %, CV %)], interpolated in log volume and held beyond the ends
+ACCURACY = {
+    "p20_single_gen2": [(1, 15.0, 5.0), (10, 2.5, 1.0), (20, 1.0, 0.5)],
+    "p20_multi_gen2": [(1, 20.0, 10.0), (10, 3.0, 2.0), (20, 1.5, 1.0)],
+    "p300_single_gen2": [(20, 4.0, 2.5), (150, 1.5, 0.5), (300, 1.0, 0.5)],
+    "p300_multi_gen2": [(20, 5.0, 3.0), (150, 2.0, 1.0), (300, 1.5, 0.8)],
+}
+#A multi-dispense with the pipette's minimum volume as disposal is this much less accurate again; the
+#penalty falls in proportion as the disposal volume grows
+MULTI_DISPENSE_PENALTY = 0.5
+
+
+def dispense_error(pipette, volume, disposal_volume=None):
+    """Expected error (%) of a volume µl dispense: systematic error and CV combined, with the
+    multi-dispense penalty when a disposal volume is given."""
+    name = getattr(pipette, "name", pipette)
+    if name not in ACCURACY:
+        raise ValueError(f"No accuracy figures for {name}")
+    points = ACCURACY[name]
+    volume = min(max(volume, points[0][0]), points[-1][0])
+    for (v0, a0, c0), (v1, a1, c1) in zip(points, points[1:]):
+        if volume <= v1:
+            t = log(volume / v0) / log(v1 / v0)
+            error = hypot(a0 + (a1 - a0) * t, c0 + (c1 - c0) * t)
+            break
+    if disposal_volume:
+        min_volume = pipette.min_volume if hasattr(pipette, "min_volume") else points[0][0]
+        error *= 1 + MULTI_DISPENSE_PENALTY * min(1.0, min_volume / disposal_volume)
+    return error
+
+
+def plan_multi_dispense(pipette, volume, tolerance, count=None):
+    """(dispenses per aspiration, disposal volume, expected error %) for volume µl dispenses within
+    tolerance %, preferring the most dispenses per aspiration and then the smallest error; count caps the
+    dispenses wanted."""
+    single = dispense_error(pipette, volume)
+    if single > tolerance:
+        raise ValueError(f"{volume:g} µl dispenses with {pipette.name} are expected to be {single:.1f}% out, "
+                         f"more than the {tolerance:g}% tolerance")
+    best = (1, 0.0, single)
+    disposal = pipette.min_volume
+    while disposal + 2 * volume <= pipette.max_volume:
+        dispenses = floor((pipette.max_volume - disposal) / volume)
+        if count is not None:
+            dispenses = min(dispenses, count)
+        error = dispense_error(pipette, volume, disposal)
+        if error <= tolerance and (dispenses, -error) > (best[0], -best[2]):
+            best = (dispenses, disposal, error)
+        disposal += pipette.min_volume
+    return best
+
+
+def multi_dispense(pipette, volume, source, dests, tolerance, new_tip="once"):
+    """Add volume µl to every destination well from one tip, several dispenses per aspiration.
+
+    Each drop is dispensed at the top of its well and touched off onto the well wall, so the tip never
+    reaches the liquid; the disposal volume is blown out into the trash. Returns the expected error (%)
+    of each dispense.
+    """
+    dests = list(dests)
+    count, disposal, error = plan_multi_dispense(pipette, volume, tolerance, len(dests))
+    if new_tip == "once":
+        pipette.pick_up_tip()
+    for start in range(0, len(dests), count):
+        group = dests[start:start + count]
+        extra = disposal if len(group) > 1 else 0
+        pipette.aspirate(len(group) * volume + extra, source)
+        for well in group:
+            pipette.dispense(volume, well.top())
+            pipette.touch_tip(well)
+        if extra:
+            pipette.blow_out(pipette.trash_container.wells()[0])
+    if new_tip == "once":
+        pipette.drop_tip()
+    return error
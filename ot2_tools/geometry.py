@@ -0,0 +1,169 @@
+"""Batched well geometry for labware definitions.
+
+PlateGeometry holds a labware's wells as NumPy arrays (from the registry in ot2_tools.labware) and works
+out top, bottom, center and edge coordinates for any selection of wells in one call:
+
+    plate = PlateGeometry("grenierbioone_96_wellplate_340ul")
+    plate.edges(plate.select(column=0))     #(8, 4, 3): left, right, front and back edge of column 1
+    plate.top(z=-2, index=plate.select(row="A"))
+
+validate() runs the same arrays through sanity checks (wells overlapping each other, wells outside the
+labware footprint, uneven spacing, volumes the well cannot hold) and returns the problems it finds.
+
+NumPy is optional for the rest of ot2_tools; this module needs it.
+
+Usage:
+    python -m ot2_tools.geometry                    #validate every labware definition
+    python -m ot2_tools.geometry abgene_96_wellplate_2200ul
+"""
+
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .labware import WellArrays, registry
+
+EDGES = ("left", "right", "front", "back")
+#Offsets of the edges from the well center, as fractions of the half-width and half-length
+EDGE_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+TOLERANCE = 0.05
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("ot2_tools.geometry needs NumPy (pip install numpy)")
+
+
+class PlateGeometry:
+    """Well positions of one labware, relative to its origin unless an origin is given."""
+
+    def __init__(self, labware, origin=(0.0, 0.0, 0.0)):
+        _require_numpy()
+        wells = labware if isinstance(labware, WellArrays) else registry.get(labware)
+        self.wells = wells
+        self.names = wells.names
+        self.header = wells.header
+        circular = np.array([shape == "circular" for shape in wells.shape])
+        diameter = np.frombuffer(wells.diameter)
+        self.circular = circular
+        self.half_x = np.where(circular, diameter, np.frombuffer(wells.x_dimension)) / 2
+        self.half_y = np.where(circular, diameter, np.frombuffer(wells.y_dimension)) / 2
+        self.depth = np.frombuffer(wells.depth)
+        self.volume = np.frombuffer(wells.volume)
+        #Well bottom centers, one row per well
+        self.bottoms = np.column_stack([np.frombuffer(wells.x), np.frombuffer(wells.y), np.frombuffer(wells.z)])
+        self.bottoms = self.bottoms + np.asarray(origin, dtype=float)
+
+    def select(self, wells=None, column=None, row=None):
+        """Indices of the named wells, of a column (0 for the first) or of a row ("A"); all wells by default."""
+        if wells is not None:
+            return np.array([self.wells.index[name] for name in wells], dtype=int)
+        if column is not None:
+            return self.select(self.wells.ordering[column])
+        if row is not None:
+            return self.select([column[ord(row) - ord("A")] for column in self.wells.ordering])
+        return np.arange(len(self.names))
+
+    def _index(self, index):
+        return np.arange(len(self.names)) if index is None else np.asarray(index, dtype=int)
+
+    def bottom(self, z=0.0, index=None):
+        index = self._index(index)
+        return self.bottoms[index] + (0, 0, z)
+
+    def top(self, z=0.0, index=None):
+        index = self._index(index)
+        points = self.bottoms[index].copy()
+        points[:, 2] += self.depth[index] + z
+        return points
+
+    def center(self, index=None):
+        index = self._index(index)
+        points = self.bottoms[index].copy()
+        points[:, 2] += self.depth[index] / 2
+        return points
+
+    def from_center_cartesian(self, x, y, z, index=None):
+        """Points given as fractions of each well's half-width, half-length and half-depth from its center."""
+        index = self._index(index)
+        offsets = np.column_stack([x * self.half_x[index], y * self.half_y[index], z * self.depth[index] / 2])
+        return self.center(index) + offsets
+
+    def edges(self, index=None, z=1.0):
+        """Edge points of each well, shape (wells, 4, 3) in EDGES order, at the rim by default."""
+        return np.stack([self.from_center_cartesian(x, y, z, index) for x, y in EDGE_OFFSETS], axis=1)
+
+
+def validate(labware):
+    """Problems with a labware definition, as readable strings; an empty list if there are none."""
+    plate = labware if isinstance(labware, PlateGeometry) else PlateGeometry(labware)
+    names = np.array(plate.names)
+    x, y, z = plate.bottoms.T
+    problems = []
+
+    def report(mask, message):
+        if np.any(mask):
+            listed = ", ".join(names[mask][:6]) + (" ..." if np.count_nonzero(mask) > 6 else "")
+            problems.append(f"{message}: {listed}")
+
+    report((plate.depth <= 0) | (plate.volume <= 0), "wells with no depth or volume")
+
+    #Footprint
+    dimensions = plate.header["dimensions"]
+    outside = ((x - plate.half_x < -TOLERANCE) | (x + plate.half_x > dimensions["xDimension"] + TOLERANCE)
+               | (y - plate.half_y < -TOLERANCE) | (y + plate.half_y > dimensions["yDimension"] + TOLERANCE)
+               | (z < -TOLERANCE) | (z + plate.depth > dimensions["zDimension"] + TOLERANCE))
+    report(outside, "wells outside the labware footprint")
+
+    #Overlaps, pairwise over the upper triangle: exact for pairs of round wells, bounding boxes otherwise
+    dx = np.abs(x[:, None] - x[None, :])
+    dy = np.abs(y[:, None] - y[None, :])
+    boxes = (dx < plate.half_x[:, None] + plate.half_x[None, :] - TOLERANCE) & \
+            (dy < plate.half_y[:, None] + plate.half_y[None, :] - TOLERANCE)
+    both_round = plate.circular[:, None] & plate.circular[None, :]
+    circles = np.hypot(dx, dy) < plate.half_x[:, None] + plate.half_x[None, :] - TOLERANCE
+    overlap = np.triu(np.where(both_round, circles, boxes), k=1)
+    report(overlap.any(axis=0) | overlap.any(axis=1), "overlapping wells")
+
+    #Spacing, for labware laid out as a regular grid of equal columns
+    ordering = plate.wells.ordering
+    if len({len(column) for column in ordering}) == 1:
+        grid = np.array([[plate.wells.index[name] for name in column] for column in ordering])
+        if len(ordering) > 2:
+            pitch = np.diff(x[grid], axis=0)
+            if np.ptp(pitch) > TOLERANCE:
+                problems.append(f"uneven column spacing: {pitch.min():.2f} to {pitch.max():.2f} mm")
+        if len(ordering[0]) > 2:
+            pitch = -np.diff(y[grid], axis=1)
+            if np.ptp(pitch) > TOLERANCE:
+                problems.append(f"uneven row spacing: {pitch.min():.2f} to {pitch.max():.2f} mm")
+        if np.ptp(x[grid], axis=1).max() > TOLERANCE:
+            problems.append("wells in a column are not lined up")
+
+    #Volume against the straight-sided volume of the well
+    area = np.where(plate.circular, np.pi * plate.half_x ** 2, 4 * plate.half_x * plate.half_y)
+    report(plate.volume > area * plate.depth * 1.05, "wells holding more than their geometry allows")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check labware definitions for geometry problems")
+    parser.add_argument("load_names", nargs="*", help="labware to check (all known labware by default)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for load_name in args.load_names or registry.load_names():
+        problems = validate(load_name)
+        print(f"  {'ok  ' if not problems else 'FAIL'} {load_name}")
+        for problem in problems:
+            print(f"       {problem}")
+        failed |= bool(problems)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
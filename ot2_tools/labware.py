@@ -0,0 +1,214 @@
+"""Labware definitions for offline tools.
+
+Custom definitions are read from the Custom Labware folder (packaged as ot2_tools/custom_labware when
+the package is installed on the robot). The standard Opentrons labware used by our
+protocols is described by a small table of grid parameters, close enough to the official definitions for
+timing and travel estimates.
+
+Every definition goes through a LabwareRegistry, which parses it once into WellArrays (one array per
+well property, in well order) indexed by load name. Parsed custom definitions are cached on disk and
+re-read only when their file's modification time changes.
+"""
+
+import json
+import pickle
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CUSTOM_LABWARE_DIR = Path(__file__).resolve().parent.parent / "Custom Labware"
+LABWARE_CACHE = CUSTOM_LABWARE_DIR.parent / ".ot2_cache" / "labware.pickle"
+if not CUSTOM_LABWARE_DIR.is_dir():
+    #Installed as a package (on the robot, see README.md): the definitions come with it, and there are
+    #too few to be worth caching
+    CUSTOM_LABWARE_DIR = Path(__file__).resolve().parent / "custom_labware"
+    LABWARE_CACHE = None
+
+ROW_NAMES = "ABCDEFGHIJKLMNOP"
+
+#load name: (display name, rows, columns, x of A1, y of A1, x spacing, y spacing, labware height,
+#            well depth, well volume, well shape and size, is tip rack)
+STANDARD_LABWARE = {
+    "opentrons_96_tiprack_20ul": ("Opentrons 96 Tip Rack 20 µL", 8, 12, 14.38, 74.24, 9, 9, 64.69,
+                                  39.2, 20, {"shape": "circular", "diameter": 3.27}, True),
+    "opentrons_96_tiprack_300ul": ("Opentrons 96 Tip Rack 300 µL", 8, 12, 14.38, 74.24, 9, 9, 64.49,
+                                   59.3, 300, {"shape": "circular", "diameter": 5.23}, True),
+    "usascientific_12_reservoir_22ml": ("USA Scientific 12 Well Reservoir 22 mL", 1, 12, 13.94, 42.9, 9, 0, 44.45,
+                                        42.16, 22000, {"shape": "rectangular", "xDimension": 8.33, "yDimension": 71.88}, False),
+    "nest_12_reservoir_15ml": ("NEST 12 Well Reservoir 15 mL", 1, 12, 14.38, 42.78, 9, 0, 31.4,
+                               26.85, 15000, {"shape": "rectangular", "xDimension": 8.2, "yDimension": 71.2}, False),
+    "armadillo_96_wellplate_200ul_pcr_full_skirt": ("Armadillo 96 Well Plate 200 µL PCR Full Skirt", 8, 12, 14.38, 74.24, 9, 9, 15.87,
+                                                    14.95, 200, {"shape": "circular", "diameter": 5.5}, False),
+    "opentrons_96_aluminumblock_generic_pcr_strip_200ul": ("Opentrons 96 Well Aluminum Block with Generic PCR Strip 200 µL", 8, 12, 14.38, 74.24, 9, 9, 49.35,
+                                                           20.3, 200, {"shape": "circular", "diameter": 5.5}, False),
+    "nest_96_wellplate_200ul_flat": ("NEST 96 Well Plate 200 µL Flat", 8, 12, 14.38, 74.24, 9, 9, 14.22,
+                                     10.8, 360, {"shape": "circular", "diameter": 6.85}, False),
+}
+
+
+def grid_definition(load_name, display_name, rows, columns, x0, y0, dx, dy, height, depth, volume, well_shape, is_tiprack=False):
+    """Build a labware definition dict (schema 2 layout) for a regular grid of wells."""
+    ordering = [[f"{ROW_NAMES[r]}{c + 1}" for r in range(rows)] for c in range(columns)]
+    wells = {}
+    for c, column in enumerate(ordering):
+        for r, name in enumerate(column):
+            wells[name] = {"depth": depth, "totalLiquidVolume": volume, **well_shape,
+                           "x": round(x0 + c * dx, 2), "y": round(y0 - r * dy, 2), "z": round(height - depth, 2)}
+
+    return {
+        "ordering": ordering,
+        "metadata": {"displayName": display_name},
+        "dimensions": {"xDimension": 127.76, "yDimension": 85.48, "zDimension": height},
+        "wells": wells,
+        "parameters": {"loadName": load_name, "isTiprack": is_tiprack, "format": "irregular"},
+        "cornerOffsetFromSlot": {"x": 0, "y": 0, "z": 0},
+    }
+
+
+def custom_definition_paths():
+    return sorted(CUSTOM_LABWARE_DIR.glob("*.json"))
+
+
+def load_custom_definitions():
+    """Read every custom labware definition, keyed by load name."""
+    definitions = {}
+    for path in custom_definition_paths():
+        with open(path) as f:
+            definition = json.load(f)
+        definitions[definition["parameters"]["loadName"]] = definition
+    return definitions
+
+
+@dataclass
+class WellArrays:
+    """A labware definition in structure-of-arrays form: well i is names[i], at (x[i], y[i], z[i])."""
+    load_name: str
+    names: list
+    x: array
+    y: array
+    z: array
+    depth: array
+    volume: array
+    shape: list
+    diameter: array
+    x_dimension: array
+    y_dimension: array
+    ordering: list
+    header: dict
+    index: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_definition(cls, definition):
+        names = [name for column in definition["ordering"] for name in column]
+        wells = [definition["wells"][name] for name in names]
+
+        def column(key, default=0.0):
+            return array("d", (well.get(key, default) for well in wells))
+
+        header = {key: value for key, value in definition.items() if key not in ("wells", "ordering")}
+        return cls(definition["parameters"]["loadName"], names, column("x"), column("y"), column("z"),
+                   column("depth"), column("totalLiquidVolume"), [well["shape"] for well in wells],
+                   column("diameter"), column("xDimension"), column("yDimension"), definition["ordering"], header)
+
+    def well(self, name):
+        """The geometry of one well, in the same form as the "wells" entries of a definition."""
+        i = self.index[name]
+        geometry = {"depth": self.depth[i], "totalLiquidVolume": self.volume[i], "shape": self.shape[i]}
+        if self.shape[i] == "circular":
+            geometry["diameter"] = self.diameter[i]
+        else:
+            geometry["xDimension"], geometry["yDimension"] = self.x_dimension[i], self.y_dimension[i]
+        geometry.update(x=self.x[i], y=self.y[i], z=self.z[i])
+        return geometry
+
+    def definition(self):
+        """Rebuild the definition dict, for code that wants the JSON layout."""
+        return {**self.header, "ordering": self.ordering, "wells": {name: self.well(name) for name in self.names}}
+
+
+class LabwareRegistry:
+    def __init__(self, directory=CUSTOM_LABWARE_DIR, cache_path=LABWARE_CACHE):
+        self.directory = Path(directory)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._files = None
+        self._by_load_name = {}
+        self._standard = {}
+        self._definitions = {}
+
+    def _load_cache(self):
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return {}
+
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(exist_ok=True)
+            temporary = self.cache_path.with_suffix(".tmp")
+            with open(temporary, "wb") as f:
+                pickle.dump(self._files, f, protocol=pickle.HIGHEST_PROTOCOL)
+            temporary.replace(self.cache_path)
+        except OSError:
+            pass
+
+    def refresh(self):
+        """Re-parse any custom definition whose file has changed since it was last parsed."""
+        first = self._files is None
+        if first:
+            self._files = self._load_cache()
+        paths = {str(path): path.stat().st_mtime_ns for path in sorted(self.directory.glob("*.json"))}
+        stale = [name for name in self._files if name not in paths]
+        for name in stale:
+            del self._files[name]
+        parsed = [name for name, mtime in paths.items() if name not in self._files or self._files[name][0] != mtime]
+        for name in parsed:
+            with open(name) as f:
+                self._files[name] = (paths[name], WellArrays.from_definition(json.load(f)))
+        if stale or parsed:
+            self._save_cache()
+        if first or stale or parsed:
+            self._by_load_name = {wells.load_name: wells for _, wells in self._files.values()}
+            self._definitions.clear()
+
+    def custom_load_names(self):
+        self.refresh()
+        return sorted(self._by_load_name)
+
+    def load_names(self):
+        self.refresh()
+        return sorted(set(self._by_load_name) | set(STANDARD_LABWARE))
+
+    def get(self, load_name):
+        """The WellArrays for a custom or standard labware load name."""
+        self.refresh()
+        if load_name in self._by_load_name:
+            return self._by_load_name[load_name]
+        if load_name in STANDARD_LABWARE:
+            if load_name not in self._standard:
+                definition = grid_definition(load_name, *STANDARD_LABWARE[load_name])
+                self._standard[load_name] = WellArrays.from_definition(definition)
+            return self._standard[load_name]
+        raise KeyError(f"Unknown labware {load_name!r}: add its definition to {CUSTOM_LABWARE_DIR.name}/")
+
+    def definition(self, load_name):
+        """The definition dict for a load name, built once and shared: do not modify it."""
+        wells = self.get(load_name)
+        if load_name not in self._definitions:
+            self._definitions[load_name] = wells.definition()
+        return self._definitions[load_name]
+
+
+registry = LabwareRegistry()
+
+
+def get_definition(load_name):
+    """Return the definition for a custom or standard labware load name."""
+    return registry.definition(load_name)
@@ -0,0 +1,218 @@
+"""Deck-layout solver.
+
+Picks a slot for every labware, tip rack and module a protocol loads so the head covers as little
+distance as possible for the protocol's transfer pattern. The pattern is given as flows: how many times
+the head travels between two items (a tip rack and the source it draws from, the source and the
+destination, the destination and the trash). Items are placed so heavy flows run between neighbouring
+slots:
+
+    items = [Item("reservoir"), Item("cells", module="temperature module gen2"),
+             Item("p300 tips 1", kind="tip_rack")]
+    flows = {("p300 tips 1", "reservoir"): 6, ("reservoir", "cells"): 6, ("cells", TRASH): 6}
+    solve(items, flows)    #{"cells": "9", "reservoir": "6", "p300 tips 1": "3"}
+
+Modules only go in the slots they can be loaded into (deck.MODULE_SLOTS) and the thermocycler always
+takes its four fixed slots. Anything already placed by the protocol can be pinned with fixed=. The
+solver starts from a greedy placement (busiest items first, each in the free slot closest to what it has
+already been placed next to) and then swaps and moves items while that shortens the total distance.
+
+For a simulated protocol, suggest() reads the flows off its command stream and compares its layout with
+the solved one.
+
+Usage:
+    python -m ot2_tools.layout Protocols/add_strep_tag_PCRs/1_set_up_PCRs.py
+"""
+
+import argparse
+from collections import Counter
+from dataclasses import dataclass
+from itertools import combinations
+
+from . import deck
+from .cache import cached_simulate
+from .simulation import DEFAULT_SPEEDS
+
+#Pseudo-item for the fixed trash
+TRASH = "trash"
+SLOTS = [slot for slot in deck.SLOT_ORIGINS if slot != deck.TRASH_SLOT]
+
+
+@dataclass
+class Item:
+    name: str
+    kind: str = "labware"
+    module: str = None
+
+    def allowed(self):
+        if self.module is None:
+            return SLOTS
+        kind = deck.module_type(self.module)
+        return ["7"] if kind == "thermocycler" else deck.MODULE_SLOTS[kind]
+
+
+def _footprint(item, slot):
+    if item.module and deck.module_type(item.module) == "thermocycler":
+        return set(deck.THERMOCYCLER_SLOTS)
+    return {slot}
+
+
+def layout_cost(layout, flows):
+    """Total head travel in mm over the flows, for a layout of item -> slot."""
+    slots = {**layout, TRASH: deck.TRASH_SLOT}
+    return sum(count * deck.slot_distance(slots[a], slots[b]) for (a, b), count in flows.items()
+               if a in slots and b in slots)
+
+
+def _valid(items, layout):
+    taken = set()
+    for item in items:
+        slot = layout[item.name]
+        if slot not in item.allowed():
+            return False
+        footprint = _footprint(item, slot)
+        if taken & footprint:
+            return False
+        taken |= footprint
+    return True
+
+
+def solve(items, flows, fixed=None, start=None):
+    """Slot for every item, minimising layout_cost; fixed items keep the slot they are given."""
+    fixed = {name: deck.normalise_slot(slot) for name, slot in (fixed or {}).items()}
+    by_name = {item.name: item for item in items}
+    weight = Counter()
+    for (a, b), count in flows.items():
+        weight[a] += count
+        weight[b] += count
+
+    #Greedy start: the most constrained and busiest items first
+    layout = dict(fixed)
+    taken = set()
+    for name, slot in fixed.items():
+        taken |= _footprint(by_name[name], slot)
+    free_items = [item for item in items if item.name not in fixed]
+    free_items.sort(key=lambda item: (len(item.allowed()), -weight[item.name]))
+    for item in free_items:
+        options = [slot for slot in item.allowed() if not taken & _footprint(item, slot)]
+        if not options:
+            raise ValueError(f"No free slot for {item.name}")
+        layout[item.name] = min(options, key=lambda slot: (layout_cost({**layout, item.name: slot}, flows),
+                                                           SLOTS.index(slot)))
+        taken |= _footprint(item, layout[item.name])
+
+    movable = [item.name for item in free_items]
+    layout = _improve(items, layout, movable, flows)
+    if start is not None:
+        #Also improve on a known layout (usually the protocol's own), and keep whichever ends up shorter
+        other = _improve(items, {**start, **fixed}, movable, flows)
+        if layout_cost(other, flows) < layout_cost(layout, flows) - 1e-6:
+            layout = other
+    return layout
+
+
+def _improve(items, layout, movable, flows):
+    #Swap pairs of items and move items to empty slots until nothing shortens the travel
+    by_name = {item.name: item for item in items}
+    cost = layout_cost(layout, flows)
+    improved = True
+    while improved:
+        improved = False
+        candidates = [{**layout, a: layout[b], b: layout[a]} for a, b in combinations(movable, 2)]
+        used = set().union(*(_footprint(by_name[name], slot) for name, slot in layout.items()))
+        candidates += [{**layout, name: slot} for name in movable for slot in SLOTS if slot not in used]
+        for candidate in candidates:
+            candidate_cost = layout_cost(candidate, flows)
+            if candidate_cost < cost - 1e-6 and _valid(items, candidate):
+                layout, cost, improved = candidate, candidate_cost, True
+                break
+    return layout
+
+
+def tip_rack_items(name, columns, prefix=None):
+    """Tip rack items for a pipette using this many columns of tips, with the columns each rack provides."""
+    racks = []
+    for i in range(-(-columns // 12)):
+        racks.append((Item(f"{prefix or name} tips {i + 1}", kind="tip_rack"), min(12, columns - 12 * i)))
+    return racks
+
+
+def add_cycle(flows, path, count=1):
+    """Add count trips along a path of items (e.g. tips -> source -> destination -> trash) to flows."""
+    for a, b in zip(path, path[1:]):
+        if a != b:
+            key = (a, b) if (b, a) not in flows else (b, a)
+            flows[key] = flows.get(key, 0) + count
+    return flows
+
+
+def trace_flows(trace):
+    """Items and flows of a simulated protocol, with its own layout. Items are named by slot."""
+    modules = trace.modules
+    items = {}
+    for labware in trace.labware:
+        slot = labware["slot"]
+        if slot == deck.TRASH_SLOT:
+            continue
+        items[slot] = Item(slot, kind="tip_rack" if "tiprack" in labware["load_name"] else "labware",
+                           module=modules.get(slot))
+    flows, previous = {}, None
+    for command in trace.commands:
+        if command.kind == "drop_tip" and not command.params.get("returned"):
+            here = TRASH
+        elif command.kind in ("pick_up_tip", "drop_tip", "aspirate", "dispense") and command.slot in items:
+            here = command.slot
+        else:
+            continue
+        if previous is not None:
+            add_cycle(flows, [previous, here])
+        previous = here
+    return list(items.values()), flows
+
+
+@dataclass
+class Suggestion:
+    trace: object
+    current: dict
+    solved: dict
+    before: float
+    after: float
+
+    @property
+    def moves(self):
+        return {slot: new for slot, new in self.solved.items() if new != slot}
+
+
+def suggest(trace, fixed=None):
+    """The solved layout for a simulated protocol, next to the layout it loads now."""
+    items, flows = trace_flows(trace)
+    current = {item.name: item.name for item in items}
+    solved = solve(items, flows, fixed, start=current)
+    return Suggestion(trace, current, solved, layout_cost(current, flows), layout_cost(solved, flows))
+
+
+def report(suggestion):
+    trace = suggestion.trace
+    speed = min(DEFAULT_SPEEDS["X"], DEFAULT_SPEEDS["Y"])
+    names = {labware["slot"]: labware["label"] or labware["load_name"] for labware in trace.labware}
+    lines = [trace.metadata.get("protocolName", trace.path),
+             f"  travel {suggestion.before / 1000:.1f} m -> {suggestion.after / 1000:.1f} m "
+             f"(about {(suggestion.before - suggestion.after) / speed:.0f} s less)"]
+    for slot, new in sorted(suggestion.moves.items(), key=lambda item: int(item[0])):
+        lines.append(f"  slot {slot:>2} -> {new:>2}  {names[slot]}")
+    if not suggestion.moves:
+        lines.append("  current layout is already the best found")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suggest deck layouts that cut head travel")
+    parser.add_argument("protocols", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        print(report(suggest(cached_simulate(path))))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Per-well liquid volume ledger.
+
+Keeps track of how much liquid each well holds as a protocol fills and draws from it, and turns that into
+aspirate and dispense heights that follow the liquid surface instead of going to the bottom of the well:
+
+    ledger = LiquidLedger()
+    ledger.fill([reservoir["A1"], reservoir["A2"]], 20000)
+    ledger.aspirate(p300, 190, reservoir["A1"])    #2 mm under the surface, not 1 mm off the bottom
+
+Liquid heights come from the loaded wells' own geometry (well.diameter, or well.length and well.width),
+so on the robot they follow the labware definitions the protocol loaded. Heights are worked out as if
+every well had straight sides. A well with a V-shaped or round bottom (deep-well plates, reservoir
+troughs) then reads lower than its real level, which only ever puts the tip deeper under the surface:
+the ledger places tips for aspirating and dispensing into liquid, never above it. Wells that taper over
+their whole depth (TAPERED_LABWARE, e.g. PCR plates) read so far off that fill() refuses them.
+
+Volumes are per well. A multichannel pipette in a single-row reservoir puts all of its tips in the same
+well, so one aspiration there takes the volume times the number of channels.
+"""
+
+from math import pi
+
+#Labware with conical wells, where a straight-sided height is no guide to the liquid level
+TAPERED_LABWARE = {
+    "armadillo_96_wellplate_200ul_pcr_full_skirt",
+    "opentrons_96_aluminumblock_generic_pcr_strip_200ul",
+}
+
+
+class LiquidLedger:
+    def __init__(self, submerge=2.0, clearance=1.0):
+        self.submerge = submerge
+        self.clearance = clearance
+        self.volumes = {}
+        self._areas = {}
+
+    @staticmethod
+    def _key(well):
+        return (well.parent, well.well_name)
+
+    def _area(self, well):
+        #Cross-section of the well in mm², from the loaded well
+        key = (well.parent.load_name, well.well_name)
+        if key not in self._areas:
+            if well.parent.load_name in TAPERED_LABWARE:
+                raise ValueError(f"{well.parent.load_name} has conical wells, which the ledger cannot "
+                                 "follow the liquid level in")
+            if well.diameter is not None:
+                self._areas[key] = pi * (well.diameter / 2) ** 2
+            else:
+                self._areas[key] = well.length * well.width
+        return self._areas[key]
+
+    @staticmethod
+    def tips_per_well(pipette, well):
+        """How many of the pipette's tips go into this well at once."""
+        return max(1, pipette.channels // len(well.parent.rows()))
+
+    def fill(self, wells, volume):
+        """Record the starting volume of wells the operator fills by hand."""
+        if not isinstance(wells, (list, tuple)):
+            wells = [wells]
+        for well in wells:
+            #Refuse wells the ledger cannot follow before any liquid is moved
+            self._area(well)
+            self.volumes[self._key(well)] = volume
+
+    def volume(self, well):
+        return self.volumes.get(self._key(well), 0.0)
+
+    def add(self, well, volume):
+        if self.volume(well) + volume > well.max_volume:
+            raise ValueError(f"{well} would overflow: {self.volume(well) + volume:.0f} µl of {well.max_volume} µl")
+        self.volumes[self._key(well)] = self.volume(well) + volume
+
+    def remove(self, well, volume):
+        if volume > self.volume(well) + 1e-6:
+            raise ValueError(f"{well} holds {self.volume(well):.0f} µl, {volume:.0f} µl needed")
+        self.volumes[self._key(well)] = self.volume(well) - volume
+
+    def height(self, well, volume=None):
+        """Height of the liquid surface above the bottom of the well, in mm."""
+        volume = self.volume(well) if volume is None else volume
+        return min(volume / self._area(well), well.depth)
+
+    def aspirate_location(self, well, volume):
+        """Where to aspirate so the tip stays under the surface it will have drawn the liquid down to."""
+        return well.bottom(max(self.clearance, self.height(well, self.volume(well) - volume) - self.submerge))
+
+    def dispense_location(self, well, volume):
+        """Where to dispense so the tip ends up just under the new surface."""
+        return well.bottom(max(self.clearance, self.height(well, self.volume(well) + volume) - self.submerge))
+
+    def aspirate(self, pipette, volume, well, rate=1.0):
+        drawn = volume * self.tips_per_well(pipette, well)
+        location = self.aspirate_location(well, drawn)
+        self.remove(well, drawn)
+        pipette.aspirate(volume, location, rate=rate)
+        return pipette
+
+    def dispense(self, pipette, volume, well, rate=1.0):
+        added = volume * self.tips_per_well(pipette, well)
+        location = self.dispense_location(well, added)
+        self.add(well, added)
+        pipette.dispense(volume, location, rate=rate)
+        return pipette
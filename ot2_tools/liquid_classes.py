@@ -0,0 +1,92 @@
+"""Liquid classes: pipetting settings per kind of liquid, applied and restored in one step.
+
+Protocols used to set pipette.flow_rate before a delicate step and set it back by hand afterwards, which
+is easy to get wrong: a forgotten reset leaves the pipette at 15 µl/s for the rest of the run, and a
+reset to the wrong number (94 µl/s on a p20) quietly changes every later step. A liquid class names the
+settings a liquid needs and liquid_class() applies them for a block of steps, putting back whatever the
+pipette had before when the block ends:
+
+    with liquid_class(p300, "bead supernatant"):
+        p300.transfer(100, bead_wells, waste, new_tip="always")
+
+Flow rates are multiples of the pipette's default rates, so one class works for the p20 and the p300;
+the comments give the p300 figures. Each class is as fast as the liquid allows rather than one
+conservative setting for everything: aqueous liquids run at the defaults, mixes that have to resuspend
+beads or cells dispense fast, and only bead supernatants and viscous liquids go slow.
+
+Slow z movement only matters while the tip leaves a viscous liquid, so classes give a withdraw_speed for
+that move (withdraw()) instead of capping the z axis for every move in the block.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class LiquidClass:
+    name: str
+    #Multiples of the pipette's default flow rates
+    aspirate: float = 1.0
+    dispense: float = 1.0
+    blow_out: float = 1.0
+    #mm/s for pulling the tip out of the liquid (None: the pipette's normal speed)
+    withdraw_speed: float = None
+    #Seconds to wait after aspirating or dispensing, for liquids that lag behind the plunger
+    delay: float = 0.0
+
+
+LIQUID_CLASSES = {liquid.name: liquid for liquid in [
+    LiquidClass("aqueous"),
+    #Mixing cultures and beads back into suspension: fast dispenses (300 µl/s on a p300)
+    LiquidClass("culture", dispense=3.2),
+    LiquidClass("bead resuspension", dispense=3.2),
+    #Drawing liquid off settled beads without lifting them (15 µl/s on a p300); it can leave the tip fast
+    LiquidClass("bead supernatant", aspirate=0.16, dispense=3.2),
+    #Silicone oil and 90% glycerol (64.75 µl/s, blow out at 4 µl/s on a p300)
+    LiquidClass("viscous oil", aspirate=0.69, dispense=0.69, blow_out=0.043, withdraw_speed=1, delay=8),
+]}
+
+
+def get_liquid_class(liquid):
+    """A LiquidClass by name (or the class itself)."""
+    if isinstance(liquid, LiquidClass):
+        return liquid
+    try:
+        return LIQUID_CLASSES[liquid]
+    except KeyError:
+        raise ValueError(f"Unknown liquid class {liquid!r}; known classes: {', '.join(LIQUID_CLASSES)}") from None
+
+
+#id(pipette.flow_rate): [rates outside any liquid class block, blocks open]
+_outer_rates = {}
+
+
+@contextmanager
+def liquid_class(pipette, liquid):
+    """Set the pipette's flow rates for a liquid class for the enclosed steps, then restore them.
+
+    Rates are scaled from the ones the pipette had outside any liquid_class() block, so nested blocks
+    do not compound.
+    """
+    liquid = get_liquid_class(liquid)
+    rates = pipette.flow_rate
+    saved = (rates.aspirate, rates.dispense, rates.blow_out)
+    outer = _outer_rates.setdefault(id(rates), [saved, 0])
+    outer[1] += 1
+    aspirate, dispense, blow_out = outer[0]
+    rates.aspirate = aspirate * liquid.aspirate
+    rates.dispense = dispense * liquid.dispense
+    rates.blow_out = blow_out * liquid.blow_out
+    try:
+        yield liquid
+    finally:
+        rates.aspirate, rates.dispense, rates.blow_out = saved
+        outer[1] -= 1
+        if not outer[1]:
+            del _outer_rates[id(rates)]
+
+
+def withdraw(pipette, well, liquid):
+    """Pull the tip up out of the liquid to the top of the well, at the class's withdraw speed."""
+    pipette.move_to(well.top(), speed=get_liquid_class(liquid).withdraw_speed)
+    return pipette
@@ -0,0 +1,200 @@
+"""Plate-reader OD exports to inoculation volumes.
+
+Protocols that measure the OD of overnight cultures used to inoculate a fixed volume whatever the
+cultures had grown to. This module reads the plate reader's export back in and works out, for every
+culture, the inoculum that brings the expression culture to the same starting OD:
+
+    since = time.time()
+    protocol.pause(f"Measure OD of 96-well plate now and save the export to {OD_EXPORT_DIR}")
+    volumes = inoculation_volumes(protocol, OD_EXPORT_DIR, since, plates=[[1, 2, 3]], blank_column=4,
+                                  dilution=20, medium_volume=225, default=25)
+
+Exports are CSV files on the robot (anywhere under /data/user_storage). Both the 8 x 12 grid most
+readers write (a row letter followed by twelve values) and a long format (one "A1,0.123" line per well)
+are read line by line, skipping any header or footer the reader adds.
+
+Which export belongs to which plate is never guessed. A protocol either names the export files, one per
+plate in the order of plates, or, for a single plate measured during the run, gives the directory and a
+since time taken in this run before the pause, and exactly one export has to turn up there after it.
+Anything else (a missing export, several new ones, a plate the export does not cover) stops the run
+with an error rather than inoculating from the wrong readings.
+
+The inoculum v for a culture with OD c (blank-corrected and scaled back up by the dilution into the OD
+plate) that gives a target OD t in medium_volume of medium is v = t * medium / (c - t), worked out for
+all wells at once. A multichannel pipette moves a column at a time, so each column gets the median of
+its wells' volumes. Cultures that grew too little get the largest volume the pipette allows and are
+reported. Wells that read at or below the blank (empty, blank or failed wells) get no volume of their
+own: the run pauses to list them, their column gets the median of its other wells, and a column with
+none left gets None, which inoculated() leaves out of the transfer.
+
+NumPy is needed to read exports; when simulating the default volume is used.
+"""
+
+import csv
+import re
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ROWS = "ABCDEFGH"
+COLUMNS = 12
+_WELL = re.compile(r"^([A-H])(\d{1,2})$")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("ot2_tools.od needs NumPy (pip install numpy)")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def read_plate(path):
+    """An (8, 12) array of readings from one plate-reader export; wells it does not list are NaN."""
+    _require_numpy()
+    plate = np.full((len(ROWS), COLUMNS), np.nan)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(2048), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        for fields in csv.reader(f, dialect):
+            fields = [field.strip() for field in fields if field.strip()]
+            if not fields:
+                continue
+            well = _WELL.match(fields[0])
+            if well and len(fields) >= 2 and _number(fields[1]) is not None:
+                #Long format: well, value
+                plate[ROWS.index(well.group(1)), int(well.group(2)) - 1] = _number(fields[1])
+            elif fields[0] in ROWS and len(fields) >= COLUMNS + 1:
+                #Grid format: row letter, then a value per column
+                values = [_number(value) for value in fields[1:COLUMNS + 1]]
+                if None not in values:
+                    plate[ROWS.index(fields[0])] = values
+    return plate
+
+
+def find_exports(directory, since, pattern="*.csv"):
+    """Every export in directory modified after since (a time.time()), oldest first."""
+    paths = [path for path in Path(directory).glob(pattern) if path.stat().st_mtime > since]
+    return sorted(paths, key=lambda path: path.stat().st_mtime)
+
+
+def wait_for_export(directory, since, timeout=600, poll=5, pattern="*.csv"):
+    """The one export saved to directory after since, waiting up to timeout seconds for it to turn up.
+
+    Raises FileNotFoundError if none does, and ValueError if more than one has.
+    """
+    deadline = time.time() + timeout
+    while True:
+        paths = find_exports(directory, since, pattern)
+        if len(paths) > 1:
+            raise ValueError(f"{len(paths)} exports saved to {directory} during this run "
+                             f"({', '.join(path.name for path in paths)}): keep only the one for this plate")
+        if paths:
+            return paths[0]
+        if time.time() >= deadline:
+            raise FileNotFoundError(f"No OD export saved to {directory} within {timeout} s")
+        time.sleep(poll)
+
+
+def export_paths(exports, since, count, timeout=600):
+    """The export of each of count plates, in plate order: exports is a list of files (one per plate), or
+    a directory that the one plate's export is saved to after since."""
+    if isinstance(exports, (list, tuple)):
+        if len(exports) != count:
+            raise ValueError(f"{len(exports)} OD export(s) given for {count} plate(s)")
+        paths = [Path(path) for path in exports]
+        missing = [str(path) for path in paths if not path.is_file()]
+        if missing:
+            raise FileNotFoundError(f"OD export(s) not found: {', '.join(missing)}")
+        return paths
+    if count != 1:
+        raise ValueError(f"Name the export file of each of the {count} plates; a directory only serves one plate")
+    if since is None:
+        raise ValueError(f"Give the time this run started waiting for the export to {exports}")
+    return [wait_for_export(exports, since, timeout)]
+
+
+def culture_od(plate, blank_column, dilution=1.0):
+    """Blank-corrected OD of the undiluted cultures, from one plate's readings.
+
+    blank_column is the 1-based column of medium-only wells; its mean is taken off every well.
+    """
+    blank = np.nanmean(plate[:, blank_column - 1])
+    return (plate - blank) * dilution
+
+
+def inoculum(od, target, medium_volume, min_volume, max_volume):
+    """Volume of each culture that brings medium_volume of medium to the target OD, within the pipette's
+    range. Wells with no growth (OD at or below the blank, or no reading) are NaN."""
+    od = np.asarray(od, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volumes = target * medium_volume / (od - target)
+    #Grown, but not past the target: as much culture as the pipette takes
+    volumes = np.where(np.isfinite(volumes) & (volumes > 0), volumes, max_volume)
+    volumes = np.where(np.isnan(od) | (od <= 0), np.nan, volumes)
+    return np.clip(volumes, min_volume, max_volume)
+
+
+def column_volumes(volumes, columns):
+    """One volume per column (1-based numbers) for a multichannel pipette: the median of its wells that
+    have one, or None for a column without any."""
+    medians = []
+    for column in columns:
+        wells = volumes[:, column - 1]
+        wells = wells[~np.isnan(wells)]
+        medians.append(round(float(np.median(wells)), 1) if wells.size else None)
+    return medians
+
+
+def inoculation_volumes(protocol, exports, since, plates, blank_column, dilution, medium_volume,
+                        default, target=0.3, min_volume=20, max_volume=200, timeout=600):
+    """Per-column inoculum volumes for each culture column, read from the OD plates' exports.
+
+    exports names the export of each plate (see export_paths()); plates lists, for each OD plate in the
+    same order, the 1-based columns holding the cultures. Returns one flat list of volumes in the same
+    order (None for columns with no growth), or default for every column when simulating.
+    """
+    columns = [column for plate in plates for column in plate]
+    if getattr(protocol, "is_simulating", lambda: True)():
+        return [default] * len(columns)
+
+    volumes = []
+    for path, plate_columns in zip(export_paths(exports, since, len(plates), timeout), plates):
+        protocol.comment(f"Reading ODs from {path}, saved {time.ctime(path.stat().st_mtime)}")
+        plate = read_plate(path)
+        unread = [column for column in [blank_column] + plate_columns if np.isnan(plate[:, column - 1]).all()]
+        if unread:
+            raise ValueError(f"{path.name} has no readings for column(s) {', '.join(map(str, unread))}")
+        od = culture_od(plate, blank_column, dilution)
+        per_well = inoculum(od, target, medium_volume, min_volume, max_volume)
+        culture = np.zeros(per_well.shape, dtype=bool)
+        culture[:, [column - 1 for column in plate_columns]] = True
+        low = [f"{ROWS[r]}{c + 1}" for r, c in zip(*np.nonzero(culture & (per_well >= max_volume)))]
+        if low:
+            protocol.comment(f"{path.name}: low OD in {', '.join(low)}, inoculating {max_volume} µl")
+        empty = [f"{ROWS[r]}{c + 1}" for r, c in zip(*np.nonzero(culture & np.isnan(per_well)))]
+        if empty:
+            protocol.pause(f"{path.name}: no growth (OD at or below the blank) in {', '.join(empty)}. Check the "
+                           "plates; resume to inoculate those columns with their other wells' volume, and to "
+                           "skip columns without growth")
+        volumes += column_volumes(per_well, plate_columns)
+    protocol.comment("Inoculum volumes from OD: "
+                     + ", ".join("skip" if volume is None else f"{volume:g}" for volume in volumes) + " µl")
+    return volumes
+
+
+def inoculated(volumes, sources, dests):
+    """volumes, sources and dests without the columns inoculation_volumes() found nothing growing in."""
+    kept = [(volume, source, dest) for volume, source, dest in zip(volumes, sources, dests) if volume is not None]
+    return [list(values) for values in zip(*kept)] if kept else [[], [], []]
@@ -0,0 +1,327 @@
+"""Column-batch planner.
+
+Turns a sample count into a deck-aware schedule: how many plates and tip racks each run needs, which
+column of which plate every sample goes to, which reservoir wells each reagent is drawn from, and how the
+samples are split across runs when everything does not fit on the deck at once. The planner always
+returns the fewest runs that fit.
+
+A protocol describes its labware by role and its liquid handling as phases:
+
+    LABWARE = [
+        Labware("samples", "armadillo_96_wellplate_200ul_pcr_full_skirt"),
+        Labware("cells", "armadillo_96_wellplate_200ul_pcr_full_skirt", module="temperature module gen2"),
+        Labware("reservoir", "usascientific_12_reservoir_22ml", kind="reservoir"),
+    ]
+    PHASES = [
+        Phase("add DNA", "p20_multi_gen2", 10, "samples", "cells"),
+        Phase("add SOC", "p300_multi_gen2", 125, "reservoir", "cells", reagent="SOC"),
+    ]
+    plan = plan_batch(51, LABWARE, PHASES)
+
+Plate roles get one column per sample column for every block of columns written to them (phases share
+a block unless they name their own). Reservoir roles get wells sized from the reagent volumes. Slots
+come from ot2_tools.layout, placed for the trips the phases make between tips, labware and the trash.
+Protocols that operators already set up by hand pin their layout with slots= (a slot, or a list with one
+per plate, for each role; a role on a module gives the module's slot) and tip_slots= (racks per
+pipette), so the deck does not change under them; pins beyond what a run needs are left empty.
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from math import ceil
+
+from . import deck, layout
+from .labware import get_definition
+from .simulation import load_protocol
+
+CHANNELS = 8
+DEFAULT_TIP_RACKS = {
+    "p20_multi_gen2": "opentrons_96_tiprack_20ul",
+    "p20_single_gen2": "opentrons_96_tiprack_20ul",
+    "p300_multi_gen2": "opentrons_96_tiprack_300ul",
+    "p300_single_gen2": "opentrons_96_tiprack_300ul",
+}
+DEFAULT_MOUNTS = {"p20_multi_gen2": "right", "p300_multi_gen2": "left"}
+
+
+@dataclass
+class Labware:
+    name: str
+    load_name: str
+    kind: str = "plate"
+    module: str = None
+    dead_volume: float = 1000
+
+
+@dataclass
+class Phase:
+    name: str
+    pipette: str
+    volume: float
+    source: str
+    dest: str
+    new_tip: str = "always"
+    reagent: str = None
+    source_block: str = None
+    dest_block: str = None
+
+
+@dataclass
+class RunPlan:
+    columns: list
+    labware: dict
+    tip_racks: dict
+    modules: dict
+    locations: dict
+    roles: dict = field(repr=False, default_factory=dict)
+
+    @property
+    def num_columns(self):
+        return len(self.columns)
+
+    @property
+    def slots_used(self):
+        slots = {slot for slots in self.labware.values() for slot in slots}
+        slots |= {slot for slots in self.tip_racks.values() for slot in slots}
+        for kind, slot in self.modules.values():
+            slots |= set(deck.THERMOCYCLER_SLOTS) if kind == "thermocycler" else {slot}
+        return slots
+
+    def layout(self):
+        """Where each role, module and tip rack goes on the deck, as one line for the operator."""
+        parts = []
+        for role, slots in self.labware.items():
+            module = self.roles[role].module
+            where = f"{module} in {self.modules[module][1]}" if module else ", ".join(slots)
+            parts.append(f"{role} on {where}")
+        parts += [f"{name} tips on {', '.join(slots)}" for name, slots in self.tip_racks.items()]
+        return "Deck layout: " + "; ".join(parts)
+
+    def load(self, protocol, mounts=None):
+        """Load this run's modules, labware and pipettes, after a comment giving the deck layout.
+
+        Returns (labware by role, pipettes by name, modules by name).
+        """
+        protocol.comment(self.layout())
+        mounts = {**DEFAULT_MOUNTS, **(mounts or {})}
+        modules = {name: protocol.load_module(name, slot) for name, (_, slot) in self.modules.items()}
+        labware = {}
+        for role, slots in self.labware.items():
+            spec = self.roles[role]
+            if spec.module:
+                labware[role] = [modules[spec.module].load_labware(spec.load_name)]
+            else:
+                labware[role] = [protocol.load_labware(spec.load_name, slot) for slot in slots]
+        pipettes = {}
+        for name, slots in self.tip_racks.items():
+            racks = [protocol.load_labware(DEFAULT_TIP_RACKS[name], slot) for slot in slots]
+            pipettes[name] = protocol.load_instrument(name, mounts[name], tip_racks=racks)
+        return labware, pipettes, modules
+
+    def wells(self, phase, labware):
+        """Source and destination wells, one per sample column, for a phase of this run."""
+        sources, dests = [], []
+        for (src_role, src_plate, src_well), (dst_role, dst_plate, dst_well) in self.locations[phase]:
+            sources.append(labware[src_role][src_plate][src_well])
+            dests.append(labware[dst_role][dst_plate][dst_well])
+        return sources, dests
+
+
+@dataclass
+class BatchPlan:
+    num_samples: int
+    runs: list
+
+    @property
+    def handoffs(self):
+        return len(self.runs) - 1
+
+    def summary(self):
+        lines = [f"{self.num_samples} samples in {len(self.runs)} run(s)"]
+        for i, run in enumerate(self.runs, 1):
+            labware = ", ".join(f"{role} x{len(slots)}" for role, slots in run.labware.items())
+            tips = ", ".join(f"{len(slots)} rack(s) for {name}" for name, slots in run.tip_racks.items())
+            lines.append(f"  run {i}: columns {run.columns[0] + 1}-{run.columns[-1] + 1}, {labware}; "
+                         f"{tips}; {len(run.slots_used)}/11 slots")
+        return "\n".join(lines)
+
+
+def _split(columns, runs):
+    #Contiguous, evenly sized batches of sample columns
+    size, extra = divmod(len(columns), runs)
+    batches, start = [], 0
+    for i in range(runs):
+        end = start + size + (1 if i < extra else 0)
+        batches.append(columns[start:end])
+        start = end
+    return batches
+
+
+def _well_names(load_name):
+    ordering = get_definition(load_name)["ordering"]
+    return [column[0] for column in ordering]
+
+
+def _plan_run(columns, roles, phases, modules, pins=None, tip_pins=None):
+    n = len(columns)
+
+    #Columns of each plate role, block by block, laid out across as many plates as needed
+    blocks = {}
+    for phase in phases:
+        for role, block in ((phase.source, phase.source_block), (phase.dest, phase.dest_block)):
+            if roles[role].kind == "plate":
+                blocks.setdefault(role, [])
+                if (block or role) not in blocks[role]:
+                    blocks[role].append(block or role)
+    plate_columns = {role: _well_names(roles[role].load_name) for role in blocks}
+    plate_counts = {role: ceil(len(names) * n / len(plate_columns[role])) for role, names in blocks.items()}
+    for role, count in plate_counts.items():
+        if roles[role].module and count > 1:
+            return None
+
+    def plate_location(role, block, i):
+        per_plate = len(plate_columns[role])
+        index = blocks[role].index(block or role) * n + i
+        return (role, index // per_plate, plate_columns[role][index % per_plate])
+
+    #Reservoir wells per reagent, filled from the left; waste goes in from the right. Each column's
+    #draw (or dump) comes from a single well, moving on to the next well once the current one is used up
+    draws, reservoir_counts = {}, {}
+    for role, spec in roles.items():
+        if spec.kind != "reservoir":
+            continue
+        definition = get_definition(spec.load_name)
+        names = [column[0] for column in definition["ordering"]]
+        usable = definition["wells"][names[0]]["totalLiquidVolume"] - spec.dead_volume
+        indices, remaining = {}, {}
+        for phase in phases:
+            if role not in (phase.source, phase.dest):
+                continue
+            key = phase.reagent or ("waste" if phase.dest == role else phase.name)
+            index, left = remaining.get(key, (0, usable))
+            for i in range(n):
+                if phase.volume * CHANNELS > left:
+                    index, left = index + 1, usable
+                left -= phase.volume * CHANNELS
+                indices[(phase.name, i)] = (key, index)
+            remaining[key] = (index, left)
+
+        first, last, wells = 0, len(names), {}
+        for key, (index, _) in remaining.items():
+            if key == "waste":
+                wells[key] = names[last - index - 1:last][::-1]
+                last -= index + 1
+            else:
+                wells[key] = names[first:first + index + 1]
+                first += index + 1
+        if first > last:
+            return None
+        for (phase_name, i), (key, index) in indices.items():
+            draws[(role, phase_name, i)] = (role, 0, wells[key][index])
+        reservoir_counts[role] = 1
+
+    locations = {}
+    for phase in phases:
+        pairs = []
+        for i in range(n):
+            ends = []
+            for role, block in ((phase.source, phase.source_block), (phase.dest, phase.dest_block)):
+                if roles[role].kind == "plate":
+                    ends.append(plate_location(role, block, i))
+                else:
+                    ends.append(draws[(role, phase.name, i)])
+            pairs.append(tuple(ends))
+        locations[phase.name] = pairs
+
+    #Tip racks: a column of tips per sample column, or one per phase when the tip is reused
+    tip_columns = {}
+    for phase in phases:
+        tip_columns[phase.pipette] = tip_columns.get(phase.pipette, 0) + (n if phase.new_tip == "always" else 1)
+    rack_counts = {name: ceil(count / 12) for name, count in tip_columns.items()}
+
+    #Slots: everything placed together by the layout solver, for the trips the phases make
+    taken = sum(len(deck.THERMOCYCLER_SLOTS) if deck.module_type(name) == "thermocycler" else 1 for name in modules)
+    needed = sum(count for role, count in {**plate_counts, **reservoir_counts}.items() if not roles[role].module)
+    if needed + sum(rack_counts.values()) > len(layout.SLOTS) - taken:
+        return None
+
+    def item(role, plate):
+        return roles[role].module if roles[role].module else f"{role} {plate}"
+
+    items = [layout.Item(name, module=name) for name in modules]
+    for role, count in {**plate_counts, **reservoir_counts}.items():
+        if not roles[role].module:
+            items += [layout.Item(f"{role} {plate}") for plate in range(count)]
+    racks = {name: [rack for rack, _ in layout.tip_rack_items(name, count)] for name, count in tip_columns.items()}
+    items += [rack for name in racks for rack in racks[name]]
+    #Pinned slots, for the plates and racks this run has
+    fixed = {}
+    for role, pinned in (pins or {}).items():
+        pinned = pinned if isinstance(pinned, (list, tuple)) else [pinned]
+        if roles[role].module:
+            if roles[role].module in modules:
+                fixed[roles[role].module] = pinned[0]
+        else:
+            count = plate_counts.get(role) or reservoir_counts.get(role, 0)
+            fixed.update({item(role, plate): slot for plate, slot in zip(range(count), pinned)})
+    for name, pinned in (tip_pins or {}).items():
+        fixed.update({rack.name: slot for rack, slot in zip(racks.get(name, []), pinned)})
+    flows, used = {}, {}
+    for phase in phases:
+        pairs = locations[phase.name]
+        for i, ((src_role, src_plate, _), (dst_role, dst_plate, _)) in enumerate(pairs):
+            trip = [item(src_role, src_plate), item(dst_role, dst_plate)]
+            if phase.new_tip == "always" or i == 0:
+                rack = racks[phase.pipette][used.get(phase.pipette, 0) // 12].name
+                used[phase.pipette] = used.get(phase.pipette, 0) + 1
+                trip = [rack] + trip
+            if phase.new_tip == "always" or i == n - 1:
+                trip = trip + [layout.TRASH]
+            layout.add_cycle(flows, trip)
+    slots = layout.solve(items, flows, fixed)
+
+    module_slots = {name: (deck.module_type(name), slots[name]) for name in modules}
+    labware = {}
+    for role in roles:
+        if role in plate_counts or role in reservoir_counts:
+            count = 1 if roles[role].module else plate_counts.get(role) or reservoir_counts[role]
+            labware[role] = [slots[item(role, plate)] for plate in range(count)]
+    tip_racks = {name: [slots[rack.name] for rack in racks[name]] for name in racks}
+
+    return RunPlan(columns, labware, tip_racks, module_slots, locations, roles)
+
+
+def plan_batch(num_samples, labware, phases, modules=None, max_runs=12, slots=None, tip_slots=None):
+    """Split num_samples into the fewest runs whose labware, tips and modules fit on the deck, with
+    the slots and tip_slots given pinned in every run."""
+    roles = {spec.name: spec for spec in labware}
+    for phase in phases:
+        for role in (phase.source, phase.dest):
+            if role not in roles:
+                raise ValueError(f"Phase {phase.name!r} uses unknown labware role {role!r}")
+    for role in slots or {}:
+        if role not in roles:
+            raise ValueError(f"Slot pinned for unknown labware role {role!r}")
+    if modules is None:
+        modules = sorted({spec.module for spec in labware if spec.module})
+
+    columns = list(range(ceil(num_samples / CHANNELS)))
+    for runs in range(1, max_runs + 1):
+        plans = [_plan_run(batch, roles, phases, modules, slots, tip_slots) for batch in _split(columns, runs)]
+        if all(plans):
+            return BatchPlan(num_samples, plans)
+    raise ValueError(f"{num_samples} samples do not fit on the deck in {max_runs} runs")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan runs, plates and tip racks for a sample count")
+    parser.add_argument("protocol", help="protocol file defining LABWARE and PHASES")
+    parser.add_argument("samples", type=int)
+    args = parser.parse_args(argv)
+
+    module = load_protocol(args.protocol)
+    print(plan_batch(args.samples, module.LABWARE, module.PHASES).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Run logs: where the time goes in a protocol run.
+
+A run log holds one span per command (start time, duration, the protocol step it belongs to and what
+kind of command it was) in columnar form, one array per field, and is written to a compact binary file.
+Logs come from two places:
+
+- a simulated protocol: from_trace() turns every simulated command into a span timed by the
+  TimingModel, with moves, mixes and air gaps told apart from the aspirates and dispenses around them;
+- a real run: recorded() wraps the ProtocolContext handed to run() (and the pipettes and modules it
+  loads) and times every API call on the robot's clock.
+
+    @recorded
+    def run(protocol):
+        ...
+
+A recorded run is written to RUN_LOG_DIR on the robot when run() returns (or fails), named after the
+protocol and the time it started; nothing is written when simulating. The report ranks hot spots by
+protocol step (source line and call) and by kind of command, counting each move towards the command it
+leads to, so the cost of tip changes includes the trips to the tip rack and the trash.
+
+Usage:
+    python -m ot2_tools.runlog Protocols/measure_OD_inoculate_and_induce.py
+    python -m ot2_tools.runlog /data/user_storage/run_logs/*.runlog --top 5
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import linecache
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .cache import cached_simulate
+from .estimate import format_duration
+from .timing import TimingModel
+
+RUN_LOG_DIR = "/data/user_storage/run_logs"
+MAGIC = b"OT2RUNLOG1\n"
+#Column name: array typecode
+COLUMNS = {"start": "d", "duration": "d", "step": "l", "kind": "H", "purpose": "H"}
+#Calls on the wrapped objects that hand back something else worth wrapping
+WRAPPED_RESULTS = ("load_instrument", "load_module")
+
+
+@dataclass
+class RunLog:
+    """Spans in columnar form. steps and names are string tables the step, kind and purpose columns index."""
+    protocol: str = ""
+    source: str = "simulated"
+    steps: list = field(default_factory=list)
+    names: list = field(default_factory=list)
+    columns: dict = field(default_factory=lambda: {name: array(code) for name, code in COLUMNS.items()})
+
+    def __post_init__(self):
+        self._step_index = {tuple(step): i for i, step in enumerate(self.steps)}
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.columns["start"])
+
+    def _intern(self, table, index, value):
+        if value not in index:
+            index[value] = len(table)
+            table.append(list(value) if isinstance(value, tuple) else value)
+        return index[value]
+
+    def add(self, start, duration, step, kind, purpose=None):
+        """Record a span. step is (line, source, call); purpose is the command a move leads to."""
+        step_id = -1 if step is None else self._intern(self.steps, self._step_index, tuple(step))
+        kind_id = self._intern(self.names, self._name_index, kind)
+        purpose_id = self._intern(self.names, self._name_index, purpose or kind)
+        for name, value in zip(COLUMNS, (start, duration, step_id, kind_id, purpose_id)):
+            self.columns[name].append(value)
+
+    @property
+    def total(self):
+        return sum(self.columns["duration"])
+
+    def save(self, path):
+        header = json.dumps({"protocol": self.protocol, "source": self.source, "rows": len(self),
+                             "byteorder": sys.byteorder, "columns": COLUMNS, "steps": self.steps,
+                             "names": self.names}).encode()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name in COLUMNS:
+                self.columns[name].tofile(f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a run log")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+            columns = {}
+            for name, code in header["columns"].items():
+                columns[name] = array(code)
+                columns[name].fromfile(f, header["rows"])
+                if header["byteorder"] != sys.byteorder:
+                    columns[name].byteswap()
+        return cls(header["protocol"], header["source"], header["steps"], header["names"], columns)
+
+    def hot_spots(self, by="step"):
+        """Seconds per step ((line, source, call)) or per purpose, slowest first, with span counts."""
+        if by == "step":
+            column, label = self.columns["step"], lambda key: tuple(self.steps[key]) if key >= 0 else None
+        else:
+            column, label = self.columns["purpose"], lambda key: self.names[key]
+        totals = {}
+        for key, duration in zip(column, self.columns["duration"]):
+            seconds, count = totals.get(key, (0.0, 0))
+            totals[key] = (seconds + duration, count + 1)
+        rows = [(label(key), seconds, count) for key, (seconds, count) in totals.items()]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def travel(self, purpose):
+        """Seconds of moves that lead to commands of this kind."""
+        move, wanted = self._name_index.get("move"), self._name_index.get(purpose)
+        return sum(duration for kind, aim, duration in
+                   zip(self.columns["kind"], self.columns["purpose"], self.columns["duration"])
+                   if kind == move and aim == wanted)
+
+
+def _command_kind(command):
+    if command.params.get("mix"):
+        return "mix"
+    if command.params.get("air"):
+        return "air_gap"
+    return command.kind
+
+
+def from_trace(trace, model=None):
+    """A run log of a simulated protocol, one span per command timed by the model."""
+    model = model or TimingModel()
+    log = RunLog(trace.metadata.get("protocolName", trace.path))
+    commands = [command for command in trace.commands if command.step is not None]
+    #Each move counts towards the next command that is not a move
+    purposes, purpose = [], None
+    for command in reversed(commands):
+        if command.kind != "move":
+            purpose = _command_kind(command)
+        purposes.append(purpose)
+    clock = 0.0
+    for command, purpose in zip(commands, reversed(purposes)):
+        step = trace.steps[command.step]
+        duration = model.duration(command)
+        log.add(clock, duration, (step.line, step.source, step.name), _command_kind(command), purpose)
+        clock += duration
+    return log
+
+
+class _Recorder:
+    """Stands in for a ProtocolContext, pipette or module, timing every public method call into a RunLog."""
+
+    def __init__(self, target, log, clock, protocol_file):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_log", log)
+        object.__setattr__(self, "_clock", clock)
+        object.__setattr__(self, "_protocol_file", protocol_file)
+
+    def __repr__(self):
+        return repr(self._target)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            start = self._clock()
+            try:
+                result = attribute(*args, **kwargs)
+            finally:
+                self._log.add(start, self._clock() - start, self._step(name), name)
+            if name in WRAPPED_RESULTS:
+                return _Recorder(result, self._log, self._clock, self._protocol_file)
+            return result
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def _step(self, name):
+        #The protocol line that made the call (the nearest frame outside this module if it is not found)
+        frame, fallback = inspect.currentframe().f_back.f_back, None
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename == self._protocol_file:
+                break
+            if fallback is None and filename != __file__:
+                fallback = frame
+            frame = frame.f_back
+        frame = frame or fallback
+        if frame is None:
+            return None
+        line = frame.f_lineno
+        source = linecache.getline(frame.f_code.co_filename, line).strip()
+        return line, source, name
+
+
+def _clock(protocol):
+    #Simulated robot time when simulating, the robot's own clock otherwise
+    if getattr(protocol, "is_simulating", lambda: False)() and hasattr(protocol, "clock"):
+        return protocol.clock
+    return time.monotonic
+
+
+def recorded(run=None, directory=RUN_LOG_DIR):
+    """Decorate a protocol's run() so every API call it makes is timed and saved as a run log.
+
+    Use as @recorded, or @recorded(directory=...) to save logs somewhere else.
+    """
+    if run is None:
+        return functools.partial(recorded, directory=directory)
+    protocol_file = inspect.getsourcefile(run)
+
+    @functools.wraps(run)
+    def wrapper(protocol):
+        name = run.__globals__.get("metadata", {}).get("protocolName", Path(protocol_file).stem)
+        log = RunLog(name, "recorded")
+        clock = _clock(protocol)
+        epoch, started = clock(), time.time()
+        try:
+            return run(_Recorder(protocol, log, lambda: clock() - epoch, protocol_file))
+        finally:
+            if not getattr(protocol, "is_simulating", lambda: False)():
+                stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started))
+                log.save(Path(directory) / f"{Path(protocol_file).stem}-{stamp}.runlog")
+    return wrapper
+
+
+def report(log, top=10):
+    total = log.total
+    lines = [f"{log.protocol} ({log.source}, {len(log)} spans, {format_duration(total)})", "  hot spots by step"]
+    for step, seconds, count in log.hot_spots("step")[:top]:
+        line, source, call = step or (0, "", "?")
+        share = seconds / total if total else 0.0
+        lines.append(f"  {format_duration(seconds):>9} {share:6.1%}  x{count:<4} line {line:<4} {call:<14} {source}")
+    lines.append("  by command (moves count towards the command they lead to)")
+    for purpose, seconds, _ in log.hot_spots("purpose")[:top]:
+        travel = log.travel(purpose)
+        share = seconds / total if total else 0.0
+        moving = f"  of which travel {format_duration(travel)}" if travel else ""
+        lines.append(f"  {format_duration(seconds):>9} {share:6.1%}  {purpose}{moving}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the hot spots in simulated or recorded protocol runs")
+    parser.add_argument("paths", nargs="+", help="protocol files to simulate, or .runlog files from the robot")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--save", help="directory to write the simulated runs' logs to")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        if Path(path).suffix == ".runlog":
+            log = RunLog.load(path)
+        else:
+            log = from_trace(cached_simulate(path))
+            if args.save:
+                log.save(Path(args.save) / f"{Path(path).stem}.runlog")
+        print(report(log, args.top))
+        print()
+
+
+if __name__ == "__main__":
+    main()
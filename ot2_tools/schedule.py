@@ -0,0 +1,205 @@
+"""Step-graph scheduler for module holds.
+
+The OT-2 runs a protocol one step at a time, so a 60 minute protocol.delay() or a temperature ramp leaves
+the pipettes idle even when later steps have nothing to do with the labware being held. This module
+builds a dependency graph of a simulated protocol's steps and back-fills independent liquid handling
+into those idle windows without moving any step that was already scheduled, so every delay still
+separates the steps it separated before.
+
+Dependencies come from the wells each step touches (aspirating reads a well, dispensing and mixing write
+it), from module state (a module command changes every well on the module's labware) and from operator
+pauses, which nothing crosses. A delay protects whatever the step before it touched.
+
+In a protocol, wrap the work that should happen during a hold in hold():
+
+    temperature_module.set_temperature(celsius=37)
+    with hold(protocol, minutes=60):
+        p300.distribute(95, reservoir["A1"], dilution_wells)
+
+Usage:
+    python -m ot2_tools.schedule Protocols/transformation_troubleshooting.py
+"""
+
+import argparse
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from .estimate import format_duration
+from .cache import cached_simulate
+from .timing import TimingModel
+
+PIPETTE_KINDS = ("move", "pick_up_tip", "drop_tip", "aspirate", "dispense", "blow_out", "touch_tip", "home")
+
+
+@dataclass
+class Node:
+    step: object
+    duration: float
+    resources: set = field(default_factory=set)
+    reads: set = field(default_factory=set)
+    writes: set = field(default_factory=set)
+    mounts: set = field(default_factory=set)
+    kind: str = "work"
+    start: float = 0.0
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+
+def build_graph(trace, model=None):
+    """One node per step, the nodes each node has to wait for, and the tip sessions.
+
+    A tip session is a run of steps that share a tip picked up by a bare pick_up_tip() call; its steps
+    keep their order, and no other step on that pipette may run in the middle of it.
+    """
+    model = model or TimingModel()
+    module_slots = {labware["slot"] for labware in trace.labware if labware["module"]}
+    nodes = [Node(step, 0.0) for step in trace.steps]
+
+    for command in trace.commands:
+        if command.step is None:
+            continue
+        node = nodes[command.step]
+        node.duration += model.duration(command)
+        if command.kind == "delay":
+            node.kind = "delay"
+        elif command.kind == "pause":
+            node.kind = "pause"
+        elif command.kind in PIPETTE_KINDS:
+            node.resources.add("gantry")
+            node.mounts.add(command.mount)
+            wells = trace.channel_wells(command)
+            if command.kind == "aspirate" and not command.params.get("mix"):
+                node.reads.update(wells)
+            elif command.kind in ("dispense", "aspirate"):
+                node.writes.update(wells)
+            if command.slot in module_slots:
+                node.reads.add(f"module:{command.slot}")
+        elif command.slot is not None:
+            node.resources.add(f"module:{command.slot}")
+            node.writes.add(f"module:{command.slot}")
+
+    deps = {i: set() for i in range(len(nodes))}
+    sessions, open_sessions = [], {}
+    last_pause, previous = None, None
+    for i, node in enumerate(nodes):
+        for mount in node.mounts:
+            if mount in open_sessions:
+                session = open_sessions[mount]
+                deps[i].add(session[-1])
+                session.append(i)
+                if node.step.name in ("drop_tip", "return_tip"):
+                    del open_sessions[mount]
+            elif node.step.name == "pick_up_tip":
+                #Sessions are never moved ahead of earlier work on their pipette
+                deps[i].update(j for j in range(i) if mount in nodes[j].mounts)
+                open_sessions[mount] = [i]
+                sessions.append((mount, open_sessions[mount]))
+            else:
+                node.resources.add(f"tip:{mount}")
+        if node.kind == "delay":
+            #A delay while a tip is on (e.g. letting a viscous liquid settle in the tip) belongs to that session
+            for session in open_sessions.values():
+                deps[i].add(session[-1])
+                session.append(i)
+
+        if node.kind == "delay" and previous is not None:
+            #A delay holds whatever the step before it touched
+            node.writes = nodes[previous].reads | nodes[previous].writes
+            deps[i].add(previous)
+        if node.kind == "pause":
+            deps[i].update(range(i))
+            last_pause = i
+            continue
+        if last_pause is not None:
+            deps[i].add(last_pause)
+        for j in range(last_pause or 0, i):
+            other = nodes[j]
+            if other.writes & (node.reads | node.writes) or other.reads & node.writes:
+                deps[i].add(j)
+        if node.duration > 0 or node.kind != "work":
+            previous = i
+    return nodes, deps, sessions
+
+
+def schedule(trace, model=None):
+    """Place every step as early as its dependencies and resources allow, in protocol order.
+
+    Steps are placed in their original order and a later step only ever fills a gap that is long
+    enough for it, so no step starts later than it would have without the scheduler.
+    """
+    nodes, deps, sessions = build_graph(trace, model)
+    session_ends = {session[-1]: (mount, session) for mount, session in sessions}
+    busy = {}
+    for i, node in enumerate(nodes):
+        earliest = max((nodes[j].end for j in deps[i]), default=0.0)
+        if node.kind == "pause":
+            earliest = max([earliest] + [n.end for n in nodes[:i]])
+        start = earliest
+        intervals = sorted(interval for resource in node.resources for interval in busy.get(resource, []))
+        for begin, end in intervals:
+            if start + node.duration <= begin:
+                break
+            start = max(start, end)
+        node.start = start
+        for resource in node.resources:
+            busy.setdefault(resource, []).append((node.start, node.end))
+        if i in session_ends:
+            mount, session = session_ends[i]
+            busy.setdefault(f"tip:{mount}", []).append((nodes[session[0]].start, node.end))
+    return nodes
+
+
+def report(trace, nodes):
+    serial = sum(node.duration for node in nodes)
+    makespan = max((node.end for node in nodes), default=0.0)
+    lines = [trace.metadata.get("protocolName", trace.path),
+             f"  serial {format_duration(serial)}, scheduled {format_duration(makespan)}, "
+             f"saves {format_duration(serial - makespan)}"]
+
+    #Steps that now start before a step that came earlier in the protocol
+    for i, node in enumerate(nodes):
+        overtaken = [other for other in nodes[:i] if other.start <= node.start < other.end - 1e-6]
+        if node.duration and node.kind == "work" and overtaken:
+            hold = max(overtaken, key=lambda other: other.duration)
+            lines.append(f"  line {node.step.line:<4} {node.step.source}")
+            lines.append(f"       runs during line {hold.step.line}: {hold.step.source}")
+    return "\n".join(lines)
+
+
+def _now(protocol):
+    clock = getattr(protocol, "clock", None)
+    return clock() if clock else time.monotonic()
+
+
+@contextmanager
+def hold(protocol, seconds=0, minutes=0, msg=None):
+    """Run the enclosed steps during a timed hold, then wait out whatever is left of it.
+
+    If the enclosed steps take longer than the hold, a comment records by how much it overran.
+    """
+    total = seconds + minutes * 60
+    start = _now(protocol)
+    yield
+    remaining = total - (_now(protocol) - start)
+    if remaining > 0:
+        protocol.delay(seconds=remaining, msg=msg)
+    elif remaining < 0:
+        protocol.comment(f"Hold overran by {-remaining:.0f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find liquid handling that can run during module holds")
+    parser.add_argument("protocols", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        trace = cached_simulate(path)
+        print(report(trace, schedule(trace)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
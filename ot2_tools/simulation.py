@@ -0,0 +1,1038 @@
+"""A stand-in ProtocolContext that records what a protocol would do without a robot.
+
+simulate() loads a protocol file, calls its run() function with a SimulatedProtocol and returns a Trace:
+the list of steps (one per API call made by the protocol) and the expanded command stream
+(moves, tip pick-ups, aspirates, dispenses, module commands) that each step turns into.
+"""
+
+import functools
+import importlib.util
+import inspect
+import linecache
+import sys
+import types
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from math import ceil, dist
+from pathlib import Path
+from typing import NamedTuple
+
+from . import deck
+from .labware import get_definition
+from .timing import TimingModel
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+REPO_ROOT = PACKAGE_DIR.parent
+
+#channels, max volume, min volume, default aspirate/dispense/blow out flow rates (µl/s)
+PIPETTE_SPECS = {
+    "p20_single_gen2": (1, 20, 1, 7.56, 7.56, 7.56),
+    "p20_multi_gen2": (8, 20, 1, 7.6, 7.6, 7.6),
+    "p300_single_gen2": (1, 300, 20, 92.86, 92.86, 92.86),
+    "p300_multi_gen2": (8, 300, 20, 94, 94, 94),
+    "p1000_single_gen2": (1, 1000, 100, 274.7, 274.7, 274.7),
+    "p10_single": (1, 10, 1, 5, 10, 10),
+    "p10_multi": (8, 10, 1, 5, 10, 10),
+    "p50_single": (1, 50, 5, 25, 50, 50),
+    "p50_multi": (8, 50, 5, 25, 50, 50),
+    "p300_single": (1, 300, 30, 150, 300, 300),
+    "p300_multi": (8, 300, 30, 150, 300, 300),
+    "p1000_single": (1, 1000, 100, 500, 1000, 1000),
+}
+
+DEFAULT_SPEEDS = {"X": 600, "Y": 400, "Z": 125, "A": 125}
+AMBIENT_TEMPERATURE = 25.0
+
+
+class SimulationError(Exception):
+    pass
+
+
+class OutOfTipsError(SimulationError):
+    pass
+
+
+class Point(NamedTuple):
+    x: float
+    y: float
+    z: float
+
+    def __add__(self, other):
+        return Point(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    def __sub__(self, other):
+        return Point(self.x - other[0], self.y - other[1], self.z - other[2])
+
+
+class Location:
+    """A point on the deck, optionally tied to the well or labware it is in."""
+
+    def __init__(self, point, labware):
+        self.point = Point(*point)
+        self.labware = labware
+
+    def move(self, point):
+        return Location(self.point + point, self.labware)
+
+    def __repr__(self):
+        return f"Location(point={self.point}, labware={self.labware})"
+
+
+@dataclass
+class Step:
+    index: int
+    name: str
+    target: str
+    line: int
+    source: str
+    args: dict = field(default_factory=dict)
+
+
+@dataclass
+class Command:
+    kind: str
+    step: int
+    mount: str = None
+    slot: str = None
+    labware: str = None
+    well: str = None
+    point: tuple = None
+    volume: float = 0.0
+    params: dict = field(default_factory=dict)
+
+    @property
+    def well_ref(self):
+        if self.well is None:
+            return None
+        return f"{self.slot}:{self.well}"
+
+
+@dataclass
+class Trace:
+    path: str
+    metadata: dict
+    labware: list
+    pipettes: dict
+    modules: dict
+    steps: list
+    commands: list
+
+    def commands_for(self, step):
+        return [command for command in self.commands if command.step == step]
+
+    @cached_property
+    def _orderings(self):
+        return {labware["slot"]: labware["ordering"] for labware in self.labware}
+
+    def channel_wells(self, command):
+        """Refs of every well a command reaches, counting each channel of a multi-channel pipette."""
+        if command.well is None:
+            return []
+        for column in self._orderings.get(command.slot, []):
+            if command.well in column:
+                start = column.index(command.well)
+                names = column[start:start + command.params.get("channels", 1)]
+                return [f"{command.slot}:{name}" for name in names]
+        return [command.well_ref]
+
+
+def _ref(value):
+    #Compact, printable form of a step argument
+    if isinstance(value, SimulatedWell):
+        return value.ref
+    if isinstance(value, Location):
+        if isinstance(value.labware, SimulatedWell):
+            well = value.labware
+            return f"{well.ref}@{round(value.point.z - well.bottom_z, 2)}"
+        return str(tuple(round(v, 2) for v in value.point))
+    if isinstance(value, (list, tuple)):
+        return [_ref(v) for v in value]
+    if isinstance(value, (SimulatedLabware, SimulatedPipette, SimulatedModule)):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: _ref(v) for k, v in value.items()}
+    return value
+
+
+def _step(method):
+    #Record each public API call as a step, unless it is being called from inside another step
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        arguments = {k: _ref(v) for k, v in list(bound.arguments.items())[1:]}
+        with self._context._open_step(method.__name__, str(self), arguments):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SimulatedWell:
+    def __init__(self, labware, name, geometry):
+        self.parent = labware
+        self.well_name = name
+        self.geometry = geometry
+        self.depth = geometry["depth"]
+        self.max_volume = geometry["totalLiquidVolume"]
+        self.diameter = geometry.get("diameter")
+        #Rectangular wells: x and y size
+        self.length = geometry.get("xDimension")
+        self.width = geometry.get("yDimension")
+        origin = labware.origin
+        self.bottom_z = origin.z + geometry["z"]
+        self._center_xy = (origin.x + geometry["x"], origin.y + geometry["y"])
+
+    @property
+    def ref(self):
+        return f"{self.parent.slot}:{self.well_name}"
+
+    @property
+    def display_name(self):
+        return f"{self.well_name} of {self.parent}"
+
+    def top(self, z=0.0):
+        return Location(Point(*self._center_xy, self.bottom_z + self.depth + z), self)
+
+    def bottom(self, z=0.0):
+        return Location(Point(*self._center_xy, self.bottom_z + z), self)
+
+    def center(self):
+        return Location(Point(*self._center_xy, self.bottom_z + self.depth / 2), self)
+
+    def _from_center_cartesian(self, x, y, z):
+        #x, y and z are fractions of the half-width, half-length and half-depth of the well
+        if self.diameter is not None:
+            half_x = half_y = self.diameter / 2
+        else:
+            half_x = self.geometry["xDimension"] / 2
+            half_y = self.geometry["yDimension"] / 2
+        center = self.center().point
+        return center + (x * half_x, y * half_y, z * self.depth / 2)
+
+    def __repr__(self):
+        return self.display_name
+
+
+class SimulatedTrash:
+    """The fixed trash, as pipette.trash_container; its one well is itself."""
+
+    well_name = "A1"
+
+    def wells(self):
+        return [self]
+
+    def top(self, z=0.0):
+        return Location(Point(*deck.TRASH_POINT) + (0.0, 0.0, z), None)
+
+    def __repr__(self):
+        return f"Trash in slot {deck.TRASH_SLOT}"
+
+
+class SimulatedLabware:
+    def __init__(self, definition, slot, label=None, offset=(0.0, 0.0, 0.0)):
+        self.definition = definition
+        self.slot = slot
+        self.load_name = definition["parameters"]["loadName"]
+        self.name = label or self.load_name
+        self.is_tiprack = definition["parameters"].get("isTiprack", False)
+        corner = definition.get("cornerOffsetFromSlot", {"x": 0, "y": 0, "z": 0})
+        self.origin = Point(*deck.SLOT_ORIGINS[slot]) + offset + (corner["x"], corner["y"], corner["z"])
+        self.highest_z = self.origin.z + definition["dimensions"]["zDimension"]
+        self._ordering = definition["ordering"]
+        self._wells = {name: SimulatedWell(self, name, definition["wells"][name])
+                       for column in self._ordering for name in column}
+        self._used_tips = set()
+
+    @property
+    def parent(self):
+        return self.slot
+
+    def __getitem__(self, name):
+        return self._wells[name]
+
+    def __repr__(self):
+        return f"{self.name} on {self.slot}"
+
+    def well(self, index):
+        if isinstance(index, str):
+            return self._wells[index]
+        return self.wells()[index]
+
+    def wells(self):
+        return [self._wells[name] for column in self._ordering for name in column]
+
+    def wells_by_name(self):
+        return dict(self._wells)
+
+    def columns(self):
+        return [[self._wells[name] for name in column] for column in self._ordering]
+
+    def rows(self):
+        return [list(row) for row in zip(*self.columns())]
+
+    def next_tips(self, channels):
+        #First column (multi-channel) or well (single-channel) that still holds a full set of tips
+        for column in self.columns():
+            unused = [well for well in column if well.well_name not in self._used_tips]
+            if channels == 1 and unused:
+                return [unused[0]]
+            if len(unused) == len(column):
+                return column[:channels]
+        return None
+
+    def use_tips(self, wells):
+        self._used_tips.update(well.well_name for well in wells)
+
+
+class FlowRates:
+    def __init__(self, aspirate, dispense, blow_out):
+        self.aspirate = aspirate
+        self.dispense = dispense
+        self.blow_out = blow_out
+
+
+class Clearances:
+    def __init__(self):
+        self.aspirate = 1.0
+        self.dispense = 1.0
+
+
+class SimulatedPipette:
+    def __init__(self, context, name, mount, tip_racks):
+        if name not in PIPETTE_SPECS:
+            raise ValueError(f"Unknown pipette {name!r}")
+        self._context = context
+        self.name = name
+        self.mount = mount
+        self.tip_racks = list(tip_racks or [])
+        self.channels, self.max_volume, self.min_volume, aspirate, dispense, blow_out = PIPETTE_SPECS[name]
+        self.flow_rate = FlowRates(aspirate, dispense, blow_out)
+        self.well_bottom_clearance = Clearances()
+        self.default_speed = 400.0
+        self.starting_tip = None
+        self.current_volume = 0.0
+        self._tip = None
+        self._last_location = None
+
+    def __repr__(self):
+        return f"{self.name} on {self.mount} mount"
+
+    @property
+    def has_tip(self):
+        return self._tip is not None
+
+    @property
+    def hw_pipette(self):
+        return {"channels": self.channels, "max_volume": self.max_volume}
+
+    @property
+    def trash_container(self):
+        return SimulatedTrash()
+
+    #Helpers shared by the liquid handling commands
+
+    def _record(self, kind, location=None, volume=0.0, **params):
+        well = location.labware if location is not None and isinstance(location.labware, SimulatedWell) else None
+        command = Command(kind, self._context._current_step, mount=self.mount, volume=volume, params=params)
+        if location is not None:
+            command.point = tuple(location.point)
+        if well is not None:
+            command.slot = well.parent.slot
+            command.labware = well.parent.load_name
+            command.well = well.well_name
+            command.params["height"] = round(location.point.z - well.bottom_z, 2)
+            command.params["depth"] = well.depth
+            command.params["channels"] = self.channels
+        self._context._append(command)
+        return command
+
+    def _location(self, target, clearance):
+        if target is None:
+            if self._last_location is None:
+                raise SimulationError(f"{self} has no current location")
+            return self._last_location
+        if isinstance(target, SimulatedWell):
+            return target.bottom(clearance)
+        if isinstance(target, SimulatedLabware):
+            return target.wells()[0].top()
+        return target
+
+    def _require_tip(self, action):
+        if not self.has_tip:
+            raise SimulationError(f"Cannot {action} without a tip attached to {self}")
+
+    def _move(self, location, **params):
+        self._context._move_head(self, location, **params)
+        self._last_location = location
+
+    #Building block commands
+
+    @_step
+    def move_to(self, location, force_direct=False, minimum_z_height=None, speed=None):
+        self._move(location, force_direct=force_direct, minimum_z_height=minimum_z_height, speed=speed)
+        return self
+
+    @_step
+    def home(self):
+        self._context._head = Point(*deck.HOME_POINT)
+        self._last_location = None
+        self._record("home")
+        return self
+
+    @_step
+    def pick_up_tip(self, location=None):
+        if self.has_tip:
+            raise SimulationError(f"Cannot pick up a tip: {self} already has one attached")
+        if location is None:
+            for rack in self.tip_racks:
+                tips = rack.next_tips(self.channels)
+                if tips:
+                    break
+            else:
+                raise OutOfTipsError(f"{self} has run out of tips")
+        else:
+            well = _well_of(location)
+            rack = well.parent
+            column = next(column for column in rack.columns() if well in column)
+            start = column.index(well)
+            tips = column[start:start + self.channels]
+        rack.use_tips(tips)
+        self._tip = tips[0]
+        self._move(tips[0].top())
+        self._record("pick_up_tip", tips[0].top(), tips=len(tips))
+        return self
+
+    @_step
+    def drop_tip(self, location=None):
+        self._require_tip("drop a tip")
+        if location is None:
+            location = Location(deck.TRASH_POINT, None)
+        self._move(location)
+        self._record("drop_tip", location)
+        self._tip = None
+        self.current_volume = 0.0
+        return self
+
+    @_step
+    def return_tip(self):
+        self._require_tip("return a tip")
+        location = self._tip.top()
+        self._move(location)
+        self._record("drop_tip", location, returned=True)
+        self._tip.parent._used_tips.discard(self._tip.well_name)
+        self._tip = None
+        self.current_volume = 0.0
+        return self
+
+    @_step
+    def aspirate(self, volume=None, location=None, rate=1.0):
+        self._require_tip("aspirate")
+        available = self.max_volume - self.current_volume
+        if volume is None or volume == 0:
+            volume = available
+        if volume > available + 1e-9:
+            raise SimulationError(f"Cannot aspirate {volume} µl: {self} only has room for {available} µl")
+        location = self._location(location, self.well_bottom_clearance.aspirate)
+        self._move(location)
+        self._record("aspirate", location, volume, flow_rate=self.flow_rate.aspirate * rate)
+        self.current_volume += volume
+        return self
+
+    @_step
+    def dispense(self, volume=None, location=None, rate=1.0):
+        self._require_tip("dispense")
+        if volume is None or volume == 0 or volume > self.current_volume:
+            volume = self.current_volume
+        location = self._location(location, self.well_bottom_clearance.dispense)
+        self._move(location)
+        self._record("dispense", location, volume, flow_rate=self.flow_rate.dispense * rate)
+        self.current_volume -= volume
+        return self
+
+    @_step
+    def mix(self, repetitions=1, volume=None, location=None, rate=1.0):
+        self._require_tip("mix")
+        volume = volume or self.max_volume
+        location = self._location(location, self.well_bottom_clearance.aspirate)
+        self._move(location)
+        for _ in range(repetitions):
+            self._record("aspirate", location, volume, flow_rate=self.flow_rate.aspirate * rate, mix=True)
+            self._record("dispense", location, volume, flow_rate=self.flow_rate.dispense * rate, mix=True)
+        return self
+
+    @_step
+    def blow_out(self, location=None):
+        self._require_tip("blow out")
+        if location is None:
+            location = self._last_location or Location(deck.TRASH_POINT, None)
+        elif isinstance(location, (SimulatedWell, SimulatedTrash)):
+            location = location.top()
+        self._move(location)
+        self._record("blow_out", location, flow_rate=self.flow_rate.blow_out)
+        self.current_volume = 0.0
+        return self
+
+    @_step
+    def touch_tip(self, location=None, radius=1.0, v_offset=-1.0, speed=60.0):
+        self._require_tip("touch tip")
+        well = location if isinstance(location, SimulatedWell) else (location or self._last_location).labware
+        if not isinstance(well, SimulatedWell):
+            raise SimulationError("touch_tip needs a well")
+        location = well.top(v_offset)
+        self._move(location)
+        radius_mm = radius * (well.diameter or well.geometry.get("xDimension", 0)) / 2
+        self._record("touch_tip", location, radius=radius_mm, speed=speed)
+        return self
+
+    @_step
+    def air_gap(self, volume=None, height=None):
+        self._require_tip("air gap")
+        if self._last_location is None or not isinstance(self._last_location.labware, SimulatedWell):
+            raise SimulationError("air_gap needs the pipette to be in a well")
+        location = self._last_location.labware.top(5 if height is None else height)
+        volume = volume or 0
+        self._move(location)
+        self._record("aspirate", location, volume, flow_rate=self.flow_rate.aspirate, air=True)
+        self.current_volume += volume
+        return self
+
+    #Complex liquid handling
+
+    @_step
+    def transfer(self, volume, source, dest, **kwargs):
+        sources, dests = _as_list(source), _as_list(dest)
+        if len(sources) == 1 and len(dests) > 1:
+            sources = sources * len(dests)
+        elif len(dests) == 1 and len(sources) > 1:
+            dests = dests * len(sources)
+        if len(sources) != len(dests):
+            raise SimulationError("Source and destination lists must be the same length")
+        volumes = _as_volumes(volume, len(sources))
+        self._run_transfer(list(zip(sources, dests, volumes)), kwargs)
+        return self
+
+    @_step
+    def distribute(self, volume, source, dest, **kwargs):
+        dests = _as_list(dest)
+        volumes = _as_volumes(volume, len(dests))
+        kwargs.setdefault("disposal_volume", self.min_volume)
+        kwargs.pop("mix_after", None)
+        air_gap = kwargs.get("air_gap", 0)
+        disposal = kwargs["disposal_volume"]
+        if max(volumes) + disposal + air_gap > self.max_volume:
+            self._run_transfer([(source, d, v) for d, v in zip(dests, volumes)], kwargs)
+            return self
+
+        #Pack as many dispenses as fit into each aspiration
+        groups, group, total = [], [], disposal
+        for d, v in zip(dests, volumes):
+            if group and total + v + air_gap > self.max_volume:
+                groups.append(group)
+                group, total = [], disposal
+            group.append((d, v))
+            total += v + air_gap
+        groups.append(group)
+        self._run_groups(source, groups, kwargs, distribute=True)
+        return self
+
+    @_step
+    def consolidate(self, volume, source, dest, **kwargs):
+        sources = _as_list(source)
+        volumes = _as_volumes(volume, len(sources))
+        air_gap = kwargs.get("air_gap", 0)
+        if max(volumes) + air_gap > self.max_volume:
+            self._run_transfer([(s, dest, v) for s, v in zip(sources, volumes)], kwargs)
+            return self
+
+        groups, group, total = [], [], 0
+        for s, v in zip(sources, volumes):
+            if group and total + v + air_gap > self.max_volume:
+                groups.append(group)
+                group, total = [], 0
+            group.append((s, v))
+            total += v + air_gap
+        groups.append(group)
+        self._run_groups(dest, groups, kwargs, distribute=False)
+        return self
+
+    def _start_transfer(self, kwargs):
+        new_tip = kwargs.get("new_tip", "once")
+        if new_tip not in ("once", "always", "never"):
+            raise SimulationError(f"Invalid new_tip value {new_tip!r}")
+        if new_tip == "never":
+            self._require_tip("transfer with new_tip='never'")
+        elif new_tip == "once":
+            self.pick_up_tip()
+        return new_tip
+
+    def _finish_tip(self, kwargs):
+        if kwargs.get("trash", True):
+            self.drop_tip()
+        else:
+            self.return_tip()
+
+    def _run_transfer(self, moves, kwargs):
+        new_tip = self._start_transfer(kwargs)
+        air_gap = kwargs.get("air_gap", 0)
+        capacity = self.max_volume - air_gap
+        for source, dest, volume in moves:
+            if volume <= 0:
+                continue
+            chunks = ceil(volume / capacity - 1e-9)
+            for _ in range(chunks):
+                if new_tip == "always":
+                    self.pick_up_tip()
+                self._aspirate_from(source, volume / chunks, kwargs)
+                self._dispense_to(dest, volume / chunks, source, kwargs, mix=True)
+                if new_tip == "always":
+                    self._finish_tip(kwargs)
+        if new_tip == "once":
+            self._finish_tip(kwargs)
+
+    def _run_groups(self, fixed, groups, kwargs, distribute):
+        #distribute: one aspiration from `fixed` per group of dispenses; consolidate: the reverse
+        new_tip = self._start_transfer(kwargs)
+        disposal = kwargs.get("disposal_volume", 0) if distribute else 0
+        for group in groups:
+            if new_tip == "always":
+                self.pick_up_tip()
+            if distribute:
+                total = sum(v for _, v in group) + disposal
+                self._aspirate_from(fixed, total, kwargs)
+                for dest, volume in group:
+                    self._dispense_to(dest, volume, fixed, kwargs, mix=False)
+                if disposal:
+                    self._blow_out_at(kwargs, fixed, None)
+            else:
+                for source, volume in group:
+                    self._aspirate_from(source, volume, kwargs)
+                self._dispense_to(fixed, sum(v for _, v in group), None, kwargs, mix=True)
+            if new_tip == "always":
+                self._finish_tip(kwargs)
+        if new_tip == "once":
+            self._finish_tip(kwargs)
+
+    def _aspirate_from(self, source, volume, kwargs):
+        location = self._location(source, self.well_bottom_clearance.aspirate)
+        if kwargs.get("mix_before"):
+            repetitions, mix_volume = kwargs["mix_before"]
+            self.mix(repetitions, mix_volume, location)
+        self.aspirate(volume, location)
+        if kwargs.get("touch_tip"):
+            self.touch_tip()
+        if kwargs.get("air_gap"):
+            self.air_gap(kwargs["air_gap"])
+
+    def _dispense_to(self, dest, volume, source, kwargs, mix):
+        location = self._location(dest, self.well_bottom_clearance.dispense)
+        self.dispense(volume + kwargs.get("air_gap", 0), location)
+        if mix and kwargs.get("mix_after"):
+            repetitions, mix_volume = kwargs["mix_after"]
+            self.mix(repetitions, mix_volume, location)
+        if kwargs.get("blow_out") and mix:
+            self._blow_out_at(kwargs, source, dest)
+        if kwargs.get("touch_tip"):
+            self.touch_tip()
+
+    def _blow_out_at(self, kwargs, source, dest):
+        where = kwargs.get("blowout_location", "trash")
+        if where == "source well" and source is not None:
+            self.blow_out(_well_of(source))
+        elif where == "destination well" and dest is not None:
+            self.blow_out(_well_of(dest))
+        else:
+            self.blow_out(Location(deck.TRASH_POINT, None))
+
+
+def _as_list(value):
+    if isinstance(value, (list, tuple)):
+        return [item for v in value for item in _as_list(v)]
+    return [value]
+
+
+def _as_volumes(volume, count):
+    if isinstance(volume, (list, tuple)):
+        if len(volume) != count:
+            raise SimulationError("The volume list must match the number of transfers")
+        return list(volume)
+    return [volume] * count
+
+
+def _well_of(target):
+    if isinstance(target, SimulatedWell):
+        return target
+    return target.labware
+
+
+class SimulatedModule:
+    def __init__(self, context, load_name, module_type, slot):
+        self._context = context
+        self.load_name = load_name
+        self.type = module_type
+        self.slot = slot
+        self.labware = None
+
+    def __repr__(self):
+        return f"{self.load_name} on {self.slot}"
+
+    def _record(self, kind, **params):
+        self._context._append(Command(kind, self._context._current_step, slot=self.slot, params=params))
+
+    @_step
+    def load_labware(self, name, label=None):
+        offset = deck.MODULE_LABWARE_OFFSETS[self.type]
+        self.labware = self._context._add_labware(get_definition(name), self.slot, label, offset, module=self)
+        return self.labware
+
+
+class SimulatedTemperatureModule(SimulatedModule):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._temperature = AMBIENT_TEMPERATURE
+        self.target = None
+        #(start °C, target °C, clock) of a ramp started by start_set_temperature() and not yet awaited
+        self._ramp = None
+
+    def _ramp_left(self):
+        #Seconds the running ramp takes in all, and how many of them are still to go
+        if self._ramp is None:
+            return 0.0, 0.0
+        start, target, started = self._ramp
+        model = TimingModel()
+        seconds = model.ramp(start, target, model.temperature_heat_rate, model.temperature_cool_rate)
+        return seconds, max(0.0, started + seconds - self._context.clock())
+
+    @property
+    def temperature(self):
+        """The block temperature, part way along a ramp that is still running."""
+        seconds, left = self._ramp_left()
+        if not left:
+            return self._temperature
+        start, target, _ = self._ramp
+        return target - (target - start) * left / seconds
+
+    @property
+    def status(self):
+        if self.target is None:
+            return "idle"
+        if self._ramp_left()[1]:
+            return "heating" if self.target > self.temperature else "cooling"
+        return "holding at target"
+
+    @_step
+    def set_temperature(self, celsius):
+        self._record("set_temperature", start=self.temperature, target=celsius)
+        self._temperature = self.target = celsius
+        self._ramp = None
+
+    @_step
+    def start_set_temperature(self, celsius):
+        self._record("start_set_temperature", start=self.temperature, target=celsius)
+        self._ramp = (self.temperature, celsius, self._context.clock())
+        self._temperature = self.target = celsius
+
+    @_step
+    def await_temperature(self, celsius):
+        #Only waiting for the target of the running ramp is modelled
+        self._record("await_temperature", target=celsius, seconds=self._ramp_left()[1])
+        self._ramp = None
+
+    @_step
+    def deactivate(self):
+        self._record("deactivate_temperature")
+        self.target = None
+
+
+class SimulatedMagneticModule(SimulatedModule):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.status = "disengaged"
+        self.height = 0.0
+
+    @_step
+    def engage(self, height=None, offset=None, height_from_base=None):
+        target = height if height is not None else height_from_base if height_from_base is not None else 10.0
+        target += offset or 0
+        self._record("engage", start=self.height, target=target)
+        self.height = target
+        self.status = "engaged"
+
+    @_step
+    def disengage(self):
+        self._record("disengage", start=self.height, target=0.0)
+        self.height = 0.0
+        self.status = "disengaged"
+
+
+class SimulatedThermocycler(SimulatedModule):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lid_position = "open"
+        self.block_temperature = AMBIENT_TEMPERATURE
+        self.lid_temperature = AMBIENT_TEMPERATURE
+        self.lid_target_temperature = None
+
+    @_step
+    def open_lid(self):
+        self._record("open_lid")
+        self.lid_position = "open"
+
+    @_step
+    def close_lid(self):
+        self._record("close_lid")
+        self.lid_position = "closed"
+
+    @_step
+    def set_lid_temperature(self, temperature):
+        self._record("set_lid_temperature", start=self.lid_temperature, target=temperature)
+        self.lid_temperature = self.lid_target_temperature = temperature
+
+    @_step
+    def deactivate_lid(self):
+        self._record("deactivate_lid")
+        self.lid_temperature = AMBIENT_TEMPERATURE
+        self.lid_target_temperature = None
+
+    def _hold(self, temperature, seconds, block_max_volume):
+        self._record("set_block_temperature", start=self.block_temperature, target=temperature,
+                     hold=seconds, volume=block_max_volume)
+        self.block_temperature = temperature
+
+    @_step
+    def set_block_temperature(self, temperature, hold_time_seconds=None, hold_time_minutes=None,
+                              ramp_rate=None, block_max_volume=None):
+        hold = (hold_time_seconds or 0) + (hold_time_minutes or 0) * 60
+        self._hold(temperature, hold, block_max_volume)
+
+    @_step
+    def execute_profile(self, steps, repetitions, block_max_volume=None):
+        for _ in range(repetitions):
+            for step in steps:
+                hold = step.get("hold_time_seconds", 0) + step.get("hold_time_minutes", 0) * 60
+                self._hold(step["temperature"], hold, block_max_volume)
+
+    @_step
+    def deactivate_block(self):
+        self._record("deactivate_block")
+        self.block_temperature = AMBIENT_TEMPERATURE
+
+    @_step
+    def deactivate(self):
+        self.deactivate_lid()
+        self.deactivate_block()
+
+
+MODULE_CLASSES = {
+    "temperature": SimulatedTemperatureModule,
+    "magnetic": SimulatedMagneticModule,
+    "thermocycler": SimulatedThermocycler,
+}
+
+
+class SimulatedProtocol:
+    """Records the steps and commands a protocol's run() function would send to the robot."""
+
+    def __init__(self, protocol_file=None):
+        self._context = self
+        self.protocol_file = str(Path(protocol_file).resolve()) if protocol_file else None
+        self.max_speeds = {}
+        self.loaded_instruments = {}
+        self.loaded_labwares = {}
+        self.loaded_modules = {}
+        self._labware_list = []
+        self._steps = []
+        self._commands = []
+        #Robot time of the commands so far, kept up as they are recorded
+        self._timing = TimingModel()
+        self._clock = 0.0
+        self._depth = 0
+        self._current_step = None
+        self._head = Point(*deck.HOME_POINT)
+        self._head_labware = None
+
+    def __repr__(self):
+        return "protocol"
+
+    #Step bookkeeping
+
+    def _caller_line(self):
+        frame = inspect.currentframe()
+        fallback = None
+        while frame is not None:
+            filename = str(Path(frame.f_code.co_filename).resolve())
+            if filename == self.protocol_file:
+                return filename, frame.f_lineno
+            if fallback is None and not filename.startswith(str(PACKAGE_DIR)):
+                fallback = (filename, frame.f_lineno)
+            frame = frame.f_back
+        return fallback or ("", 0)
+
+    @contextmanager
+    def _open_step(self, name, target, arguments):
+        if self._depth == 0:
+            filename, line = self._caller_line()
+            source = linecache.getline(filename, line).strip() if line else ""
+            self._steps.append(Step(len(self._steps), name, target, line, source, arguments))
+            self._current_step = len(self._steps) - 1
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+
+    def _append(self, command):
+        #Commands are complete when they are recorded, so each one's time is added once
+        self._commands.append(command)
+        self._clock += self._timing.duration(command)
+
+    def _record(self, kind, **params):
+        self._append(Command(kind, self._current_step, params=params))
+
+    def _move_head(self, pipette, location, force_direct=False, minimum_z_height=None, speed=None):
+        start, end = self._head, location.point
+        labware = location.labware.parent if isinstance(location.labware, SimulatedWell) else location.labware
+        if start == end:
+            return
+        if force_direct or (labware is not None and labware is self._head_labware):
+            arc = max(start.z, end.z) if labware is None else max(start.z, end.z, labware.highest_z)
+        else:
+            highest = max([lw.highest_z for lw in self._labware_list] + [start.z, end.z])
+            arc = highest + 10.0
+        if minimum_z_height is not None:
+            arc = max(arc, minimum_z_height)
+
+        speeds = {k.upper(): v for k, v in self.max_speeds.items()}
+        xy_speed = min(speed or pipette.default_speed, speeds.get("X", DEFAULT_SPEEDS["X"]), speeds.get("Y", DEFAULT_SPEEDS["Y"]))
+        z_speed = min(speed or DEFAULT_SPEEDS["Z"], speeds.get("Z", DEFAULT_SPEEDS["Z"]), speeds.get("A", DEFAULT_SPEEDS["A"]))
+        command = Command("move", self._current_step, mount=pipette.mount, point=tuple(end),
+                          params={"start": tuple(start), "arc": arc, "xy_speed": xy_speed, "z_speed": z_speed,
+                                  "distance": (arc - start.z) + dist(start[:2], end[:2]) + (arc - end.z)})
+        self._append(command)
+        self._head = end
+        self._head_labware = labware
+
+    def _add_labware(self, definition, slot, label=None, offset=(0.0, 0.0, 0.0), module=None):
+        slot = deck.normalise_slot(slot)
+        if slot in self.loaded_labwares:
+            raise SimulationError(f"Slot {slot} already holds {self.loaded_labwares[slot]}")
+        labware = SimulatedLabware(definition, slot, label, offset)
+        self.loaded_labwares[slot] = labware
+        self._labware_list.append(labware)
+        return labware
+
+    #The ProtocolContext API used by our protocols
+
+    @_step
+    def load_labware(self, load_name, location, label=None, namespace=None, version=None):
+        if str(location) in self.loaded_modules:
+            raise SimulationError(f"Slot {location} holds a module: load labware onto the module instead")
+        return self._add_labware(get_definition(load_name), location, label)
+
+    @_step
+    def load_labware_from_definition(self, labware_def, location, label=None):
+        return self._add_labware(labware_def, location, label)
+
+    @_step
+    def load_instrument(self, instrument_name, mount, tip_racks=None, replace=False):
+        if mount in self.loaded_instruments and not replace:
+            raise SimulationError(f"The {mount} mount already holds {self.loaded_instruments[mount]}")
+        pipette = SimulatedPipette(self, instrument_name, mount, tip_racks)
+        self.loaded_instruments[mount] = pipette
+        return pipette
+
+    @_step
+    def load_module(self, module_name, location=None, configuration=None):
+        kind = deck.module_type(module_name)
+        slot = deck.normalise_slot(location if location is not None else deck.MODULE_SLOTS[kind][0])
+        if slot not in deck.MODULE_SLOTS[kind]:
+            raise SimulationError(f"A {kind} module cannot go in slot {slot}")
+        covered = deck.THERMOCYCLER_SLOTS if kind == "thermocycler" else [slot]
+        for covered_slot in covered:
+            if covered_slot in self.loaded_labwares or covered_slot in self.loaded_modules:
+                raise SimulationError(f"Slot {covered_slot} is already in use")
+        module = MODULE_CLASSES[kind](self, module_name, kind, slot)
+        for covered_slot in covered:
+            self.loaded_modules[covered_slot] = module
+        return module
+
+    def is_simulating(self):
+        return True
+
+    def clock(self):
+        """Seconds of robot time used so far, by the default timing model (stands in for a wall clock)."""
+        return self._clock
+
+    @_step
+    def delay(self, seconds=0, minutes=0, msg=None):
+        self._record("delay", seconds=seconds + minutes * 60, message=msg)
+
+    @_step
+    def pause(self, msg=None):
+        self._record("pause", message=msg)
+
+    @_step
+    def comment(self, msg):
+        self._record("comment", message=msg)
+
+    @_step
+    def home(self):
+        self._head = Point(*deck.HOME_POINT)
+        self._record("home")
+
+    def trace(self, metadata=None):
+        labware = [{"slot": lw.slot, "load_name": lw.load_name, "label": lw.name,
+                    "module": self.loaded_modules[lw.slot].load_name if lw.slot in self.loaded_modules else None,
+                    "ordering": lw.definition["ordering"]}
+                   for lw in self._labware_list]
+        pipettes = {mount: pipette.name for mount, pipette in self.loaded_instruments.items()}
+        modules = {module.slot: module.load_name for module in set(self.loaded_modules.values())}
+        return Trace(self.protocol_file, metadata or {}, labware, pipettes, modules, self._steps, self._commands)
+
+
+def _opentrons_shim():
+    #Just enough of the opentrons package for protocol files to import against the simulator
+    opentrons = types.ModuleType("opentrons")
+    protocol_api = types.ModuleType("opentrons.protocol_api")
+    protocol_api.ProtocolContext = SimulatedProtocol
+    protocol_api.InstrumentContext = SimulatedPipette
+    protocol_api.Labware = SimulatedLabware
+    protocol_api.Well = SimulatedWell
+    opentrons_types = types.ModuleType("opentrons.types")
+    opentrons_types.Location = Location
+    opentrons_types.Point = Point
+    opentrons.protocol_api = protocol_api
+    opentrons.types = opentrons_types
+    return {"opentrons": opentrons, "opentrons.protocol_api": protocol_api, "opentrons.types": opentrons_types}
+
+
+def load_protocol(path):
+    """Import a protocol file with the simulator standing in for the opentrons package."""
+    path = Path(path).resolve()
+    shim = _opentrons_shim()
+    saved = {name: sys.modules.get(name) for name in shim}
+    sys.modules.update(shim)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    try:
+        spec = importlib.util.spec_from_file_location(f"_protocol_{abs(hash(str(path)))}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for name, original in saved.items():
+            if original is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = original
+    if not hasattr(module, "run"):
+        raise SimulationError(f"{path.name} has no run(protocol) function")
+    return module
+
+
+def simulate(path):
+    """Run a protocol file against SimulatedProtocol and return its Trace."""
+    module = load_protocol(path)
+    protocol = SimulatedProtocol(path)
+    module.run(protocol)
+    return protocol.trace(getattr(module, "metadata", {}))
@@ -0,0 +1,165 @@
+"""Temperature-module ramps started ahead of the steps that need them.
+
+Transformation runs used to call set_temperature() right before they needed the block at a temperature.
+set_temperature() blocks until the block gets there, and the module ramps slowly (25 to 4 °C takes about
+6 minutes, 42 back down to 4 °C over 10), so the whole robot stood still through every ramp. A
+TemperatureSchedule starts each ramp with start_set_temperature() as soon as the protocol knows what the
+block needs next, lets other steps run while it ramps, and only waits (await_temperature()) when the
+block has to be at temperature:
+
+    block = TemperatureSchedule(protocol, temperature_module)
+    block.start(4)                          #cools while the thermocycler runs
+    GOLDEN_GATE.run(thermocycler)
+    block.wait(4)                           #nothing left to wait for if the cycling outlasted the ramp
+    ...
+    block.hold(42, seconds=60)              #60 s counted from when the block is at 42 °C
+    block.start(37)
+    p300.transfer(125, soc, cell_wells)     #SOC goes in while the block warms up
+    with block.at(37, minutes=60):
+        ...                                 #steps that run during the outgrowth
+
+Ramp times come from the TimingModel's heat and cool rates. Every ramp is kept in block.ramps with the
+clock time it started and is predicted to finish, and ready_at() gives the time the block will be at a
+temperature, for steps that plan around it. ramps() reads the same figures out of a simulated protocol,
+and the step scheduler (ot2_tools.schedule) treats await_temperature() as a module hold that pipetting
+elsewhere on the deck can run during.
+
+Usage:
+    python -m ot2_tools.temperature Protocols/transformation_troubleshooting.py
+"""
+
+import argparse
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from .cache import cached_simulate
+from .estimate import format_duration
+from .schedule import _now, hold
+from .simulation import AMBIENT_TEMPERATURE
+from .timing import TimingModel
+
+
+@dataclass
+class Ramp:
+    #°C
+    start: float
+    target: float
+    #Clock time the ramp was started and how long it takes (s)
+    started: float
+    seconds: float
+
+    @property
+    def ready(self):
+        return self.started + self.seconds
+
+    def temperature(self, now):
+        """Predicted block temperature at clock time now."""
+        if now >= self.ready:
+            return self.target
+        return self.start + (self.target - self.start) * max(0.0, now - self.started) / self.seconds
+
+
+class TemperatureSchedule:
+    """A temperature module's ramps, started early and waited for late."""
+
+    def __init__(self, protocol, module, model=None):
+        self.protocol = protocol
+        self.module = module
+        self.model = model or TimingModel()
+        self.ramps = []
+        temperature = getattr(module, "temperature", None)
+        self._initial = AMBIENT_TEMPERATURE if temperature is None else temperature
+
+    @property
+    def target(self):
+        return self.ramps[-1].target if self.ramps else None
+
+    def temperature(self):
+        """Predicted block temperature now."""
+        return self.ramps[-1].temperature(_now(self.protocol)) if self.ramps else self._initial
+
+    def ramp_seconds(self, start, target):
+        return self.model.ramp(start, target, self.model.temperature_heat_rate, self.model.temperature_cool_rate)
+
+    def start(self, celsius):
+        """Start ramping to celsius without waiting for it; returns the clock time the block gets there."""
+        if celsius != self.target:
+            start = self.temperature()
+            self.module.start_set_temperature(celsius)
+            self.ramps.append(Ramp(start, celsius, _now(self.protocol), self.ramp_seconds(start, celsius)))
+        return self.ramps[-1].ready
+
+    def ready_at(self, celsius=None):
+        """Clock time the block is at celsius (default: the current target): when the running ramp gets there,
+        or, for another temperature, when a ramp started now would."""
+        if celsius is None or celsius == self.target:
+            return self.ramps[-1].ready if self.ramps else _now(self.protocol)
+        return _now(self.protocol) + self.ramp_seconds(self.temperature(), celsius)
+
+    def wait(self, celsius):
+        """Start the ramp to celsius unless it is running, and wait until the block is there.
+
+        Returns the seconds the robot is predicted to wait.
+        """
+        ready = self.start(celsius)
+        waited = max(0.0, ready - _now(self.protocol))
+        self.module.await_temperature(celsius)
+        return waited
+
+    @contextmanager
+    def at(self, celsius, seconds=0, minutes=0, msg=None):
+        """Hold the block at celsius for a time counted from when it gets there, running the enclosed
+        steps during the hold."""
+        self.wait(celsius)
+        with hold(self.protocol, seconds=seconds, minutes=minutes, msg=msg):
+            yield self
+
+    def hold(self, celsius, seconds=0, minutes=0, msg=None):
+        """Hold the block at celsius for a time counted from when it gets there."""
+        with self.at(celsius, seconds, minutes, msg):
+            pass
+
+
+def ramps(trace, model=None):
+    """Every temperature-module ramp in a simulated protocol, as (slot, Ramp, seconds the robot waited for it)."""
+    model = model or TimingModel()
+    found, running, clock = [], {}, 0.0
+    for command in trace.commands:
+        if command.kind in ("set_temperature", "start_set_temperature"):
+            params = command.params
+            ramp = Ramp(params["start"], params["target"], clock,
+                        model.ramp(params["start"], params["target"], model.temperature_heat_rate,
+                                   model.temperature_cool_rate))
+            #set_temperature() waits out its whole ramp
+            running[command.slot] = [command.slot, ramp, ramp.seconds if command.kind == "set_temperature" else 0.0]
+            found.append(running[command.slot])
+        elif command.kind == "await_temperature" and command.slot in running:
+            running[command.slot][2] += model.duration(command)
+        clock += model.duration(command)
+    return [tuple(entry) for entry in found]
+
+
+def report(trace, model=None):
+    found = ramps(trace, model)
+    total = sum(ramp.seconds for _, ramp, _ in found)
+    waited = sum(seconds for _, _, seconds in found)
+    lines = [trace.metadata.get("protocolName", trace.path),
+             f"  {len(found)} ramp(s) take {format_duration(total)}, the robot waits {format_duration(waited)} of it"]
+    for slot, ramp, seconds in found:
+        lines.append(f"  slot {slot}: {ramp.start:4.1f} -> {ramp.target:g} °C  started {format_duration(ramp.started)}"
+                     f"  ready {format_duration(ramp.ready)}  waited {format_duration(seconds)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show when a protocol's temperature-module ramps start and finish")
+    parser.add_argument("protocols", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        print(report(cached_simulate(path)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Thermocycler profiles compiled from a cycling spec, with their run time worked out ahead.
+
+Protocols used to spell out the thermocycler calls by hand: close the lid, heat it, execute_profile()
+for the cycles, set_block_temperature() for each hold. The time those calls take was a guess, because
+the block ramps between steps and the lid heat-up are not in the hold times. A ThermocyclerProfile
+describes the cycling, compiles it into those calls and times every segment with the TimingModel's
+block and lid ramp rates:
+
+    GOLDEN_GATE = ThermocyclerProfile([Cycle([Hold(37, minutes=5), Hold(16, minutes=5)], 30),
+                                       Hold(65, minutes=20)], lid_temperature=95, block_max_volume=20)
+
+    GOLDEN_GATE.preheat_lid(thermocycler)      #as early as the protocol allows
+    ...
+    GOLDEN_GATE.run(thermocycler)              #close lid, cycle, hold, deactivate, open lid
+
+Consecutive holds become one set_block_temperature() each and cycles one execute_profile(). run()
+skips the lid heat-up when preheat_lid() has already set the lid to temperature.
+
+Lid pre-heating is the one segment that does not have to wait for the plate: the lid can heat with the
+lid open while the reactions are still being pipetted. In API 2.13 set_lid_temperature() blocks until
+the lid is hot, so on the robot the pre-heat still runs on its own; timeline(overlap=...) and the step
+scheduler (ot2_tools.schedule) model it running alongside the pipetting before it, which is the time a
+non-blocking lid would save.
+
+Usage:
+    python -m ot2_tools.thermocycler Protocols/pilot_encapsulin_python_protocol_v1.py
+"""
+
+import argparse
+from dataclasses import dataclass
+
+from .estimate import format_duration
+from .simulation import AMBIENT_TEMPERATURE, load_protocol
+from .timing import TimingModel
+
+
+@dataclass
+class Hold:
+    temperature: float
+    seconds: float = 0
+    minutes: float = 0
+
+    @property
+    def duration(self):
+        return self.seconds + self.minutes * 60
+
+
+@dataclass
+class Cycle:
+    steps: list
+    repetitions: int
+
+
+@dataclass
+class Segment:
+    label: str
+    start: float
+    ramp: float = 0.0
+    hold: float = 0.0
+
+    @property
+    def end(self):
+        return self.start + self.ramp + self.hold
+
+
+@dataclass
+class ThermocyclerProfile:
+    stages: list
+    lid_temperature: float = 105
+    block_max_volume: float = None
+    #Leave the block at its last temperature (e.g. a 4 °C hold until the plate is collected)
+    deactivate: bool = True
+    name: str = ""
+
+    def compile(self):
+        """The thermocycler calls that run the stages, as (method, keyword arguments)."""
+        calls = []
+        for stage in self.stages:
+            if isinstance(stage, Cycle):
+                steps = [{"temperature": step.temperature, "hold_time_seconds": step.duration} for step in stage.steps]
+                calls.append(("execute_profile", {"steps": steps, "repetitions": stage.repetitions,
+                                                  "block_max_volume": self.block_max_volume}))
+            else:
+                calls.append(("set_block_temperature", {"temperature": stage.temperature,
+                                                        "hold_time_seconds": stage.duration,
+                                                        "block_max_volume": self.block_max_volume}))
+        return calls
+
+    def _holds(self):
+        for stage in self.stages:
+            if isinstance(stage, Cycle):
+                for repetition in range(stage.repetitions):
+                    for step in stage.steps:
+                        yield f"cycle {repetition + 1}/{stage.repetitions} {step.temperature:g} °C", step
+            else:
+                yield f"hold {stage.temperature:g} °C", stage
+
+    def timeline(self, model=None, block_start=AMBIENT_TEMPERATURE, lid_start=AMBIENT_TEMPERATURE, overlap=0.0):
+        """Segments from the lid pre-heat to opening the lid, timed with the model's ramp rates.
+
+        overlap is how many seconds of earlier work the lid pre-heat can run alongside; the profile's
+        clock starts once whatever is left of the pre-heat is done.
+        """
+        model = model or TimingModel()
+        lid = max(0.0, self.lid_temperature - lid_start) / model.lid_heat_rate
+        segments = [Segment(f"lid to {self.lid_temperature:g} °C", -min(lid, overlap), ramp=lid)]
+        segments.append(Segment("close lid", segments[-1].end, hold=model.lid_move))
+        temperature = block_start
+        for label, hold in self._holds():
+            ramp = model.ramp(temperature, hold.temperature, model.block_heat_rate, model.block_cool_rate)
+            segments.append(Segment(label, segments[-1].end, ramp=ramp, hold=hold.duration))
+            temperature = hold.temperature
+        if self.deactivate:
+            segments.append(Segment("open lid", segments[-1].end, hold=model.lid_move))
+        return segments
+
+    def duration(self, model=None, overlap=0.0, **kwargs):
+        """Seconds from the end of the work before it until run() returns."""
+        return self.timeline(model, overlap=overlap, **kwargs)[-1].end
+
+    def ramp_seconds(self, model=None):
+        """Seconds the block spends ramping between holds, which hold times alone leave out."""
+        return sum(segment.ramp for segment in self.timeline(model)[2:])
+
+    def preheat_lid(self, thermocycler):
+        """Start heating the lid (with the lid open or closed) ahead of the run."""
+        thermocycler.set_lid_temperature(self.lid_temperature)
+        return thermocycler
+
+    def run(self, thermocycler):
+        """Close the lid, heat it unless preheat_lid() already has, run the stages, then deactivate and open."""
+        thermocycler.close_lid()
+        if getattr(thermocycler, "lid_target_temperature", None) != self.lid_temperature:
+            thermocycler.set_lid_temperature(self.lid_temperature)
+        for method, kwargs in self.compile():
+            getattr(thermocycler, method)(**kwargs)
+        if self.deactivate:
+            thermocycler.deactivate_lid()
+            thermocycler.deactivate_block()
+            thermocycler.open_lid()
+        return thermocycler
+
+    def report(self, model=None):
+        segments = self.timeline(model)
+        ramps = self.ramp_seconds(model)
+        lines = [f"{self.name or 'profile'}: {format_duration(self.duration(model))} "
+                 f"(lid heat-up {format_duration(segments[0].ramp)}, block ramps {format_duration(ramps)})"]
+        for segment in segments:
+            if segment.label.startswith("cycle") and not segment.label.startswith("cycle 1/"):
+                continue
+            lines.append(f"  {format_duration(segment.start):>9}  {segment.label:<24} "
+                         f"ramp {segment.ramp:6.0f} s  hold {segment.hold:6.0f} s")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the thermocycler profiles a protocol defines")
+    parser.add_argument("protocol", help="protocol file defining ThermocyclerProfiles at module level")
+    args = parser.parse_args(argv)
+
+    module = load_protocol(args.protocol)
+    #By class name: run with -m, this module is __main__ and the protocol imports its own copy
+    profiles = {name: value for name, value in vars(module).items() if type(value).__name__ == "ThermocyclerProfile"}
+    if not profiles:
+        raise SystemExit(f"{args.protocol} defines no thermocycler profiles")
+    for name, profile in profiles.items():
+        profile.name = profile.name or name
+        print(profile.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Duration model for simulated commands.
+
+The constants are approximate OT-2 figures. They are kept on a dataclass so a robot that has been timed
+can be described with its own values, e.g. TimingModel(temperature_cool_rate=0.08).
+"""
+
+from dataclasses import dataclass
+from math import dist
+
+
+@dataclass
+class TimingModel:
+    #Gantry
+    move_overhead: float = 0.2          #s per move for acceleration and settling
+    #Tips
+    pick_up_tip: float = 3.0            #s to press onto the tips and lift
+    drop_tip: float = 2.5               #s to eject
+    #Plunger
+    plunger_overhead: float = 0.3       #s per aspirate or dispense on top of volume / flow rate
+    blow_out: float = 1.0
+    touch_tip_edges: int = 4
+    home: float = 12.0
+    #Modules (°C/s and mm/s)
+    temperature_heat_rate: float = 0.2
+    temperature_cool_rate: float = 0.06
+    magnet_speed: float = 5.0
+    magnet_overhead: float = 1.0
+    block_heat_rate: float = 4.0
+    block_cool_rate: float = 2.0
+    lid_heat_rate: float = 0.25
+    lid_move: float = 20.0
+
+    def ramp(self, start, target, heat_rate, cool_rate):
+        if start is None or target is None:
+            return 0.0
+        if target >= start:
+            return (target - start) / heat_rate
+        return (start - target) / cool_rate
+
+    def duration(self, command):
+        """Predicted seconds the robot spends on one command."""
+        kind, params = command.kind, command.params
+
+        if kind == "move":
+            start, end, arc = params["start"], command.point, params["arc"]
+            vertical = (arc - start[2]) + (arc - end[2])
+            return self.move_overhead + vertical / params["z_speed"] + dist(start[:2], end[:2]) / params["xy_speed"]
+        if kind in ("aspirate", "dispense"):
+            return self.plunger_overhead + command.volume / params["flow_rate"]
+        if kind == "pick_up_tip":
+            return self.pick_up_tip
+        if kind == "drop_tip":
+            return self.drop_tip
+        if kind == "blow_out":
+            return self.blow_out
+        if kind == "touch_tip":
+            return self.touch_tip_edges * 2 * params["radius"] / params["speed"] + self.move_overhead * self.touch_tip_edges
+        if kind == "home":
+            return self.home
+        if kind in ("delay", "await_temperature"):
+            return params["seconds"]
+        #start_set_temperature() returns at once; the await_temperature() after it records the wait
+        if kind == "set_temperature":
+            return self.ramp(params["start"], params["target"], self.temperature_heat_rate, self.temperature_cool_rate)
+        if kind in ("engage", "disengage"):
+            return self.magnet_overhead + abs(params["target"] - params["start"]) / self.magnet_speed
+        if kind in ("open_lid", "close_lid"):
+            return self.lid_move
+        if kind == "set_lid_temperature":
+            #The lid only heats; it cools passively and the API does not wait for that
+            return max(0.0, params["target"] - params["start"]) / self.lid_heat_rate
+        if kind == "set_block_temperature":
+            ramp = self.ramp(params["start"], params["target"], self.block_heat_rate, self.block_cool_rate)
+            return ramp + params["hold"]
+        return 0.0
@@ -0,0 +1,211 @@
+"""Tip-reuse planner.
+
+Replays a simulated protocol, tracking which liquids every well and tip has touched, and sorts each
+transfer/distribute/consolidate step by contamination risk:
+
+    shared reagent   every aspiration comes from wells holding the same single liquid
+    clean targets    each destination is empty, already holds that liquid, or is dispensed into from above
+    no mixing        the step does not mix in the destination (mixing dips the tip into the sample)
+
+Steps that pass all three can reuse one tip, so the planner rewrites them to distribute() or
+new_tip="once". Steps that already share a tip but fail a check are reported as contamination risks.
+
+Usage:
+    python -m ot2_tools.tips Protocols/transform_golden_gate_reactions.py [--prefilled 3] [--apply]
+"""
+
+import argparse
+import ast
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .cache import cached_simulate
+from .simulation import PIPETTE_SPECS
+
+LIQUID_STEPS = ("transfer", "distribute", "consolidate")
+
+
+@dataclass
+class TipPlan:
+    step: object
+    new_tip: str
+    pick_ups: int
+    risks: list = field(default_factory=list)
+    method: str = None
+
+    @property
+    def safe(self):
+        return not self.risks
+
+    @property
+    def rewrite(self):
+        #The call this step should become, or None if it should stay as it is
+        if not self.safe or self.pick_ups <= 1 and self.method == self.step.name:
+            return None
+        if self.new_tip == "never":
+            return None
+        return self.method
+
+    @property
+    def saved_pick_ups(self):
+        return self.pick_ups - 1 if self.rewrite else 0
+
+
+def _liquid_commands(commands):
+    return [c for c in commands if c.kind in ("aspirate", "dispense") and not c.params.get("air")]
+
+
+def plan_tips(trace, prefilled=()):
+    """Classify every liquid handling step of a simulated protocol."""
+    contents = defaultdict(set)
+    for labware in trace.labware:
+        if labware["slot"] in prefilled:
+            for column in labware["ordering"]:
+                for name in column:
+                    contents[f"{labware['slot']}:{name}"].add(f"slot {labware['slot']} contents")
+
+    commands_by_step = defaultdict(list)
+    for command in trace.commands:
+        commands_by_step[command.step].append(command)
+
+    plans, tips = [], {}
+    for step in trace.steps:
+        commands = commands_by_step[step.index]
+        if step.name in LIQUID_STEPS:
+            plans.append(_classify(trace, step, commands, contents))
+        _replay(trace, commands, contents, tips)
+    return plans
+
+
+def _classify(trace, step, commands, contents):
+    new_tip = step.args.get("kwargs", {}).get("new_tip", "once")
+    pick_ups = sum(1 for c in commands if c.kind == "pick_up_tip")
+    plan = TipPlan(step, new_tip, pick_ups)
+    liquid = _liquid_commands(commands)
+    if not liquid:
+        return plan
+
+    #What each aspiration draws up, judged from the wells' contents at the start of the step
+    reagents = set()
+    for command in liquid:
+        if command.kind == "aspirate" and not command.params.get("mix"):
+            wells = trace.channel_wells(command)
+            reagents.add(frozenset(set().union(*(contents[w] for w in wells)) or wells))
+    if len(reagents) > 1:
+        plan.risks.append("sources hold different liquids")
+    if any(c.params.get("mix") for c in liquid):
+        plan.risks.append("mixes in the destination")
+
+    reagent = set().union(*reagents)
+    for command in liquid:
+        if command.kind != "dispense" or command.params.get("mix"):
+            continue
+        above = command.params["height"] >= command.params["depth"]
+        for well in trace.channel_wells(command):
+            if contents[well] and not contents[well] <= reagent and not above:
+                plan.risks.append(f"tip enters {well}, which already holds another liquid")
+                break
+        else:
+            continue
+        break
+
+    volumes = [c.volume for c in liquid if c.kind == "dispense" and not c.params.get("mix")]
+    max_volume, min_volume = PIPETTE_SPECS[trace.pipettes[liquid[0].mount]][1:3]
+    if step.name == "transfer" and len(set(volumes)) == 1 and 2 * volumes[0] + min_volume <= max_volume:
+        plan.method = "distribute"
+    else:
+        plan.method = step.name
+    return plan
+
+
+def _replay(trace, commands, contents, tips):
+    #Track what each well and the current tip of each mount has touched
+    for command in commands:
+        if command.kind == "pick_up_tip":
+            tips[command.mount] = set()
+        elif command.kind == "aspirate" and not command.params.get("air"):
+            for well in trace.channel_wells(command):
+                if not contents[well]:
+                    contents[well].add(well)
+                tips[command.mount] |= contents[well]
+        elif command.kind == "dispense":
+            for well in trace.channel_wells(command):
+                contents[well] |= tips.get(command.mount, set())
+                if command.params["height"] < command.params["depth"]:
+                    tips[command.mount] = tips.get(command.mount, set()) | contents[well]
+
+
+def rewrite_source(source, plans):
+    """Apply the rewrites from plans to the protocol source text."""
+    tree = ast.parse(source)
+    calls = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            calls[(node.lineno, node.func.attr)] = node
+
+    #A step that runs more than once (e.g. in a loop) is only rewritten if every run agrees
+    by_call = defaultdict(list)
+    for plan in plans:
+        by_call[(plan.step.line, plan.step.name)].append(plan)
+
+    lines = source.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    edits = []
+    for key, group in by_call.items():
+        methods = {plan.rewrite for plan in group}
+        if len(methods) != 1 or None in methods or key not in calls:
+            continue
+        node = calls[key]
+        start = offsets[node.lineno - 1] + node.col_offset
+        end = offsets[node.end_lineno - 1] + node.end_col_offset
+        text = source[start:end]
+        text = re.sub(rf"\.{key[1]}\(", f".{methods.pop()}(", text, count=1)
+        text = re.sub(r"""new_tip=(["'])(always|once|never)\1""", r"new_tip=\1once\1", text)
+        edits.append((start, end, text))
+
+    for start, end, text in sorted(edits, reverse=True):
+        source = source[:start] + text + source[end:]
+    return source
+
+
+def report(path, plans):
+    lines = [str(path)]
+    for plan in plans:
+        call = f"line {plan.step.line:<4} {plan.step.name}(new_tip={plan.new_tip!r})"
+        if plan.rewrite and plan.saved_pick_ups:
+            lines.append(f"  reuse   {call} -> {plan.rewrite}(new_tip='once'), saves {plan.saved_pick_ups} pick-up(s)")
+        elif plan.rewrite:
+            lines.append(f"  pack    {call} -> {plan.rewrite}(), several dispenses per aspiration")
+        elif plan.safe:
+            lines.append(f"  ok      {call}")
+        elif plan.new_tip == "always":
+            lines.append(f"  keep    {call}: {'; '.join(plan.risks)}")
+        else:
+            lines.append(f"  RISK    {call} shares a tip but {'; '.join(plan.risks)}")
+    saved = sum(plan.saved_pick_ups for plan in plans)
+    lines.append(f"  {saved} tip pick-up(s) saved")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find transfers that can safely reuse a tip")
+    parser.add_argument("protocols", nargs="+")
+    parser.add_argument("--prefilled", nargs="*", default=[], help="slots whose wells already hold liquid at the start")
+    parser.add_argument("--apply", action="store_true", help="rewrite the protocol files in place")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        plans = plan_tips(cached_simulate(path), set(args.prefilled))
+        print(report(path, plans))
+        if args.apply:
+            path = Path(path)
+            path.write_text(rewrite_source(path.read_text(), plans))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Shared transformation workflow.
+
+Every transformation protocol runs the same sequence: DNA into competent cells on a cold temperature
+module, incubation, heat shock, SOC, outgrowth, then plating the outgrowth neat and diluted. A protocol
+describes its run with a Transformation and hands over to it:
+
+    TRANSFORMATION = Transformation(num_reactions=48, dna_volume=15)
+
+    def run(protocol):
+        TRANSFORMATION.run(protocol)
+
+The deck layout comes from ot2_tools.layout, placed for the trips the steps below make; pin any slot
+(e.g. a module the protocol has already loaded) with slots= and tip_slots=. Protocols that operators
+already set up by hand pin their whole layout, so the deck does not change under them; tip slots beyond
+the racks a run needs hold spare racks.
+
+Heat shock and outgrowth are either done on the deck with the temperature module ("module") or by hand
+in a water bath and a thermomixer ("manual", with a pause for the operator). On the module, each hold is
+timed from when the block reaches its temperature (ot2_tools.temperature), and the block warms up for the
+outgrowth while the SOC goes in.
+
+Plating merges the dilution into the plating moves (ot2_tools.dilution.tip_dilution). For each column one p20 tip picks up SOC from the
+reservoir (while the tip is still clean), an air gap and then the culture, and spots both together onto
+the diluted spot, where they mix; the same tip then plates the undiluted culture. Both spots are dispensed
+SPOT_HEIGHT above the agar rather than onto it, so the tip never touches the agar before it goes back into
+the culture. That replaces two p300
+passes with new tips (remove half the culture, top up with SOC) and a separate p20 plating pass.
+"""
+
+from dataclasses import dataclass, field
+from math import ceil
+
+from . import layout
+from .dilution import tip_dilution
+from .planner import CHANNELS, DEFAULT_MOUNTS, DEFAULT_TIP_RACKS
+from .temperature import TemperatureSchedule
+
+TIPS_PER_RACK = 12
+TEMPERATURE_MODULE = "temperature module gen2"
+
+HEAT_SHOCK_TEMPERATURE = 42
+OUTGROWTH_TEMPERATURE = 37
+#mm above the agar surface that spots are dispensed from, clear of the agar
+SPOT_HEIGHT = 1
+COLD_TEMPERATURE = 4
+
+
+@dataclass
+class Transformation:
+    num_reactions: int
+    dna_volume: float = 15
+    soc_volume: float = 125
+    plating_volume: float = 10
+    dilution: float = 2
+    heat_shock: str = "manual"
+    outgrowth: str = "manual"
+    incubation_minutes: float = 30
+    heat_shock_seconds: float = 60
+    recovery_minutes: float = 5
+    outgrowth_minutes: float = 60
+    dna_mix: tuple = (1, 10)
+    soc_mix: tuple = (2, 100)
+    air_gap: float = 2
+    cell_labware: str = "armadillo_96_wellplate_200ul_pcr_full_skirt"
+    dna_labware: str = "opentrons_96_aluminumblock_generic_pcr_strip_200ul"
+    #Cell column -> DNA column, for runs that leave some columns without DNA (e.g. controls)
+    dna_wells: dict = None
+    soc_well: str = "A1"
+    slots: dict = field(default_factory=dict)
+    tip_slots: dict = field(default_factory=dict)
+    cells_message: str = ("Add competent cells in PCR strips to temperature module now - "
+                          "don't forget to fill aluminium block with water!")
+
+    def __post_init__(self):
+        for name, mode in (("heat_shock", self.heat_shock), ("outgrowth", self.outgrowth)):
+            if mode not in ("manual", "module"):
+                raise ValueError(f"{name} must be 'manual' or 'module', not {mode!r}")
+        if 2 * self.num_columns > 12:
+            raise ValueError(f"{self.num_reactions} reactions need {2 * self.num_columns} agar plate columns")
+        if self.plating_volume + self.air_gap > 20:
+            raise ValueError(f"{self.plating_volume} µl plating volume and air gap do not fit a p20 tip")
+
+    @property
+    def num_columns(self):
+        return ceil(self.num_reactions / CHANNELS)
+
+    @property
+    def cell_wells(self):
+        return [f"A{x + 1}" for x in range(self.num_columns)]
+
+    @property
+    def diluted_wells(self):
+        #Agar plate columns for the diluted spots, after the undiluted ones
+        return [f"A{x + self.num_columns + 1}" for x in range(self.num_columns)]
+
+    def tip_columns(self):
+        """Columns of tips each pipette uses: one per column for DNA and SOC, and one per column for plating."""
+        return {"p20_multi_gen2": len(self._dna_wells()) + self.num_columns, "p300_multi_gen2": self.num_columns}
+
+    def _dna_wells(self):
+        return self.dna_wells if self.dna_wells is not None else {well: well for well in self.cell_wells}
+
+    def layout(self, dna=True):
+        """Slots for the agar plate, DNA plate, temperature module, reservoir and each pipette's tip racks.
+
+        With dna=False the DNA plate is somewhere the protocol has already put it (e.g. in the
+        thermocycler) and gets no slot.
+        """
+        racks = {}
+        for name, columns in self.tip_columns().items():
+            racks[name] = layout.tip_rack_items(name, columns)
+            #Pinned tip slots beyond the racks the run needs hold spare racks
+            for i in range(len(racks[name]), len(self.tip_slots.get(name, []))):
+                racks[name].append((layout.Item(f"{name} tips {i + 1}", kind="tip_rack"), 0))
+        items = [layout.Item("agar"), layout.Item("reservoir"), layout.Item("temperature", module=TEMPERATURE_MODULE)]
+        if dna:
+            items.append(layout.Item("dna"))
+        items += [rack for name in racks for rack, _ in racks[name]]
+        fixed = dict(self.slots)
+        for name, slots in self.tip_slots.items():
+            fixed.update((rack.name, slot) for (rack, _), slot in zip(racks[name], slots))
+
+        def tips(name):
+            #Rack each column of tips comes from, in the order they are used
+            return [rack.name for rack, columns in racks[name] for _ in range(columns)]
+
+        flows = {}
+        p20, p300 = tips("p20_multi_gen2"), tips("p300_multi_gen2")
+        for _ in self._dna_wells():
+            layout.add_cycle(flows, [p20.pop(0)] + (["dna"] if dna else []) + ["temperature", layout.TRASH])
+        for _ in self.cell_wells:
+            layout.add_cycle(flows, [p300.pop(0), "reservoir", "temperature", layout.TRASH])
+        for _ in self.cell_wells:
+            layout.add_cycle(flows, [p20.pop(0), "reservoir", "temperature", "agar", "temperature", "agar",
+                                     layout.TRASH])
+        slots = layout.solve(items, flows, fixed)
+        return slots, {name: [slots[rack.name] for rack, _ in racks[name]] for name in racks}
+
+    def load(self, protocol, dna_plate=None, temperature_module=None):
+        """Load whatever the protocol has not loaded already, in the slots from layout()."""
+        slots, tip_slots = self.layout(dna=dna_plate is None)
+        pipettes = {}
+        for name in ("p20_multi_gen2", "p300_multi_gen2"):
+            racks = [protocol.load_labware(DEFAULT_TIP_RACKS[name], slot) for slot in tip_slots[name]]
+            pipettes[name] = protocol.load_instrument(name, DEFAULT_MOUNTS[name], tip_racks=racks)
+
+        reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", slots["reservoir"])
+        agar_plate = protocol.load_labware("nunc_rectangular_agar_plate", slots["agar"])
+        if dna_plate is None:
+            dna_plate = protocol.load_labware(self.dna_labware, slots["dna"])
+        if temperature_module is None:
+            temperature_module = protocol.load_module(TEMPERATURE_MODULE, slots["temperature"])
+        cell_plate = temperature_module.load_labware(self.cell_labware)
+        return {"p20": pipettes["p20_multi_gen2"], "p300": pipettes["p300_multi_gen2"], "reservoir": reservoir,
+                "agar_plate": agar_plate, "dna_plate": dna_plate, "temperature_module": temperature_module,
+                "cell_plate": cell_plate}
+
+    def run(self, protocol, dna_plate=None, temperature_module=None, block=None):
+        """Run the transformation. Pass block (a TemperatureSchedule) to use a temperature module whose
+        ramps the protocol has already started, e.g. cooling it while earlier steps run."""
+        if block is not None:
+            temperature_module = block.module
+        loaded = self.load(protocol, dna_plate, temperature_module)
+        p20, p300 = loaded["p20"], loaded["p300"]
+        cells, module = loaded["cell_plate"], loaded["temperature_module"]
+        cell_wells = [cells[well] for well in self.cell_wells]
+        block = block or TemperatureSchedule(protocol, module)
+
+        #Transfer DNA to the competent cells
+        block.wait(COLD_TEMPERATURE)
+        protocol.pause(self.cells_message)
+        dna_wells = self._dna_wells()
+        p20.transfer(self.dna_volume, [loaded["dna_plate"][well] for well in dna_wells.values()],
+                     [cells[well] for well in dna_wells], mix_after=self.dna_mix, new_tip="always")
+
+        #Incubate on ice and heat shock, timed from when the block gets to each temperature
+        protocol.delay(minutes=self.incubation_minutes)
+        if self.heat_shock == "module":
+            block.hold(HEAT_SHOCK_TEMPERATURE, seconds=self.heat_shock_seconds)
+            block.hold(COLD_TEMPERATURE, minutes=self.recovery_minutes)
+        else:
+            protocol.pause("Heat shock cells and then return to temperature module now")
+
+        #Add SOC medium (while the block warms up for the outgrowth) and outgrowth
+        if self.outgrowth == "module":
+            block.start(OUTGROWTH_TEMPERATURE)
+        p300.transfer(self.soc_volume, loaded["reservoir"][self.soc_well], cell_wells, mix_after=self.soc_mix,
+                      new_tip="always")
+        if self.outgrowth == "module":
+            block.hold(OUTGROWTH_TEMPERATURE, minutes=self.outgrowth_minutes)
+        else:
+            protocol.pause("Remove cells and incubate in thermomixer for outgrowth now")
+
+        self.plate(p20, loaded["reservoir"][self.soc_well], cell_wells, loaded["agar_plate"])
+
+    def plate(self, p20, soc, cell_wells, agar_plate):
+        """Spot each culture diluted and undiluted with one tip: SOC, air gap and culture first, then neat
+        culture, both from SPOT_HEIGHT above the agar."""
+        for well, undiluted, diluted in zip(cell_wells, self.cell_wells, self.diluted_wells):
+            p20.pick_up_tip()
+            tip_dilution(p20, self.plating_volume, self.dilution, well, soc, agar_plate[diluted].bottom(SPOT_HEIGHT),
+                         self.air_gap)
+            p20.blow_out(agar_plate[diluted])
+
+            p20.aspirate(self.plating_volume, well)
+            p20.dispense(self.plating_volume, agar_plate[undiluted].bottom(SPOT_HEIGHT))
+            p20.blow_out(agar_plate[undiluted])
+            p20.drop_tip()
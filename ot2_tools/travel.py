@@ -0,0 +1,262 @@
+"""Gantry travel optimiser.
+
+Protocols visit the deck in whatever order their code happens to run in: reservoir, agar plate,
+temperature module, trash, with tip racks spread over several slots. This module takes a simulated
+command stream and reorders independent tip cycles (everything from picking up a tip to dropping it) so
+the head travels as little as possible, then reports how much travel that saves.
+
+The order is a nearest-neighbour tour over the deck coordinates: starting from where the head is, it
+always runs next the tip cycle that is cheapest to reach and carry out, among those whose liquid
+dependencies are met. A cycle that writes a well (dispense, mix, blow out, touch tip) stays on the same
+side of every other cycle that reads or writes that well, so no liquid is taken before it arrives or
+after it changes. Tips are still taken from the racks in order, so each cycle picks up whichever tip is
+next when it runs.
+
+Commands inside a tip cycle keep their order, since the tip carries liquid from one well to the next.
+Operator pauses, delays, module commands and homing are fixed: cycles are only reordered between them.
+Where the tour saves less than MIN_SAVING over the protocol's own order (a run of cycles that each go from the next
+tip to the trash costs about the same in any order), the protocol's order is kept.
+
+Usage:
+    python -m ot2_tools.travel Protocols/transform_golden_gate_reactions.py
+"""
+
+import argparse
+from dataclasses import dataclass, field, replace
+from math import dist
+
+from . import deck
+from .cache import cached_simulate
+from .estimate import estimate_trace, format_duration
+from .timing import TimingModel
+
+PIPETTE_KINDS = ("move", "pick_up_tip", "drop_tip", "aspirate", "dispense", "blow_out", "touch_tip")
+#Seconds a reordered run of cycles has to save before it is worth changing the protocol for
+MIN_SAVING = 1.0
+
+
+@dataclass
+class Cycle:
+    """Commands that run as one block: a tip cycle, or a fixed command that nothing may cross."""
+    commands: list = field(default_factory=list)
+    mount: str = None
+    reads: set = field(default_factory=set)
+    writes: set = field(default_factory=set)
+    fixed: bool = False
+
+    @property
+    def step(self):
+        return next(command.step for command in self.commands if command.step is not None)
+
+
+def split_cycles(trace):
+    """The command stream as a list of Cycles, in protocol order."""
+    cycles, open_cycles, pending = [], {}, []
+    for command in trace.commands:
+        if command.step is None:
+            continue
+        mount = command.mount
+        if command.kind == "move" and mount not in open_cycles:
+            #A move with no tip on is the approach to a pick-up (or a bare move_to)
+            pending.append(command)
+            continue
+        if command.kind == "pick_up_tip":
+            cycle = Cycle(pending + [command], mount=mount)
+            pending = []
+            open_cycles[mount] = cycle
+            cycles.append(cycle)
+            continue
+        if pending:
+            cycles.append(Cycle(pending, mount=pending[0].mount, fixed=True))
+            pending = []
+
+        if command.kind in PIPETTE_KINDS and mount in open_cycles:
+            cycle = open_cycles[mount]
+            cycle.commands.append(command)
+            wells = trace.channel_wells(command)
+            if command.kind == "aspirate" and not command.params.get("mix"):
+                if not command.params.get("air"):
+                    cycle.reads.update(wells)
+            elif command.kind != "move":
+                cycle.writes.update(wells)
+            if command.kind == "drop_tip":
+                if command.params.get("returned"):
+                    cycle.fixed = True
+                del open_cycles[mount]
+        elif open_cycles:
+            #A delay or module command while a tip is on ties the cycle to its place in the protocol
+            cycle = max(open_cycles.values(), key=lambda open_cycle: cycles.index(open_cycle))
+            cycle.commands.append(command)
+            cycle.fixed = True
+        else:
+            cycles.append(Cycle([command], mount=mount, fixed=True))
+    if pending:
+        cycles.append(Cycle(pending, mount=pending[0].mount, fixed=True))
+    return cycles
+
+
+def _depends(later, earlier):
+    return bool(earlier.writes & (later.reads | later.writes) or earlier.reads & later.writes)
+
+
+class _Head:
+    """Replays cycles from a head position, handing out tips in rack order and retiming the moves."""
+
+    def __init__(self, tips, model, position):
+        self.tips = {mount: list(points) for mount, points in tips.items()}
+        self.model = model
+        self.position = position
+
+    def run(self, cycle, commit=True):
+        """The cycle's commands as they would run from here, and the seconds spent moving."""
+        position, tips, commands, seconds = self.position, self.tips, [], 0.0
+        pick_up = None
+        if not cycle.fixed and any(command.kind == "pick_up_tip" for command in cycle.commands):
+            pick_up = tips[cycle.mount][0]
+        for i, command in enumerate(cycle.commands):
+            if pick_up is not None and command.kind == "pick_up_tip":
+                command = replace(command, slot=pick_up.slot, labware=pick_up.labware, well=pick_up.well,
+                                  point=pick_up.point)
+            elif pick_up is not None and command.kind == "move" and cycle.commands[i + 1].kind == "pick_up_tip":
+                command = replace(command, point=pick_up.point)
+            if command.kind == "move":
+                params = dict(command.params, start=tuple(position))
+                arc = params["arc"]
+                params["distance"] = (arc - position[2]) + dist(position[:2], command.point[:2]) + (arc - command.point[2])
+                command = replace(command, params=params)
+                seconds += self.model.duration(command)
+                position = command.point
+            elif command.kind == "home":
+                position = deck.HOME_POINT
+            commands.append(command)
+        if commit:
+            self.position = position
+            if pick_up is not None:
+                tips[cycle.mount].pop(0)
+        return commands, seconds
+
+
+def _tips(cycles):
+    #Tip pick-ups per mount in the order the racks hand them out
+    tips = {}
+    for cycle in cycles:
+        if not cycle.fixed:
+            tips.setdefault(cycle.mount, []).extend(c for c in cycle.commands if c.kind == "pick_up_tip")
+    return tips
+
+
+def _start(trace):
+    first = next((command for command in trace.commands if command.kind == "move"), None)
+    return first.params["start"] if first else deck.HOME_POINT
+
+
+def _segments(cycles):
+    #Runs of movable cycles between fixed ones
+    segment = []
+    for cycle in cycles:
+        if cycle.fixed:
+            if segment:
+                yield segment
+            segment = []
+            yield [cycle]
+        else:
+            segment.append(cycle)
+    if segment:
+        yield segment
+
+
+def _nearest_neighbour(segment, head):
+    """Nearest-neighbour order of a run of cycles, respecting the order of dependent cycles."""
+    before = {i: {j for j in range(i) if _depends(segment[i], segment[j])} for i in range(len(segment))}
+    order, done = [], set()
+    while len(order) < len(segment):
+        ready = [i for i in range(len(segment)) if i not in done and before[i] <= done]
+        best = min(ready, key=lambda i: (head.run(segment[i], commit=False)[1], i))
+        head.run(segment[best])
+        order.append(best)
+        done.add(best)
+    return [segment[i] for i in order]
+
+
+def travel_seconds(cycles, tips, start, model):
+    head = _Head(tips, model, start)
+    return sum(head.run(cycle)[1] for cycle in cycles)
+
+
+@dataclass
+class Route:
+    trace: object
+    cycles: list
+    order: list
+    before: float
+    after: float
+
+    @property
+    def saved(self):
+        return self.before - self.after
+
+    def commands(self, model=None):
+        """The reordered command stream, with tips reassigned and moves retimed."""
+        head = _Head(_tips(self.cycles), model or TimingModel(), _start(self.trace))
+        return [command for cycle in self.order for command in head.run(cycle)[0]]
+
+    def reordered_trace(self, model=None):
+        return replace(self.trace, commands=self.commands(model))
+
+
+def optimise(trace, model=None):
+    """Reorder independent tip cycles to minimise gantry travel time."""
+    model = model or TimingModel()
+    cycles = split_cycles(trace)
+    tips, start = _tips(cycles), _start(trace)
+    order = []
+    for segment in _segments(cycles):
+        if len(segment) == 1:
+            order += segment
+            continue
+        #Keep the protocol's own order where the greedy tour does not beat it
+        head = _Head(tips, model, start)
+        for cycle in order:
+            head.run(cycle)
+        reference = _Head(head.tips, model, head.position)
+        planned = _nearest_neighbour(segment, head)
+        current = sum(reference.run(cycle)[1] for cycle in segment)
+        tour = travel_seconds(order + planned, tips, start, model) - travel_seconds(order, tips, start, model)
+        order += planned if tour < current - MIN_SAVING else segment
+    return Route(trace, cycles, order, travel_seconds(cycles, tips, start, model),
+                 travel_seconds(order, tips, start, model))
+
+
+def report(route, model=None):
+    trace = route.trace
+    lines = [trace.metadata.get("protocolName", trace.path),
+             f"  travel {format_duration(route.before)} -> {format_duration(route.after)}, "
+             f"saves {format_duration(route.saved)}"]
+    total = estimate_trace(trace, model).total
+    lines.append(f"  run time {format_duration(total)} -> {format_duration(total - route.saved)}")
+
+    #Cycles that now run before a cycle that came earlier in the protocol
+    position = {id(cycle): i for i, cycle in enumerate(route.cycles)}
+    latest = -1
+    for cycle in route.order:
+        if position[id(cycle)] < latest and not cycle.fixed:
+            step = trace.steps[cycle.step]
+            wells = sorted(cycle.reads | cycle.writes)
+            lines.append(f"  line {step.line:<4} {trace.pipettes.get(cycle.mount, cycle.mount)} "
+                         f"{', '.join(wells[:3])}{' ...' if len(wells) > 3 else ''} moved earlier")
+        latest = max(latest, position[id(cycle)])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reorder independent tip cycles to cut gantry travel")
+    parser.add_argument("protocols", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.protocols:
+        print(report(optimise(cached_simulate(path))))
+        print()
+
+
+if __name__ == "__main__":
+    main()
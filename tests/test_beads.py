@@ -0,0 +1,56 @@
+"""Bead settle times, from a measured table or the fixed default."""
+
+import pytest
+
+from ot2_tools.beads import DEFAULT_SETTLE, MagneticSeparation, settle_seconds
+from ot2_tools.simulation import SimulatedProtocol
+
+#Round figures to check the interpolation against
+TABLE = {"test": {4.0: [(100, 100), (200, 200)], 8.0: [(100, 50), (200, 100)]}}
+
+
+def test_unmeasured_beads_wait_the_default():
+    assert settle_seconds(350, 6.8) == DEFAULT_SETTLE
+    assert settle_seconds(350, 6.8, beads="test") == DEFAULT_SETTLE
+
+
+def test_interpolates_volume_and_height_with_a_margin():
+    assert settle_seconds(150, 4.0, "test", TABLE, safety=1) == 150
+    assert settle_seconds(150, 6.0, "test", TABLE, safety=1) == 115
+    assert settle_seconds(150, 6.0, "test", TABLE) == 145
+    #Past the highest calibrated height, as fast as at that height
+    assert settle_seconds(150, 10.0, "test", TABLE, safety=1) == 75
+    #Beyond the table: extrapolated from the last two points
+    assert settle_seconds(400, 4.0, "test", TABLE, safety=1) == 400
+
+
+def test_refuses_heights_below_the_calibration():
+    with pytest.raises(ValueError, match="calibrated"):
+        settle_seconds(150, 2.0, "test", TABLE)
+
+
+@pytest.fixture
+def streptactin_table():
+    """Made-up figures in the shape of a measured table, NOT measurements."""
+    return {"streptactin": {4.0: [(50, 60), (100, 80), (200, 120), (400, 180), (800, 300)],
+                            6.8: [(50, 40), (100, 50), (200, 75), (400, 120), (800, 210)]}}
+
+
+def test_a_table_for_the_beads_replaces_the_default(streptactin_table):
+    assert settle_seconds(50, 6.8, table=streptactin_table) < DEFAULT_SETTLE
+    assert settle_seconds(800, 4.0, table=streptactin_table) > DEFAULT_SETTLE
+    assert settle_seconds(50, 6.8) == DEFAULT_SETTLE
+
+
+def test_settle_time_follows_the_volume_in_the_wells():
+    protocol = SimulatedProtocol()
+    module = protocol.load_module("magnetic module gen2", 1)
+    plate = module.load_labware("abgene_96_wellplate_2200ul")
+    wells = plate.rows()[0][:2]
+    separation = MagneticSeparation(protocol, module, wells, initial_volume=100, beads="test",
+                                    engage_height=4.0, table=TABLE)
+    assert separation.settle_time() == settle_seconds(100, 4.0, "test", TABLE)
+    separation.add(100, wells[:1])
+    assert separation.settle_time() == settle_seconds(200, 4.0, "test", TABLE)
+    assert separation.settle_time(wells[1:]) == settle_seconds(100, 4.0, "test", TABLE)
+    assert separation.engage() == separation.settle_time()
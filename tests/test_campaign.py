@@ -0,0 +1,43 @@
+"""The solubility screen's stages and how campaigns place them on robots."""
+
+from ot2_tools.campaign import DAY, SOLUBILITY_SCREEN, Stage, schedule_campaign
+from ot2_tools.simulation import REPO_ROOT
+
+#Round run times, so the schedule does not depend on the simulator
+MINUTES = {stage.name: 60 for stage in SOLUBILITY_SCREEN}
+
+
+def test_screen_runs_every_step_of_the_series_once():
+    protocols = [stage.protocol for stage in SOLUBILITY_SCREEN]
+    series = sorted(path.relative_to(REPO_ROOT).as_posix()
+                    for path in (REPO_ROOT / "Protocols" / "solubility_screen").glob("*.py"))
+    assert sorted(protocols) == series
+    names = {stage.name for stage in SOLUBILITY_SCREEN}
+    assert all(name in names for stage in SOLUBILITY_SCREEN for name, _ in stage.after)
+
+
+def test_stages_wait_for_what_they_follow():
+    campaign = schedule_campaign(screens=2, robots=1, minutes=MINUTES)
+    jobs = {(job.screen, job.stage.name): job for job in campaign.jobs}
+    for (screen, _), job in jobs.items():
+        for name, gap in job.stage.after:
+            assert job.start >= jobs[(screen, name)].end + gap
+    assert campaign.busy(0) == 2 * sum(MINUTES.values())
+
+
+def test_stages_start_and_finish_in_working_hours():
+    campaign = schedule_campaign(screens=3, robots=2, minutes=MINUTES)
+    for job in campaign.jobs:
+        day, start = divmod(job.start, DAY)
+        assert day % 7 < 5
+        assert 9 * 60 <= start and start + job.minutes <= 18 * 60
+
+
+def test_attached_stages_follow_on_the_same_robot():
+    stages = [Stage("transform", "transform.py", manual_minutes=70),
+              Stage("plate", "plate.py", after=[("transform", 0)], attached=True)]
+    campaign = schedule_campaign(screens=2, robots=2, stages=stages, minutes={"transform": 120, "plate": 30})
+    jobs = {(job.screen, job.stage.name): job for job in campaign.jobs}
+    for screen in range(2):
+        first, attached = jobs[(screen, "transform")], jobs[(screen, "plate")]
+        assert attached.robot == first.robot and attached.start == first.end
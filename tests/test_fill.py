@@ -0,0 +1,63 @@
+"""Multi-dispense planning and the moves multi_dispense() makes."""
+
+import pytest
+
+from ot2_tools.deck import TRASH_POINT
+from ot2_tools.fill import dispense_error, multi_dispense, plan_multi_dispense
+from ot2_tools.simulation import SimulatedProtocol
+
+
+@pytest.fixture
+def p20_deck():
+    protocol = SimulatedProtocol()
+    tips = protocol.load_labware("opentrons_96_tiprack_20ul", 1)
+    reservoir = protocol.load_labware("usascientific_12_reservoir_22ml", 2)
+    plate = protocol.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt", 3)
+    p20 = protocol.load_instrument("p20_multi_gen2", "right", tip_racks=[tips])
+    return protocol, p20, reservoir, plate
+
+
+def test_plan_fits_the_tip_within_tolerance(p20_deck):
+    _, p20, _, _ = p20_deck
+    dispenses, disposal, error = plan_multi_dispense(p20, 2.22, 20)
+    assert dispenses > 1
+    assert dispenses * 2.22 + disposal <= p20.max_volume
+    assert disposal >= p20.min_volume
+    assert error <= 20
+    assert error == pytest.approx(dispense_error(p20, 2.22, disposal))
+
+
+def test_plan_prefers_the_most_accurate_of_equally_packed_options(p20_deck):
+    _, p20, _, _ = p20_deck
+    #Six dispenses fit with either disposal volume; the larger disposal is more accurate
+    dispenses, disposal, error = plan_multi_dispense(p20, 2.22, 20, count=6)
+    assert dispenses == 6
+    assert error < plan_multi_dispense(p20, 2.22, 20)[2]
+    assert disposal > p20.min_volume
+
+
+def test_plan_falls_back_to_one_dispense_per_aspiration(p20_deck):
+    _, p20, _, _ = p20_deck
+    single = dispense_error(p20, 2.22)
+    assert plan_multi_dispense(p20, 2.22, single + 0.1) == (1, 0.0, single)
+
+
+def test_plan_refuses_volumes_outside_the_tolerance(p20_deck):
+    _, p20, _, _ = p20_deck
+    with pytest.raises(ValueError, match="tolerance"):
+        plan_multi_dispense(p20, 1, 5)
+
+
+def test_multi_dispense_stays_above_the_wells_and_discards_to_the_trash(p20_deck):
+    protocol, p20, reservoir, plate = p20_deck
+    wells = plate.rows()[0][:6]
+    multi_dispense(p20, 2.22, reservoir["A1"], wells, 20)
+    commands = protocol.trace().commands
+    dispenses = [command for command in commands if command.kind == "dispense"]
+    assert [command.well for command in dispenses] == [well.well_name for well in wells]
+    assert all(command.params["height"] == pytest.approx(wells[0].depth) for command in dispenses)
+    assert [command.well for command in commands if command.kind == "touch_tip"] == \
+        [well.well_name for well in wells]
+    blow_outs = [command for command in commands if command.kind == "blow_out"]
+    assert blow_outs and all(command.point == TRASH_POINT for command in blow_outs)
+    assert sum(command.kind == "pick_up_tip" for command in commands) == 1
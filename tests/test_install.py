@@ -0,0 +1,57 @@
+"""The package installed on its own, the way protocols import it on the robot (see README.md)."""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from setuptools.dist import Distribution
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROTOCOLS = sorted((REPO_ROOT / "Protocols").rglob("*.py"))
+
+
+@pytest.fixture(scope="module")
+def installed(tmp_path_factory):
+    """A directory holding the package as pyproject.toml installs it, and nothing else from the repo."""
+    target = tmp_path_factory.mktemp("site-packages")
+    cwd = os.getcwd()
+    os.chdir(REPO_ROOT)
+    try:
+        dist = Distribution({"script_name": "pyproject.toml"})
+        dist.parse_config_files()
+        build = dist.get_command_obj("build_py")
+        build.build_lib = str(target)
+        build.compile = 0
+        dist.run_command("build_py")
+    finally:
+        os.chdir(cwd)
+    return target
+
+
+def _run(installed, directory, script, *args):
+    #Only the installed package on the path, run from a directory outside the repo
+    env = {**os.environ, "PYTHONPATH": str(installed)}
+    return subprocess.run([sys.executable, "-c", script, *args], cwd=directory, env=env, capture_output=True,
+                          text=True)
+
+
+def test_custom_labware_ships_with_the_package(installed, tmp_path):
+    result = _run(installed, tmp_path, "from ot2_tools import labware; print(labware.CUSTOM_LABWARE_DIR); "
+                                       "print(*labware.registry.custom_load_names())")
+    assert result.returncode == 0, result.stderr
+    directory, names = result.stdout.splitlines()
+    assert Path(directory).is_relative_to(installed)
+    assert "nunc_rectangular_agar_plate" in names.split()
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS, ids=lambda path: path.relative_to(REPO_ROOT).as_posix())
+def test_protocol_runs_with_the_installed_package(installed, protocol, tmp_path):
+    #The protocol file on its own, as the Opentrons App uploads it
+    upload = tmp_path / protocol.name
+    shutil.copy(protocol, upload)
+    result = _run(installed, tmp_path, "import sys; from ot2_tools.simulation import simulate; simulate(sys.argv[1])",
+                  str(upload))
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,46 @@
+"""Deck layouts from the layout solver."""
+
+from itertools import permutations
+
+import pytest
+
+from ot2_tools import deck
+from ot2_tools.layout import SLOTS, TRASH, Item, add_cycle, layout_cost, solve
+
+ITEMS = [Item("reservoir"), Item("cells", module="temperature module gen2"), Item("tips", kind="tip_rack")]
+FLOWS = add_cycle({}, ["tips", "reservoir", "cells", TRASH], count=6)
+
+
+def test_every_item_gets_its_own_allowed_slot():
+    layout = solve(ITEMS, FLOWS)
+    assert set(layout) == {item.name for item in ITEMS}
+    assert len(set(layout.values())) == len(ITEMS)
+    assert layout["cells"] in deck.MODULE_SLOTS["temperature"]
+    assert deck.TRASH_SLOT not in layout.values()
+
+
+def test_no_placement_of_three_items_is_shorter():
+    layout = solve(ITEMS, FLOWS)
+    best = min(layout_cost(dict(zip(["reservoir", "cells", "tips"], slots)), FLOWS)
+               for slots in permutations(SLOTS, 3) if slots[1] in deck.MODULE_SLOTS["temperature"])
+    assert layout_cost(layout, FLOWS) == pytest.approx(best)
+
+
+def test_pinned_items_keep_their_slots():
+    layout = solve(ITEMS, FLOWS, fixed={"reservoir": 1, "tips": "11"})
+    assert layout["reservoir"] == "1" and layout["tips"] == "11"
+    assert layout["cells"] not in ("1", "11")
+
+
+def test_thermocycler_takes_its_fixed_slots():
+    items = ITEMS + [Item("thermocycler", module="thermocycler module")]
+    flows = add_cycle(dict(FLOWS), ["tips", "thermocycler", "cells"], count=10)
+    layout = solve(items, flows)
+    assert layout["thermocycler"] == "7"
+    assert not set(deck.THERMOCYCLER_SLOTS) & {layout[name] for name in ("reservoir", "cells", "tips")}
+
+
+def test_too_many_items_raise():
+    items = [Item(f"plate {i}") for i in range(len(SLOTS) + 1)]
+    with pytest.raises(ValueError, match="No free slot"):
+        solve(items, {})
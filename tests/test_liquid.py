@@ -0,0 +1,76 @@
+"""LiquidLedger volumes and the heights it puts tips at."""
+
+from math import pi
+
+import pytest
+
+from ot2_tools.liquid import LiquidLedger
+from ot2_tools.simulation import SimulatedProtocol
+
+
+@pytest.fixture
+def protocol():
+    return SimulatedProtocol()
+
+
+def test_heights_follow_round_wells(protocol):
+    well = protocol.load_labware("nest_96_wellplate_200ul_flat", 1)["A1"]
+    ledger = LiquidLedger()
+    ledger.fill(well, 200)
+    area = pi * (well.diameter / 2) ** 2
+    assert ledger.height(well) == pytest.approx(200 / area)
+    assert ledger.height(well, 10 * well.max_volume) == well.depth
+
+
+def test_heights_follow_rectangular_wells(protocol):
+    well = protocol.load_labware("usascientific_12_reservoir_22ml", 1)["A1"]
+    ledger = LiquidLedger()
+    ledger.fill(well, 15000)
+    assert ledger.height(well) == pytest.approx(15000 / (well.length * well.width))
+
+
+def test_aspirate_location_stays_under_the_lowered_surface(protocol):
+    well = protocol.load_labware("usascientific_12_reservoir_22ml", 1)["A1"]
+    ledger = LiquidLedger(submerge=2, clearance=1)
+    ledger.fill(well, 15000)
+    after = ledger.height(well, 15000 - 1600)
+    assert ledger.aspirate_location(well, 1600).point.z == pytest.approx(well.bottom(after - 2).point.z)
+    #Nearly empty: never closer to the bottom than the clearance
+    assert ledger.aspirate_location(well, 14990).point.z == pytest.approx(well.bottom(1).point.z)
+
+
+def test_dispense_location_ends_just_under_the_new_surface(protocol):
+    well = protocol.load_labware("usascientific_12_reservoir_22ml", 1)["A1"]
+    ledger = LiquidLedger(submerge=2)
+    ledger.fill(well, 5000)
+    assert ledger.dispense_location(well, 5000).point.z == \
+        pytest.approx(well.bottom(ledger.height(well, 10000) - 2).point.z)
+
+
+def test_multichannel_in_a_trough_draws_for_every_tip(protocol):
+    tips = protocol.load_labware("opentrons_96_tiprack_300ul", 1)
+    well = protocol.load_labware("usascientific_12_reservoir_22ml", 2)["A1"]
+    p300 = protocol.load_instrument("p300_multi_gen2", "left", tip_racks=[tips])
+    ledger = LiquidLedger()
+    ledger.fill(well, 10000)
+    p300.pick_up_tip()
+    ledger.aspirate(p300, 100, well)
+    assert ledger.volume(well) == pytest.approx(10000 - 8 * 100)
+
+
+def test_overdrawing_and_overfilling_raise(protocol):
+    well = protocol.load_labware("nest_96_wellplate_200ul_flat", 1)["A1"]
+    ledger = LiquidLedger()
+    ledger.fill(well, 50)
+    with pytest.raises(ValueError, match="needed"):
+        ledger.remove(well, 60)
+    with pytest.raises(ValueError, match="overflow"):
+        ledger.add(well, well.max_volume)
+
+
+def test_conical_wells_are_refused_before_any_liquid_moves(protocol):
+    well = protocol.load_labware("armadillo_96_wellplate_200ul_pcr_full_skirt", 1)["A1"]
+    ledger = LiquidLedger()
+    with pytest.raises(ValueError, match="conical"):
+        ledger.fill(well, 20)
+    assert ledger.volume(well) == 0
@@ -0,0 +1,125 @@
+"""Inoculation volumes read from plate-reader exports."""
+
+import os
+import time
+
+import pytest
+
+from ot2_tools.od import ROWS, inoculated, inoculation_volumes, read_plate
+
+np = pytest.importorskip("numpy")
+
+#One OD plate: cultures in columns 1-3, medium only in column 4, read 20x diluted
+PLATE = dict(plates=[[1, 2, 3]], blank_column=4, dilution=20, medium_volume=225, default=25)
+
+
+class RobotProtocol:
+    """Stands in for a protocol running on the robot: not simulating, and keeps its comments and pauses."""
+
+    def __init__(self):
+        self.comments = []
+        self.pauses = []
+
+    def is_simulating(self):
+        return False
+
+    def comment(self, msg):
+        self.comments.append(msg)
+
+    def pause(self, msg):
+        self.pauses.append(msg)
+
+
+def write_grid(path, columns, mtime=None):
+    """A grid export with a header line; columns maps 1-based column numbers to the OD of all its wells."""
+    lines = ["Plate 1,OD600"]
+    for row in ROWS:
+        lines.append(",".join([row] + [str(columns.get(column, 0.045)) for column in range(1, 13)]))
+    path.write_text("\n".join(lines) + "\n")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_reads_grid_and_long_exports(tmp_path):
+    grid = read_plate(write_grid(tmp_path / "grid.csv", {1: 0.1}))
+    assert grid.shape == (8, 12)
+    assert grid[7, 0] == pytest.approx(0.1)
+    (tmp_path / "long.csv").write_text("Well,OD\nA1,0.2\nH12,0.3\n")
+    long = read_plate(tmp_path / "long.csv")
+    assert long[0, 0] == pytest.approx(0.2)
+    assert long[7, 11] == pytest.approx(0.3)
+    assert np.isfinite(long).sum() == 2
+
+
+def test_simulating_uses_the_default():
+    protocol = RobotProtocol()
+    protocol.is_simulating = lambda: True
+    assert inoculation_volumes(protocol, ["missing.csv"], None, **PLATE) == [25, 25, 25]
+
+
+def test_volumes_bring_each_culture_to_the_target(tmp_path):
+    #Blank-corrected and undiluted: column 1 at 3.0 needs 0.3 * 225 / (3.0 - 0.3) = 25 µl
+    export = write_grid(tmp_path / "od.csv", {1: 0.045 + 3.0 / 20, 2: 0.045 + 1.2 / 20, 3: 0.045 + 0.35 / 20,
+                                              4: 0.045})
+    protocol = RobotProtocol()
+    volumes = inoculation_volumes(protocol, [export], None, **PLATE)
+    assert volumes == [25.0, 75.0, 200]
+    assert any("low OD in" in comment for comment in protocol.comments)
+    assert not protocol.pauses
+
+
+def test_columns_without_growth_are_skipped_after_a_pause(tmp_path):
+    export = write_grid(tmp_path / "od.csv", {1: 0.045 + 3.0 / 20, 2: 0.04})
+    protocol = RobotProtocol()
+    volumes = inoculation_volumes(protocol, [export], None, **PLATE)
+    assert volumes[0] == 25.0
+    assert volumes[1] is None and volumes[2] is None
+    assert len(protocol.pauses) == 1 and "no growth" in protocol.pauses[0]
+    assert inoculated(volumes, ["s1", "s2", "s3"], ["d1", "d2", "d3"]) == [[25.0], ["s1"], ["d1"]]
+    assert inoculated([None], ["s1"], ["d1"]) == [[], [], []]
+
+
+def test_one_empty_well_takes_its_column_median(tmp_path):
+    export = tmp_path / "od.csv"
+    write_grid(export, {1: 0.045 + 3.0 / 20})
+    text = export.read_text().replace(f"A,{0.045 + 3.0 / 20}", "A,0.0", 1)
+    export.write_text(text)
+    protocol = RobotProtocol()
+    assert inoculation_volumes(protocol, [export], None, **PLATE)[0] == 25.0
+    assert "A1" in protocol.pauses[0]
+
+
+def test_export_count_must_match_the_plates(tmp_path):
+    export = write_grid(tmp_path / "od.csv", {})
+    with pytest.raises(ValueError, match="2 OD export"):
+        inoculation_volumes(RobotProtocol(), [export, export], None, **PLATE)
+    with pytest.raises(FileNotFoundError):
+        inoculation_volumes(RobotProtocol(), [tmp_path / "missing.csv"], None, **PLATE)
+
+
+def test_export_must_cover_the_plate(tmp_path):
+    (tmp_path / "od.csv").write_text("A1,0.5\n")
+    with pytest.raises(ValueError, match="no readings"):
+        inoculation_volumes(RobotProtocol(), [tmp_path / "od.csv"], None, **PLATE)
+
+
+def test_directory_takes_only_an_export_saved_during_the_run(tmp_path):
+    since = time.time() - 60
+    write_grid(tmp_path / "old.csv", {1: 0.2}, mtime=since - 3600)
+    with pytest.raises(ValueError, match="time this run"):
+        inoculation_volumes(RobotProtocol(), tmp_path, None, **PLATE)
+    with pytest.raises(FileNotFoundError):
+        inoculation_volumes(RobotProtocol(), tmp_path, since, timeout=0, **PLATE)
+    write_grid(tmp_path / "new.csv", {1: 0.045 + 3.0 / 20})
+    protocol = RobotProtocol()
+    assert inoculation_volumes(protocol, tmp_path, since, timeout=0, **PLATE)[0] == 25.0
+    assert "new.csv" in protocol.comments[0]
+    write_grid(tmp_path / "another.csv", {})
+    with pytest.raises(ValueError, match="2 exports"):
+        inoculation_volumes(RobotProtocol(), tmp_path, since, timeout=0, **PLATE)
+
+
+def test_directory_serves_only_one_plate(tmp_path):
+    with pytest.raises(ValueError, match="Name the export file"):
+        inoculation_volumes(RobotProtocol(), tmp_path, time.time(), **{**PLATE, "plates": [[1], [2]]})
@@ -0,0 +1,87 @@
+"""Splitting samples into runs that fit the deck."""
+
+import pytest
+
+from ot2_tools.planner import Labware, Phase, plan_batch
+from ot2_tools.simulation import SimulatedProtocol
+
+LABWARE = [
+    Labware("samples", "armadillo_96_wellplate_200ul_pcr_full_skirt"),
+    Labware("cells", "armadillo_96_wellplate_200ul_pcr_full_skirt", module="temperature module gen2"),
+    Labware("reservoir", "usascientific_12_reservoir_22ml", kind="reservoir"),
+]
+PHASES = [
+    Phase("add DNA", "p20_multi_gen2", 10, "samples", "cells"),
+    Phase("add SOC", "p300_multi_gen2", 125, "reservoir", "cells", reagent="SOC", new_tip="once"),
+]
+
+
+def test_one_run_when_everything_fits():
+    plan = plan_batch(51, LABWARE, PHASES)
+    assert len(plan.runs) == 1 and plan.handoffs == 0
+    run = plan.runs[0]
+    assert run.num_columns == 7
+    assert len(run.tip_racks["p20_multi_gen2"]) == 1 and len(run.tip_racks["p300_multi_gen2"]) == 1
+    sources, dests = zip(*run.locations["add DNA"])
+    assert [well for _, _, well in sources] == [f"A{column}" for column in range(1, 8)]
+    assert [well for _, _, well in dests] == [f"A{column}" for column in range(1, 8)]
+    #125 µl x 8 channels x 7 columns comes out of one reservoir well
+    assert {well for _, _, well in next(zip(*run.locations["add SOC"]))} == {"A1"}
+
+
+def test_slots_do_not_collide():
+    run = plan_batch(51, LABWARE, PHASES).runs[0]
+    slots = [slot for slots in run.labware.values() for slot in slots]
+    slots += [slot for slots in run.tip_racks.values() for slot in slots]
+    assert len(slots) == len(set(slots))
+    kind, slot = run.modules["temperature module gen2"]
+    assert kind == "temperature" and slot in run.labware["cells"]
+
+
+def test_module_plates_split_into_runs():
+    #The temperature module holds one plate, so 200 samples (25 columns) need three runs of contiguous columns
+    plan = plan_batch(200, LABWARE, PHASES)
+    assert len(plan.runs) == 3
+    columns = [column for run in plan.runs for column in run.columns]
+    assert columns == list(range(25))
+    assert all(run.num_columns <= 12 for run in plan.runs)
+
+
+def test_runs_load_on_the_deck():
+    run = plan_batch(51, LABWARE, PHASES).runs[0]
+    labware, pipettes, modules = run.load(SimulatedProtocol())
+    sources, dests = run.wells("add DNA", labware)
+    assert len(sources) == len(dests) == 7
+    assert set(pipettes) == {"p20_multi_gen2", "p300_multi_gen2"}
+    assert set(modules) == {"temperature module gen2"}
+
+
+def test_unknown_roles_raise():
+    with pytest.raises(ValueError, match="unknown labware role"):
+        plan_batch(8, LABWARE, [Phase("plate", "p20_multi_gen2", 10, "cells", "agar")])
+
+
+def test_pinned_slots_are_kept():
+    plan = plan_batch(51, LABWARE, PHASES, slots={"samples": 2, "cells": 3, "reservoir": [6, 9]},
+                      tip_slots={"p20_multi_gen2": [5, 8], "p300_multi_gen2": [4]})
+    run = plan.runs[0]
+    #Pins beyond what the run needs are left empty
+    assert run.labware == {"samples": ["2"], "cells": ["3"], "reservoir": ["6"]}
+    assert run.tip_racks == {"p20_multi_gen2": ["5"], "p300_multi_gen2": ["4"]}
+    assert run.modules["temperature module gen2"] == ("temperature", "3")
+
+
+def test_pins_for_unknown_roles_raise():
+    with pytest.raises(ValueError, match="unknown labware role"):
+        plan_batch(8, LABWARE, PHASES, slots={"agar": 1})
+
+
+def test_load_comments_the_layout_before_moving():
+    run = plan_batch(51, LABWARE, PHASES, slots={"samples": 2, "cells": 3, "reservoir": 6},
+                     tip_slots={"p20_multi_gen2": [5], "p300_multi_gen2": [4]}).runs[0]
+    protocol = SimulatedProtocol()
+    run.load(protocol)
+    first = protocol.trace().commands[0]
+    assert first.kind == "comment"
+    assert first.params["message"] == ("Deck layout: samples on 2; cells on temperature module gen2 in 3; "
+                                       "reservoir on 6; p20_multi_gen2 tips on 5; p300_multi_gen2 tips on 4")
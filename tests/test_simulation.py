@@ -0,0 +1,14 @@
+"""The simulator's clock."""
+
+import pytest
+
+from ot2_tools.simulation import REPO_ROOT, SimulatedProtocol, load_protocol
+from ot2_tools.timing import TimingModel
+
+
+@pytest.mark.parametrize("path", ["Protocols/streptactin_beads_test.py", "Protocols/transform_golden_gate_reactions.py"])
+def test_clock_is_the_time_of_every_command_so_far(path):
+    protocol = SimulatedProtocol(REPO_ROOT / path)
+    load_protocol(REPO_ROOT / path).run(protocol)
+    model = TimingModel()
+    assert protocol.clock() == pytest.approx(sum(model.duration(command) for command in protocol.trace().commands))